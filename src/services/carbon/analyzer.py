@@ -15,15 +15,65 @@ This is the main file you'll run!
 """
 
 import json
+import logging
+import os
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 from pathlib import Path
 
+# orjson (C-backed) parses Claude responses and writes result files much
+# faster than stdlib json; fall back to json if it isn't installed
+try:
+    import orjson
+
+    def _json_loads(text):
+        return orjson.loads(text)
+
+    def _json_dumps(obj, pretty: bool = False) -> bytes:
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+except ImportError:
+
+    def _json_loads(text):
+        return json.loads(text)
+
+    def _json_dumps(obj, pretty: bool = False) -> bytes:
+        if pretty:
+            return json.dumps(obj, indent=2).encode('utf-8')
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
 # Import our components
 from parser import TransactionParser
 from calculator import EmissionCalculator
 from client import ClaudeClient
-from prompts import categorization_prompt, coaching_prompt
+from prompts import (
+    CATEGORIZATION_SYSTEM, COACHING_SYSTEM, categorization_prompt, coaching_prompt
+)
+from semcache import SemanticCategoryCache
+
+# Progress output goes through logging so batch runs can silence it
+# (messages are only formatted when INFO is enabled)
+log = logging.getLogger(__name__)
+
+# Result files are written on one background thread shared by every
+# analyzer in the process (the API creates an analyzer per upload)
+_SAVE_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix='carbon-save')
+
+
+def _write_file(path: Path, data: bytes) -> None:
+    """Write a file atomically, so readers (e.g. the results API) never see a partial one."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        raise
 
 
 class CarbonAnalyzer:
@@ -36,25 +86,49 @@ class CarbonAnalyzer:
         print(result)
     """
     
-    def __init__(self, api_key: str = None):
+    # Transactions sent per categorization request
+    CATEGORIZATION_BATCH_SIZE = 50
+    
+    # Maximum categorization requests in flight at once
+    CATEGORIZATION_MAX_WORKERS = 8
+    
+    # CSV rows parsed, categorized and totalled per step (bounds memory on large files)
+    CSV_CHUNK_SIZE = 1000
+    
+    def __init__(self,
+                 api_key: str = None,
+                 semantic_cache: bool = True,
+                 batch_api: bool = False):
         """
         Initialize analyzer with all components.
         
         Args:
             api_key: Claude API key (optional, uses env var if not provided)
+            semantic_cache: Reuse categories of near-identical descriptions seen
+                            in earlier runs (needs an embedding library, see semcache.py)
+            batch_api: Categorize through the Message Batches API - half the
+                       token cost, but each CSV chunk can take minutes (offline jobs)
         """
-        print("\n🌱 Initializing Carbon Footprint Analyzer...")
-        print("="*70)
+        log.info("\n🌱 Initializing Carbon Footprint Analyzer...\n%s", "="*70)
         
         # Initialize components
         self.parser = TransactionParser()
         self.calculator = EmissionCalculator()
-        self.claude = ClaudeClient(api_key=api_key)
+        # Categorization runs at temperature 0, so re-analyzing the same
+        # transactions is served from the response cache
+        self.claude = ClaudeClient(api_key=api_key, cache=True)
+        self.semantic_cache = SemanticCategoryCache() if semantic_cache else None
+        self.batch_api = batch_api
         
-        print("="*70)
-        print("✅ All components ready!\n")
+        # Result files are written in the background (see wait_for_saves)
+        self._pending_saves: List[Future] = []
+        
+        log.info("%s\n✅ All components ready!\n", "="*70)
     
-    def analyze_file(self, file_path: str, skip_coaching: bool = False) -> Dict:
+    def analyze_file(self,
+                     file_path: str,
+                     skip_coaching: bool = False,
+                     pretty: bool = False) -> Dict:
         """
         Complete analysis pipeline for a transaction CSV file.
         
@@ -62,6 +136,7 @@ class CarbonAnalyzer:
         1. Parse CSV
         2. Categorize with Claude AI
         3. Calculate emissions
+           (steps 1-3 run per chunk of CSV_CHUNK_SIZE rows)
         4. Get benchmarks
         5. Get coaching (optional)
         6. Save results
@@ -69,73 +144,72 @@ class CarbonAnalyzer:
         Args:
             file_path: Path to transactions CSV
             skip_coaching: If True, skip AI coaching (saves money)
+            pretty: If True, indent the saved results file for reading
             
         Returns:
             Complete analysis dictionary
         """
         
-        print("\n" + "="*70)
-        print("STARTING CARBON FOOTPRINT ANALYSIS")
-        print("="*70)
+        log.info("\n%s\nSTARTING CARBON FOOTPRINT ANALYSIS\n%s", "="*70, "="*70)
         
-        # STEP 1: Parse CSV
-        print("\n📄 STEP 1: Parsing transactions...")
-        print("-"*70)
-        transactions = self.parser.parse_csv(file_path)
+        # STEPS 1-3: Parse, categorize and calculate chunk by chunk
+        # (only per-category totals stay in memory between chunks)
+        log.info("\n📄 STEPS 1-3: Parsing, categorizing (Claude AI) and calculating emissions...\n%s", "-"*70)
+        self.calculator.reset()
+        for chunk in self.parser.iter_csv(file_path, chunk_size=self.CSV_CHUNK_SIZE):
+            categorized = self._categorize_transactions(self.parser.to_dict_list(chunk))
+            self.calculator.accumulate(categorized)
         
-        if not transactions:
-            raise ValueError("No valid transactions found in CSV")
+        if self.semantic_cache is not None:
+            # Once per file: each save rewrites the whole store
+            self.semantic_cache.save()
         
         summary = self.parser.get_summary()
-        print(f"   Transactions: {summary['total_transactions']}")
-        print(f"   Date range: {summary['date_range']['start']} to {summary['date_range']['end']}")
-        print(f"   Total spent: ${summary['total_amount']:.2f}")
+        if 'error' in summary:
+            raise ValueError("No valid transactions found in CSV")
         
-        # STEP 2: Categorize with Claude
-        print("\n🤖 STEP 2: Categorizing transactions with Claude AI...")
-        print("-"*70)
-        categorized = self._categorize_transactions(self.parser.to_dict_list())
+        log.info("   Transactions: %s", summary['total_transactions'])
+        log.info("   Date range: %s to %s", summary['date_range']['start'], summary['date_range']['end'])
+        log.info("   Total spent: $%.2f", summary['total_amount'])
         
-        # STEP 3: Calculate emissions
-        print("\n🧮 STEP 3: Calculating carbon emissions...")
-        print("-"*70)
-        emissions_result = self.calculator.calculate_total(categorized)
+        emissions_result = self.calculator.finalize()
+        log.info("   ✅ Total emissions: %s kg CO2e", emissions_result['total_emissions_kg'])
         
         # Print breakdown
-        print(f"\n   📊 Emission Breakdown:")
-        for category, data in emissions_result['breakdown'].items():
-            print(f"      {category:20} {data['emissions_kg']:8.2f} kg ({data['percentage']:5.1f}%)")
+        if log.isEnabledFor(logging.INFO):
+            log.info("\n   📊 Emission Breakdown:")
+            for category, data in emissions_result['breakdown'].items():
+                log.info("      %-20s %8.2f kg (%5.1f%%)", category, data['emissions_kg'], data['percentage'])
         
         # STEP 4: Get benchmarks
-        print("\n📊 STEP 4: Comparing to global benchmarks...")
-        print("-"*70)
-        period_days = self._calculate_period_days(transactions)
+        log.info("\n📊 STEP 4: Comparing to global benchmarks...\n%s", "-"*70)
+        period_days = summary['date_range']['days']
         benchmarks = self.calculator.get_benchmarks(
             emissions_result['total_emissions_kg'],
             period_days
         )
         
-        print(f"   Your annual projection: {benchmarks['your_annual_projection_kg']:,} kg/year")
-        print(f"   vs US Average ({benchmarks['us_average_annual_kg']:,} kg): {benchmarks['comparison']['vs_us_average']}%")
-        print(f"   vs Paris Target ({benchmarks['paris_target_annual_kg']:,} kg): {benchmarks['comparison']['vs_paris_target']}%")
+        if log.isEnabledFor(logging.INFO):
+            log.info("   Your annual projection: %s kg/year", f"{benchmarks['your_annual_projection_kg']:,}")
+            log.info("   vs US Average (%s kg): %s%%", f"{benchmarks['us_average_annual_kg']:,}", benchmarks['comparison']['vs_us_average'])
+            log.info("   vs Paris Target (%s kg): %s%%", f"{benchmarks['paris_target_annual_kg']:,}", benchmarks['comparison']['vs_paris_target'])
         
         # STEP 5: Get AI coaching (optional)
         coaching = None
         if not skip_coaching:
-            print("\n💡 STEP 5: Generating personalized recommendations...")
-            print("-"*70)
+            log.info("\n💡 STEP 5: Generating personalized recommendations...\n%s", "-"*70)
             coaching = self._get_coaching(emissions_result)
             
-            print(f"\n   Generated {len(coaching['recommendations'])} recommendations:")
-            for i, rec in enumerate(coaching['recommendations'][:3], 1):
-                print(f"   {i}. {rec['action']}")
-                print(f"      Savings: {rec['potential_savings_kg']} kg/year | Difficulty: {rec['difficulty']}")
+            if log.isEnabledFor(logging.INFO):
+                log.info("\n   Generated %d recommendations:", len(coaching['recommendations']))
+                for i, rec in enumerate(coaching['recommendations'][:3], 1):
+                    log.info("   %d. %s", i, rec['action'])
+                    log.info("      Savings: %s kg/year | Difficulty: %s", rec['potential_savings_kg'], rec['difficulty'])
         else:
-            print("\n⏭️  STEP 5: Skipping coaching (as requested)")
+            log.info("\n⏭️  STEP 5: Skipping coaching (as requested)")
         
         # STEP 6: Combine results
-        print("\n✅ ANALYSIS COMPLETE!")
-        print("="*70)
+        log.info("\n✅ ANALYSIS COMPLETE!\n%s", "="*70)
         
         result = {
             **emissions_result,
@@ -153,14 +227,14 @@ class CarbonAnalyzer:
         }
         
         # STEP 7: Save results
-        output_path = self._save_results(result, file_path)
-        print(f"\n💾 Results saved to: {output_path}")
+        output_path = self._save_results(result, file_path, pretty=pretty)
+        log.info("\n💾 Results saved to: %s", output_path)
         
         # Print cost summary
-        cost_info = self.claude.get_cost_estimate()
-        print(f"\n💰 API Cost Summary:")
-        print(f"   Total calls: {cost_info['total_calls']}")
-        print(f"   Total cost: ${cost_info['total_cost_usd']:.4f}")
+        cost_info = result['api_cost']
+        log.info("\n💰 API Cost Summary:")
+        log.info("   Total calls: %s", cost_info['total_calls'])
+        log.info("   Total cost: $%.4f", cost_info['total_cost_usd'])
         
         return result
     
@@ -169,56 +243,188 @@ class CarbonAnalyzer:
         Use Claude AI to categorize transactions.
         
         Process:
-        1. Generate categorization prompt
-        2. Call Claude API
-        3. Parse JSON response
-        4. Handle errors gracefully
+        1. Reuse categories from the semantic cache where possible
+        2. Send each remaining description to Claude only once
+           (repeat merchants share the answer)
+        3. Split them into batches of CATEGORIZATION_BATCH_SIZE
+           (halved further if a request would exceed the input token budget)
+        4. Categorize the batches concurrently (one Claude call each, or
+           one Message Batch for all of them when batch_api is set)
+        5. Parse each JSON response independently
+        6. Handle errors gracefully (a bad response only affects its own batch)
         
         Returns:
-            Transactions with 'category' field added
+            Transactions with 'category' field added, in input order
         """
+        # Near-identical merchants seen before don't need a Claude call
+        hits = [None] * len(transactions)
+        if self.semantic_cache is not None and self.semantic_cache.available:
+            hits = self.semantic_cache.lookup([t['description'] for t in transactions])
+        pending = [t for t, hit in zip(transactions, hits) if hit is None]
+        if len(pending) < len(transactions):
+            log.info("   ♻️  %d transactions matched the semantic cache", len(transactions) - len(pending))
         
-        # Generate prompt
-        prompt = categorization_prompt(transactions)
+        # Bank exports repeat merchants a lot; categorize each description once
+        unique: Dict[str, Dict] = {}
+        for t in pending:
+            unique.setdefault(t['description'], t)
+        unique_list = list(unique.values())
+        if len(unique_list) < len(pending):
+            log.info("   🔁 %d unique descriptions among %d transactions", len(unique_list), len(pending))
         
-        # Call Claude with low temperature (more consistent)
-        response = self.claude.call(
-            messages=[
+        batch_size = self.CATEGORIZATION_BATCH_SIZE
+        batches = [
+            unique_list[i:i + batch_size]
+            for i in range(0, len(unique_list), batch_size)
+        ]
+        # Very long descriptions could push a batch past the input token budget
+        batches = [
+            group
+            for batch in batches
+            for group in self.claude.split_for_budget(batch, self._categorization_request)
+        ]
+        
+        if self.batch_api and batches:
+            responses = self.claude.run_batch([self._categorization_request(b) for b in batches])
+            results = [
+                self._parse_categorization(response, batch)
+                for response, batch in zip(responses, batches)
+            ]
+        else:
+            # Network-bound: overlap the API calls with a thread pool.
+            # pool.map returns results in the same order as the batches.
+            max_workers = max(1, min(self.CATEGORIZATION_MAX_WORKERS, len(batches)))
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                results = list(pool.map(self._categorize_batch, batches))
+        
+        answers = self._answers_by_description(batches, results)
+        categorized_list = [self._apply_answer(t, answers.get(t['description'])) for t in pending]
+        
+        if self.semantic_cache is not None and self.semantic_cache.available:
+            # Remember Claude's confident answers for future runs
+            confident = [
+                d for d in unique
+                if d in answers and answers[d].get('confidence') in ('high', 'medium')
+            ]
+            self.semantic_cache.add(confident, [answers[d] for d in confident])
+        
+        if len(pending) < len(transactions):
+            categorized_list = self._merge_cached(transactions, hits, categorized_list)
+        
+        log.info("   ✅ Categorized %d transactions (%d batches)", len(categorized_list), len(batches))
+        
+        # Show category distribution
+        if log.isEnabledFor(logging.INFO):
+            categories = Counter(t.get('category', 'unknown') for t in categorized_list)
+            
+            log.info("   📋 Category distribution:")
+            for cat, count in categories.most_common():
+                log.info("      %-20s %3d transactions", cat, count)
+        
+        return categorized_list
+    
+    def _answers_by_description(self,
+                                batches: List[List[Dict]],
+                                results: List[List[Dict]]) -> Dict[str, Dict]:
+        """
+        Map each description sent to Claude to its categorization.
+        
+        Claude returns one entry per transaction in order, so entries are
+        matched by position; if a batch came back with a different number
+        of entries, they are matched by their echoed description instead.
+        """
+        answers = {}
+        for batch, result in zip(batches, results):
+            if len(result) == len(batch):
+                answers.update(zip((t['description'] for t in batch), result))
+            else:
+                answers.update((r['description'], r) for r in result if r.get('description'))
+        return answers
+    
+    def _apply_answer(self, transaction: Dict, answer: Optional[Dict]) -> Dict:
+        """Copy Claude's category onto a transaction ('other' if it gave none)."""
+        if answer is None:
+            return {**transaction, 'category': 'other', 'confidence': 'low'}
+        return {
+            **transaction,
+            'category': answer.get('category', 'other'),
+            'confidence': answer.get('confidence', 'low'),
+            'reasoning': answer.get('reasoning')
+        }
+    
+    def _merge_cached(self,
+                      transactions: List[Dict],
+                      hits: List,
+                      categorized: List[Dict]) -> List[Dict]:
+        """
+        Interleave semantic cache hits with Claude's answers in input order
+        (categorized has one entry per transaction that missed the cache).
+        """
+        from_claude = iter(categorized)
+        merged = []
+        for t, hit in zip(transactions, hits):
+            if hit is None:
+                merged.append(next(from_claude))
+            else:
+                merged.append({
+                    **t,
+                    'category': hit['category'],
+                    'confidence': hit['confidence'],
+                    'reasoning': f"Matches a previously categorized merchant (similarity {hit['similarity']})"
+                })
+        return merged
+    
+    def _categorize_batch(self, transactions: List[Dict]) -> List[Dict]:
+        """
+        Categorize one batch of transactions with a single Claude call.
+        
+        Falls back to 'other' for this batch only if Claude's
+        response can't be parsed.
+        """
+        response = self.claude.call(**self._categorization_request(transactions))
+        return self._parse_categorization(response, transactions)
+    
+    def _categorization_request(self, transactions: List[Dict]) -> Dict:
+        """Claude call arguments for categorizing one batch."""
+        return {
+            'messages': [
                 {
                     'role': 'user',
-                    'content': prompt
+                    'content': categorization_prompt(transactions)
                 }
             ],
-            temperature=0.3  # Low temp for consistent categorization
-        )
+            'system': CATEGORIZATION_SYSTEM,
+            'temperature': 0.0,  # Deterministic categorization (cacheable)
+            'cache_system': True  # Static instructions are billed at the cached rate
+        }
+    
+    def _parse_categorization(self, response: Optional[Dict], transactions: List[Dict]) -> List[Dict]:
+        """
+        Parse Claude's categorization JSON for one batch.
+        
+        Falls back to 'other' for the batch if the response is missing
+        (failed batch request) or isn't valid JSON.
+        """
+        if response is None:
+            log.warning("   ⚠️  Warning: No response for a batch of %d transactions", len(transactions))
+            return [
+                {**t, 'category': 'other', 'confidence': 'low'}
+                for t in transactions
+            ]
         
         # Parse JSON response
         try:
             # Claude should return pure JSON
-            result = json.loads(response['content'])
-            categorized_list = result['categorized_transactions']
-            
-            print(f"   ✅ Categorized {len(categorized_list)} transactions")
-            
-            # Show category distribution
-            categories = {}
-            for t in categorized_list:
-                cat = t.get('category', 'unknown')
-                categories[cat] = categories.get(cat, 0) + 1
-            
-            print(f"   📋 Category distribution:")
-            for cat, count in sorted(categories.items(), key=lambda x: x[1], reverse=True):
-                print(f"      {cat:20} {count:3} transactions")
-            
-            return categorized_list
+            result = _json_loads(response['content'])
+            return result['categorized_transactions']
             
         except json.JSONDecodeError as e:
-            print(f"   ⚠️  Warning: Claude returned invalid JSON")
-            print(f"   Error: {e}")
-            print(f"   Response preview: {response['content'][:200]}...")
+            log.warning("   ⚠️  Warning: Claude returned invalid JSON")
+            log.warning("   Error: %s", e)
+            log.warning("   Response preview: %s...", response['content'][:200])
             
             # Fallback: return transactions with 'other' category
-            print(f"   Using fallback: categorizing all as 'other'")
+            log.warning("   Using fallback: categorizing %d transactions as 'other'", len(transactions))
             return [
                 {**t, 'category': 'other', 'confidence': 'low'}
                 for t in transactions
@@ -249,17 +455,19 @@ class CarbonAnalyzer:
                     'content': prompt
                 }
             ],
-            temperature=0.7  # Higher temp for creative suggestions
+            system=COACHING_SYSTEM,
+            temperature=0.7,  # Higher temp for creative suggestions
+            cache_system=True
         )
         
         # Parse JSON response
         try:
-            coaching = json.loads(response['content'])
+            coaching = _json_loads(response['content'])
             return coaching
             
         except json.JSONDecodeError as e:
-            print(f"   ⚠️  Warning: Could not parse coaching response")
-            print(f"   Error: {e}")
+            log.warning("   ⚠️  Warning: Could not parse coaching response")
+            log.warning("   Error: %s", e)
             
             # Fallback
             return {
@@ -268,15 +476,7 @@ class CarbonAnalyzer:
                 'realistic_annual_target_kg': emissions_result['total_emissions_kg'] * 12
             }
     
-    def _calculate_period_days(self, transactions: List) -> int:
-        """Calculate number of days covered by transactions."""
-        if not transactions:
-            return 30
-        
-        dates = [t.date for t in transactions]
-        return (max(dates) - min(dates)).days + 1
-    
-    def _save_results(self, result: Dict, original_file: str) -> str:
+    def _save_results(self, result: Dict, original_file: str, pretty: bool = False) -> str:
         """
         Save analysis results to JSON file.
 
@@ -284,6 +484,11 @@ class CarbonAnalyzer:
             transactions.csv → carbon_analysis_transactions_2025-01-30.json
 
         Saves to: src/services/carbon/results/
+        Written compact unless pretty=True (indented for human debugging).
+        
+        The result is serialized here, but the disk write runs in the
+        background and this returns the path right away. Call
+        wait_for_saves() if the file must exist before continuing.
         """
         # Create output filename
         original_name = Path(original_file).stem
@@ -298,11 +503,30 @@ class CarbonAnalyzer:
         # Create results directory if needed
         results_dir.mkdir(exist_ok=True)
 
-        # Save as formatted JSON
-        with open(output_path, 'w') as f:
-            json.dump(result, f, indent=2)
+        # Serialize now (so later changes to result aren't picked up),
+        # write the bytes in the background (no text-mode encoding layer)
+        data = _json_dumps(result, pretty=pretty)
+        future = _SAVE_POOL.submit(_write_file, output_path, data)
+        
+        def log_failure(f: Future) -> None:
+            if f.exception() is not None:
+                log.error("❌ Could not save %s: %s", output_path, f.exception())
+        
+        future.add_done_callback(log_failure)
+        self._pending_saves.append(future)
 
         return str(output_path)
+    
+    def wait_for_saves(self) -> None:
+        """
+        Block until every background results write has finished.
+        
+        Raises:
+            OSError: If a write failed
+        """
+        pending, self._pending_saves = self._pending_saves, []
+        for future in pending:
+            future.result()
 
 
 # Main execution
@@ -315,12 +539,25 @@ if __name__ == "__main__":
     
     Or with custom file:
         python analyzer.py your_transactions.csv
+    
+    Add --pretty to write an indented results file.
+    Add --quiet to hide progress output (warnings and errors still show).
+    Add --batch-api to categorize through the Message Batches API (half price, slower).
     """
     import sys
     
+    # Progress messages are logged at INFO level
+    logging.basicConfig(
+        level=logging.WARNING if '--quiet' in sys.argv else logging.INFO,
+        format='%(message)s'
+    )
+    
     # Get file path from command line or use default
-    if len(sys.argv) > 1:
-        csv_file = sys.argv[1]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    pretty = '--pretty' in sys.argv
+    batch_api = '--batch-api' in sys.argv
+    if args:
+        csv_file = args[0]
     else:
         csv_file = "src/services/carbon/samples/sample_transactions_5.csv"
     
@@ -331,11 +568,12 @@ if __name__ == "__main__":
     try:
         # Create analyzer
         print("\n📍 Step: Initializing analyzer...")
-        analyzer = CarbonAnalyzer()
+        analyzer = CarbonAnalyzer(batch_api=batch_api)
 
         # Run analysis
         print(f"\n📍 Step: Running analysis on {csv_file}...")
-        result = analyzer.analyze_file(csv_file)
+        result = analyzer.analyze_file(csv_file, pretty=pretty)
+        analyzer.wait_for_saves()
 
         # Print summary
         print("\n" + "="*70)
@@ -13,9 +13,75 @@ No AI used here - pure mathematics.
 """
 
 import json
+import logging
+import mmap
+from operator import itemgetter, methodcaller
 from typing import Dict, List
 from pathlib import Path
 
+import numpy as np
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+from _kernels import compute_emissions, running_bincount
+
+log = logging.getLogger(__name__)
+
+
+# Flights above this price are treated as international (see emission_factors.json)
+AIR_TRAVEL_INTERNATIONAL_THRESHOLD_USD = 300
+
+# Parsed factor databases shared by every calculator in the process.
+# Keyed by (resolved path, modification time) so edits to the file are picked up.
+# Treat the cached dicts as read-only.
+_FACTORS_CACHE: Dict[tuple, Dict] = {}
+
+# Row order of the factor table; unknown categories fall back to goods_general
+CATEGORIES = (
+    'air_travel',
+    'ground_transport',
+    'food_restaurant',
+    'groceries',
+    'electricity',
+    'natural_gas',
+    'goods_electronics',
+    'goods_clothing',
+    'goods_general',
+)
+CATEGORY_CODES: Dict[str, int] = {name: code for code, name in enumerate(CATEGORIES)}
+GOODS_GENERAL_CODE = CATEGORY_CODES['goods_general']
+
+# Factor fields each category's formula reads (see calculate_transaction)
+REQUIRED_FACTOR_KEYS: Dict[str, tuple] = {
+    'air_travel': ('domestic_avg_kg', 'international_avg_kg'),
+    'ground_transport': ('avg_cost_per_mile_usd', 'rideshare_per_mile_kg'),
+    'food_restaurant': ('avg_cost_per_meal_usd', 'avg_meal_kg'),
+    'groceries': ('per_dollar_kg',),
+    'electricity': ('avg_kwh_per_dollar', 'per_kwh_kg'),
+    'natural_gas': ('avg_therms_per_dollar', 'per_therm_kg'),
+    'goods_electronics': ('per_dollar_kg',),
+    'goods_clothing': ('per_dollar_kg',),
+    'goods_general': ('per_dollar_kg',),
+}
+REQUIRED_BENCHMARK_KEYS = (
+    'us_average_annual_kg',
+    'global_average_annual_kg',
+    'paris_target_annual_kg',
+    'european_average_annual_kg',
+)
+
+# Below this many transactions calculate_total uses a plain Python loop,
+# which beats array setup and kernel dispatch (measured crossover ~1,500-2,000)
+SMALL_INPUT_ROWS = 1024
+
+# Field extractors for categorized transaction dicts
+_get_category = methodcaller('get', 'category', 'other')
+_get_amount = itemgetter('amount')
+
 
 class EmissionCalculator:
     """
@@ -32,27 +98,47 @@ class EmissionCalculator:
         Groceries for $100 → ~10 kg CO2
     """
     
-    def __init__(self, factors_file: str = None):
+    CATEGORIES = CATEGORIES
+    
+    def __init__(self, factors_file: str = None, store_items: bool = False):
         """
         Initialize calculator with emission factors database.
 
         Args:
             factors_file: Path to JSON file with emission factors (default: emission_factors.json in same dir as this script)
+            store_items: If True, include per-transaction 'items' in each breakdown
+                         category (costs memory on large CSVs, off by default)
         """
+        self.store_items = store_items
         if factors_file is None:
             # Default to emission_factors.json in the same directory as this script
             factors_file = Path(__file__).parent / "emission_factors.json"
-        self.factors = self._load_factors(factors_file)
-        print(f"✅ Loaded emission factors for {len(self.factors)} categories")
+        data = self._load_factors(factors_file)
+        self._validate_factors(data, factors_file)
+        self.factors = data['categories']
+        self._benchmarks = data['benchmarks']
+        
+        # Precompute a numeric lookup table so calculate_total can run vectorized
+        # (float64: amounts are summed, and float32 drops cents on large totals)
+        self._factor_table = self._build_factor_table()
+        # Same rows as plain tuples for the scalar calculate_transaction path
+        self._factor_rows = [tuple(row) for row in self._factor_table.tolist()]
+        
+        # Running per-category totals for accumulate() / finalize()
+        self.reset()
+        log.info("✅ Loaded emission factors for %d categories", len(self.factors))
     
     def _load_factors(self, factors_file: str) -> Dict:
         """
-        Load emission factors from JSON file.
+        Load the emission factors database from JSON file.
         
         The JSON contains:
         - categories: CO2 factors for each spending type
         - keyword_hints: Not used in calculator (used by Claude)
         - benchmarks: Global/US averages for comparison
+        
+        Parsed files are cached at module level, so creating many
+        calculators (e.g. one per API request) only parses the file once.
         """
         factors_path = Path(factors_file)
         
@@ -62,10 +148,116 @@ class EmissionCalculator:
                 f"Make sure emission_factors.json is in the same directory."
             )
         
-        with open(factors_path, 'r') as f:
-            data = json.load(f)
+        # Parse each file once per process
+        resolved = factors_path.resolve()
+        cache_key = (str(resolved), resolved.stat().st_mtime_ns)
+        data = _FACTORS_CACHE.get(cache_key)
+        if data is None:
+            # Map the file instead of reading it into an intermediate buffer
+            with open(resolved, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                data = _json_loads(mm[:])
+            _FACTORS_CACHE[cache_key] = data
+        
+        return data
+    
+    def _validate_factors(self, data: Dict, factors_file: str) -> None:
+        """
+        Check that every factor the formulas use is present and numeric.
+        
+        Runs once at init so a bad emission_factors.json fails here with
+        a clear message instead of deep inside a calculation.
         
-        return data['categories']
+        Raises:
+            ValueError: Listing every missing or non-numeric field
+        """
+        problems = []
+        categories = data.get('categories', {})
+        benchmarks = data.get('benchmarks', {})
+        
+        checks = [
+            (f"categories.{category}", categories.get(category, {}), keys)
+            for category, keys in REQUIRED_FACTOR_KEYS.items()
+        ]
+        checks.append(("benchmarks", benchmarks, REQUIRED_BENCHMARK_KEYS))
+        
+        for section, values, keys in checks:
+            for key in keys:
+                value = values.get(key)
+                if value is None:
+                    problems.append(f"{section}.{key} is missing")
+                elif isinstance(value, bool) or not isinstance(value, (int, float)):
+                    problems.append(f"{section}.{key} is not a number: {value!r}")
+        
+        if problems:
+            raise ValueError(
+                f"Invalid emission factors file: {factors_file}\n  - "
+                + "\n  - ".join(problems)
+            )
+    
+    def _build_factor_table(self) -> np.ndarray:
+        """
+        Turn each category's formula into one row of a lookup table.
+        
+        Every category formula in calculate_transaction() is
+        amount * multiplier / divisor * factor, or a flat value picked by
+        the air travel threshold, so each row holds:
+            [0] multiplier
+            [1] divisor
+            [2] factor
+            [3] flat kg when amount <= threshold (domestic flight)
+            [4] flat kg when amount >  threshold (international flight)
+        
+        Unused operands are 1 (or 0 for the flat values and air travel's
+        per-dollar part), which leaves the result unchanged, so every
+        category gives exactly the value of its original formula.
+        
+        Returns:
+            Array of shape (len(CATEGORIES), 5), rows in CATEGORIES order
+        """
+        f = self.factors
+        # (multiplier, divisor, factor) per category
+        linear = {
+            'air_travel': (0.0, 1.0, 0.0),
+            # miles = amount / cost per mile, then kg per mile
+            'ground_transport': (
+                1.0,
+                f['ground_transport']['avg_cost_per_mile_usd'],
+                f['ground_transport']['rideshare_per_mile_kg']
+            ),
+            # meals = amount / cost per meal, then kg per meal
+            'food_restaurant': (
+                1.0,
+                f['food_restaurant']['avg_cost_per_meal_usd'],
+                f['food_restaurant']['avg_meal_kg']
+            ),
+            'groceries': (f['groceries']['per_dollar_kg'], 1.0, 1.0),
+            # kWh = amount * kWh per dollar, then kg per kWh
+            'electricity': (
+                f['electricity']['avg_kwh_per_dollar'],
+                1.0,
+                f['electricity']['per_kwh_kg']
+            ),
+            # therms = amount * therms per dollar, then kg per therm
+            'natural_gas': (
+                f['natural_gas']['avg_therms_per_dollar'],
+                1.0,
+                f['natural_gas']['per_therm_kg']
+            ),
+            'goods_electronics': (f['goods_electronics']['per_dollar_kg'], 1.0, 1.0),
+            'goods_clothing': (f['goods_clothing']['per_dollar_kg'], 1.0, 1.0),
+            'goods_general': (f['goods_general']['per_dollar_kg'], 1.0, 1.0),
+        }
+        
+        table = np.zeros((len(self.CATEGORIES), 5), dtype=np.float64)
+        for i, name in enumerate(self.CATEGORIES):
+            table[i, :3] = linear[name]
+        
+        air = CATEGORY_CODES['air_travel']
+        table[air, 3] = f['air_travel']['domestic_avg_kg']
+        table[air, 4] = f['air_travel']['international_avg_kg']
+        
+        return table
     
     def calculate_transaction(self, 
                             category: str, 
@@ -107,78 +299,13 @@ class EmissionCalculator:
             Estimated CO2 emissions in kilograms
         """
         
-        # --- AIR TRAVEL ---
-        if category == "air_travel":
-            # Use amount as proxy for flight distance
-            # International flights are more expensive
-            if amount > 300:
-                # International flight average
-                return self.factors['air_travel']['international_avg_kg']
-            else:
-                # Domestic flight average
-                return self.factors['air_travel']['domestic_avg_kg']
-        
-        # --- GROUND TRANSPORT (Uber, Lyft, Gas) ---
-        elif category == "ground_transport":
-            # Estimate miles traveled: $2 per mile average
-            avg_cost_per_mile = self.factors['ground_transport']['avg_cost_per_mile_usd']
-            estimated_miles = amount / avg_cost_per_mile
-            
-            # Apply rideshare emission factor (includes driver's empty return trip)
-            kg_per_mile = self.factors['ground_transport']['rideshare_per_mile_kg']
-            return estimated_miles * kg_per_mile
-        
-        # --- RESTAURANT FOOD ---
-        elif category == "food_restaurant":
-            # Estimate number of meals: $25 per meal average
-            avg_cost_per_meal = self.factors['food_restaurant']['avg_cost_per_meal_usd']
-            estimated_meals = amount / avg_cost_per_meal
-            
-            # Apply meal emission factor
-            kg_per_meal = self.factors['food_restaurant']['avg_meal_kg']
-            return estimated_meals * kg_per_meal
-        
-        # --- GROCERIES ---
-        elif category == "groceries":
-            # Simple ratio: groceries have mixed carbon intensity
-            kg_per_dollar = self.factors['groceries']['per_dollar_kg']
-            return amount * kg_per_dollar
-        
-        # --- ELECTRICITY ---
-        elif category == "electricity":
-            # Estimate kWh from bill amount
-            avg_kwh_per_dollar = self.factors['electricity']['avg_kwh_per_dollar']
-            estimated_kwh = amount * avg_kwh_per_dollar
-            
-            # Apply grid emission factor (US average)
-            kg_per_kwh = self.factors['electricity']['per_kwh_kg']
-            return estimated_kwh * kg_per_kwh
-        
-        # --- NATURAL GAS ---
-        elif category == "natural_gas":
-            # Estimate therms from bill amount
-            avg_therms_per_dollar = self.factors['natural_gas']['avg_therms_per_dollar']
-            estimated_therms = amount * avg_therms_per_dollar
-            
-            # Apply gas emission factor
-            kg_per_therm = self.factors['natural_gas']['per_therm_kg']
-            return estimated_therms * kg_per_therm
-        
-        # --- ELECTRONICS ---
-        elif category == "goods_electronics":
-            kg_per_dollar = self.factors['goods_electronics']['per_dollar_kg']
-            return amount * kg_per_dollar
-        
-        # --- CLOTHING ---
-        elif category == "goods_clothing":
-            kg_per_dollar = self.factors['goods_clothing']['per_dollar_kg']
-            return amount * kg_per_dollar
-        
-        # --- GENERAL GOODS / OTHER ---
-        else:
-            # Default: use general goods factor
-            kg_per_dollar = self.factors['goods_general']['per_dollar_kg']
-            return amount * kg_per_dollar
+        # Each formula above is a factor table row (see _build_factor_table)
+        multiplier, divisor, factor, flat_low, flat_high = self._factor_rows[
+            CATEGORY_CODES.get(category, GOODS_GENERAL_CODE)
+        ]
+        if amount > AIR_TRAVEL_INTERNATIONAL_THRESHOLD_USD:
+            return amount * multiplier / divisor * factor + flat_high
+        return amount * multiplier / divisor * factor + flat_low
     
     def calculate_total(self, categorized_transactions: List[Dict]) -> Dict:
         """
@@ -187,8 +314,8 @@ class EmissionCalculator:
         Process:
         1. Calculate emissions for each transaction
         2. Group by category
-        3. Calculate percentages
-        4. Round for readability
+        3. Calculate percentages and round for readability
+        4. Order categories by emissions (highest first)
         
         Args:
             categorized_transactions: List of dicts with 'category', 'amount', etc.
@@ -203,68 +330,87 @@ class EmissionCalculator:
                         'percentage': 64.0,
                         'count': 1,
                         'total_spent': 350.00,
-                        'items': [...]
+                        'items': {       # only when store_items=True
+                            'descriptions': [...],
+                            'amounts': [...],
+                            'emissions_kg': [...]
+                        }
                     },
                     ...
                 }
             }
         """
-        print(f"\n🧮 Calculating emissions for {len(categorized_transactions)} transactions...")
+        log.info("\n🧮 Calculating emissions for %d transactions...", len(categorized_transactions))
         
-        breakdown = {}
-        total_emissions = 0.0
+        # Typical uploads are small: plain Python avoids NumPy/Numba setup costs
+        if len(categorized_transactions) < SMALL_INPUT_ROWS and not self.store_items:
+            result = self._calculate_python(categorized_transactions)
+        else:
+            self.reset()
+            self.accumulate(categorized_transactions)
+            result = self.finalize()
         
-        # Process each transaction
-        for transaction in categorized_transactions:
-            category = transaction.get('category', 'other')
-            amount = transaction['amount']
-            description = transaction.get('description', '')
-            
-            # Calculate emissions for this transaction
-            emissions = self.calculate_transaction(category, amount, description)
-            total_emissions += emissions
-            
-            # Add to category breakdown
-            if category not in breakdown:
-                breakdown[category] = {
-                    'emissions_kg': 0.0,
-                    'count': 0,
-                    'total_spent': 0.0,
-                    'items': []
-                }
-            
-            # Accumulate category totals
-            breakdown[category]['emissions_kg'] += emissions
-            breakdown[category]['count'] += 1
-            breakdown[category]['total_spent'] += amount
-            
-            # Store individual item details
-            breakdown[category]['items'].append({
-                'description': description,
-                'amount': amount,
-                'emissions_kg': round(emissions, 2)
-            })
-        
-        # Calculate percentages for each category
-        for category in breakdown:
-            breakdown[category]['percentage'] = round(
-                (breakdown[category]['emissions_kg'] / total_emissions) * 100, 1
-            )
-            breakdown[category]['emissions_kg'] = round(
-                breakdown[category]['emissions_kg'], 2
-            )
-            breakdown[category]['total_spent'] = round(
-                breakdown[category]['total_spent'], 2
+        log.info("✅ Total emissions: %s kg CO2e", result['total_emissions_kg'])
+        
+        return result
+    
+    def _calculate_python(self, categorized_transactions: List[Dict]) -> Dict:
+        """
+        Plain-Python calculate_total() for small inputs (no items).
+        
+        Same formulas, summation order and rounding as the vectorized
+        path, so both give identical results.
+        """
+        rows = self._factor_rows
+        threshold = AIR_TRAVEL_INTERNATIONAL_THRESHOLD_USD
+        
+        # label -> [emissions, spent, count], in first-seen order
+        totals: Dict[str, List] = {}
+        total_emissions = 0.0
+        for t in categorized_transactions:
+            name = t.get('category', 'other')
+            amount = t['amount']
+            multiplier, divisor, factor, flat_low, flat_high = rows[
+                CATEGORY_CODES.get(name, GOODS_GENERAL_CODE)
+            ]
+            entry = totals.get(name)
+            if entry is None:
+                entry = totals[name] = [0.0, 0.0, 0]
+            emissions = amount * multiplier / divisor * factor + (
+                flat_high if amount > threshold else flat_low
             )
+            total_emissions += emissions
+            entry[0] += emissions
+            entry[1] += amount
+            entry[2] += 1
         
-        # Sort categories by emissions (highest first)
-        breakdown = dict(
-            sorted(breakdown.items(), 
-                   key=lambda x: x[1]['emissions_kg'], 
-                   reverse=True)
-        )
+        return self._build_result(totals, total_emissions)
+    
+    @staticmethod
+    def _build_result(totals: Dict[str, List], total_emissions: float) -> Dict:
+        """
+        Round and order the per-category totals into a calculate_total() result.
         
-        print(f"✅ Total emissions: {round(total_emissions, 2)} kg CO2e")
+        Shared by the plain-Python and vectorized paths, so both round the
+        same float64 sums at the same point.
+        
+        Args:
+            totals: label -> (emissions, spent, count), in first-seen order
+            total_emissions: Sum of every transaction's emissions, in input order
+        """
+        breakdown = {
+            name: {
+                'emissions_kg': round(emissions, 2),
+                'count': count,
+                'total_spent': round(spent, 2),
+                'percentage': round(emissions / total_emissions * 100, 1) if total_emissions else 0.0
+            }
+            for name, (emissions, spent, count) in totals.items()
+        }
+        # Highest emissions first (sorted() is stable, ties keep first-seen order)
+        breakdown = dict(sorted(
+            breakdown.items(), key=lambda item: item[1]['emissions_kg'], reverse=True
+        ))
         
         return {
             'total_emissions_kg': round(total_emissions, 2),
@@ -272,6 +418,152 @@ class EmissionCalculator:
             'breakdown': breakdown
         }
     
+    def reset(self) -> None:
+        """Clear the running totals built up by accumulate()."""
+        # Category label -> column of the running arrays (first-seen order)
+        self._labels: Dict[str, int] = {}
+        self._label_factors = np.empty((0, 5), dtype=np.float64)
+        self._emissions_by_cat = np.zeros(0, dtype=np.float64)
+        self._total_emissions = 0.0
+        self._spent_by_cat = np.zeros(0, dtype=np.float64)
+        self._count_by_cat = np.zeros(0, dtype=np.int64)
+        self._items: Dict[str, Dict[str, List]] = {}
+    
+    def accumulate(self, categorized_transactions: List[Dict]) -> None:
+        """
+        Add a chunk of categorized transactions to the running totals.
+        
+        Lets large files be processed chunk by chunk: only the per-category
+        sums (and items, when store_items=True) are kept between calls.
+        Call finalize() to get the result and reset().
+        
+        Args:
+            categorized_transactions: List of dicts with 'category', 'amount', etc.
+        """
+        n = len(categorized_transactions)
+        if not n:
+            return
+        
+        # Columnar view of the chunk: one code per distinct category label
+        # (labels keep their original spelling in the breakdown) and one amount.
+        # Codes are stable across chunks. Every pass is a C-level map, with
+        # no per-transaction Python bytecode.
+        labels = self._labels
+        names = list(map(_get_category, categorized_transactions))
+        for name in dict.fromkeys(names):  # distinct labels, first-seen order
+            labels.setdefault(name, len(labels))
+        codes = np.fromiter(map(labels.__getitem__, names), dtype=np.intp, count=n)
+        amounts = np.fromiter(
+            map(_get_amount, categorized_transactions),
+            dtype=np.float64,
+            count=n
+        )
+        
+        # Grow the running arrays when the chunk introduced new labels
+        k = len(labels)
+        known = len(self._label_factors)
+        if k > known:
+            new_names = list(labels)[known:]
+            # Factor row for each label (anything unrecognized counts as general goods)
+            self._label_factors = np.vstack([
+                self._label_factors,
+                self._factor_table[
+                    np.array([CATEGORY_CODES.get(name, GOODS_GENERAL_CODE) for name in new_names], dtype=np.intp)
+                ]
+            ])
+            grow = (0, k - known)
+            self._emissions_by_cat = np.pad(self._emissions_by_cat, grow)
+            self._spent_by_cat = np.pad(self._spent_by_cat, grow)
+            self._count_by_cat = np.pad(self._count_by_cat, grow)
+        
+        threshold = float(AIR_TRAVEL_INTERNATIONAL_THRESHOLD_USD)
+        counts = np.bincount(codes, minlength=k)
+        self._count_by_cat += counts
+        
+        # Per-transaction emissions (multithreaded on large inputs), then
+        # sums in input order, continuing the running ones, exactly as the
+        # plain-Python loop adds them
+        per_tx = compute_emissions(codes, amounts, self._label_factors, threshold)
+        self._emissions_by_cat = running_bincount(self._emissions_by_cat, codes, per_tx)
+        self._spent_by_cat = running_bincount(self._spent_by_cat, codes, amounts)
+        self._total_emissions = float(
+            np.cumsum(np.concatenate(([self._total_emissions], per_tx)))[-1]
+        )
+        
+        if self.store_items:
+            self._collect_items(
+                list(labels), categorized_transactions,
+                codes, amounts, per_tx, counts
+            )
+    
+    def finalize(self) -> Dict:
+        """
+        Turn the running totals into a result and reset them.
+        
+        Returns:
+            Same structure as calculate_total()
+        """
+        totals = {
+            name: (emissions, spent, count)
+            for name, emissions, spent, count in zip(
+                self._labels,
+                self._emissions_by_cat.tolist(),
+                self._spent_by_cat.tolist(),
+                self._count_by_cat.tolist()
+            )
+        }
+        result = self._build_result(totals, self._total_emissions)
+        
+        if self.store_items:
+            # One list per field; plain floats, so the result stays JSON-serializable
+            breakdown = result['breakdown']
+            for name, columns in self._items.items():
+                breakdown[name]['items'] = {
+                    'descriptions': columns['descriptions'],
+                    'amounts': np.concatenate(columns['amounts']).tolist(),
+                    'emissions_kg': [
+                        round(emissions, 2)
+                        for emissions in np.concatenate(columns['emissions_kg']).tolist()
+                    ]
+                }
+        
+        self.reset()
+        
+        return result
+    
+    def _collect_items(self,
+                       names: List[str],
+                       transactions: List[Dict],
+                       codes: np.ndarray,
+                       amounts: np.ndarray,
+                       per_tx: np.ndarray,
+                       counts: np.ndarray) -> None:
+        """
+        Append a chunk's transactions to the per-category item columns.
+        
+        Transactions are grouped by category with one stable sort of the
+        category codes, so each category's items are a contiguous slice
+        of the sorted columns (input order is kept within a category).
+        """
+        order = np.argsort(codes, kind='stable')
+        amounts_sorted = amounts[order]
+        emissions_sorted = per_tx[order]
+        
+        start = 0
+        for name, count in zip(names, counts.tolist()):
+            if not count:
+                continue
+            stop = start + count
+            columns = self._items.setdefault(
+                name, {'descriptions': [], 'amounts': [], 'emissions_kg': []}
+            )
+            columns['descriptions'].extend(
+                transactions[i].get('description', '') for i in order[start:stop].tolist()
+            )
+            columns['amounts'].append(amounts_sorted[start:stop])
+            columns['emissions_kg'].append(emissions_sorted[start:stop])
+            start = stop
+    
     def get_benchmarks(self, total_emissions_kg: float, period_days: int = 30) -> Dict:
         """
         Compare user's emissions to global benchmarks.
@@ -299,11 +591,8 @@ class EmissionCalculator:
         # Project to annual based on period length
         annual_projection = (total_emissions_kg / period_days) * 365
         
-        # Load benchmark values from emission factors
-        benchmarks_path = "src/services/carbon/emission_factors.json"
-        with open(benchmarks_path, 'r') as f:
-            data = json.load(f)
-        benchmarks = data['benchmarks']
+        # Benchmark values were loaded with the emission factors in __init__
+        benchmarks = self._benchmarks
         
         return {
             'us_average_annual_kg': benchmarks['us_average_annual_kg'],
@@ -329,6 +618,8 @@ if __name__ == "__main__":
     """
     import json
     
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     # Sample categorized transactions (as if from Claude)
     sample_transactions = [
         {
@@ -364,4 +655,37 @@ if __name__ == "__main__":
     
     # Print results
     print("\n📊 RESULTS:")
-    print(json.dumps({**result, 'benchmarks': benchmarks}, indent=2))
\ No newline at end of file
+    print(json.dumps({**result, 'benchmarks': benchmarks}, indent=2))
+    
+    # Check that the plain-Python and vectorized paths agree exactly on
+    # the sample CSVs (categories from the keyword hints stand in for Claude)
+    from parser import TransactionParser
+    
+    samples_dir = Path(__file__).parent / "samples"
+    with open(Path(__file__).parent / "emission_factors.json") as f:
+        keyword_hints = json.load(f)['keyword_hints']
+    
+    def hint_category(description: str) -> str:
+        description = description.lower()
+        for category, keywords in keyword_hints.items():
+            if any(keyword in description for keyword in keywords):
+                return category
+        return 'other'
+    
+    csv_parser = TransactionParser()
+    sample_files = sorted(samples_dir.glob("*.csv"))
+    for csv_file in sample_files:
+        csv_parser.parse_csv(str(csv_file))
+        categorized = [
+            {**t, 'category': hint_category(t['description'])}
+            for t in csv_parser.to_dict_list()
+        ]
+        
+        scalar = calculator._calculate_python(categorized)
+        calculator.reset()
+        calculator.accumulate(categorized)
+        vectorized = calculator.finalize()
+        
+        assert scalar == vectorized, f"Calculation paths disagree on {csv_file.name}"
+    
+    print(f"\n✅ Plain-Python and vectorized paths agree on {len(sample_files)} sample files")
@@ -8,17 +8,50 @@ This module:
 2. Makes API calls to Claude
 3. Tracks token usage and costs
 4. Provides cost estimates
+5. Optionally caches deterministic (temperature 0) responses
+6. Marks static system prompts for Anthropic prompt caching
+7. Submits offline jobs through the Message Batches API (half price)
 
 Used for:
 - Transaction categorization
 - Personalized coaching advice
 """
 
+import hashlib
+import json
+import logging
 import os
-from typing import Dict, List, Optional
-from anthropic import Anthropic
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import httpx
+from anthropic import Anthropic, DefaultHttpxClient
 from dotenv import load_dotenv, find_dotenv
 
+log = logging.getLogger(__name__)
+
+# orjson hashes cache keys and reads/writes disk cache entries much faster
+# than stdlib json; fall back to json if it isn't installed
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj, sort_keys: bool = False) -> bytes:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+
+except ImportError:
+
+    def _json_loads(data):
+        return json.loads(data)
+
+    def _json_dumps(obj, sort_keys: bool = False) -> bytes:
+        return json.dumps(obj, sort_keys=sort_keys, default=str).encode('utf-8')
+
 # Load environment variables from .env file
 # find_dotenv() automatically searches up the directory tree for .env
 # This is the standard, professional way to handle .env files
@@ -30,6 +63,34 @@ else:
     # Fallback: try loading from current working directory
     load_dotenv()  # This will silently fail if .env doesn't exist
 
+# Responses to deterministic calls, keyed by request hash. Shared by every
+# client in the process (the API creates a new client per upload).
+_RESPONSE_CACHE: "OrderedDict[str, Dict]" = OrderedDict()
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+# A whole response wrapped in a markdown code fence (```json ... ```)
+_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*\n(.*?)\n```\s*$', re.DOTALL)
+
+# One connection pool for every client in the process, so a new client
+# (e.g. per upload) reuses warm TLS connections instead of handshaking again
+HTTP_LIMITS = httpx.Limits(
+    max_keepalive_connections=20,
+    max_connections=100,
+    keepalive_expiry=30.0
+)
+_HTTP_CLIENT: Optional[httpx.Client] = None
+_SHARED_LOCK = threading.Lock()
+
+
+def _get_http_client() -> httpx.Client:
+    """Return the process-wide HTTP connection pool, creating it on first use."""
+    global _HTTP_CLIENT
+    with _SHARED_LOCK:
+        if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+            # DefaultHttpxClient keeps the SDK's timeout and redirect defaults
+            _HTTP_CLIENT = DefaultHttpxClient(limits=HTTP_LIMITS)
+        return _HTTP_CLIENT
+
 
 class ClaudeClient:
     """
@@ -45,14 +106,45 @@ class ClaudeClient:
     # These are per MILLION tokens
     INPUT_COST_PER_1M = 3.00   # $3 per million input tokens
     OUTPUT_COST_PER_1M = 15.00  # $15 per million output tokens
+    CACHE_WRITE_COST_PER_1M = 3.75  # Prompt cache writes: 1.25x input rate
+    CACHE_READ_COST_PER_1M = 0.30   # Prompt cache reads: 0.1x input rate
+    BATCH_INPUT_COST_PER_1M = 1.50   # Message Batches API: 50% off input
+    BATCH_OUTPUT_COST_PER_1M = 7.50  # Message Batches API: 50% off output
+    
+    # Response cache settings (see call())
+    CACHE_MAX_ENTRIES = 1024
+    CACHE_MAX_TEMPERATURE = 0.01  # Only (near) deterministic calls are cached
+    DEFAULT_CACHE_DIR = Path.home() / ".cache" / "ecolens" / "claude"
+    
+    # Seconds between status checks in poll_batch()
+    BATCH_POLL_INTERVAL = 30
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Input token budget per request used by split_for_budget(), and the
+    # tokens its byte-size shortcut allows for message framing
+    MAX_INPUT_TOKENS = 150_000
+    TOKEN_COUNT_MARGIN = 1_000
+    
+    def __init__(self,
+                 api_key: Optional[str] = None,
+                 cache: bool = False,
+                 disk_cache: bool = False,
+                 cache_dir: Optional[str] = None,
+                 verbose: bool = False):
         """
         Initialize Claude API client.
         
         Args:
             api_key: Anthropic API key (or use CLAUDE_API_KEY env variable)
+            cache: Reuse responses for identical temperature-0 calls
+                   (in-memory LRU shared across clients)
+            disk_cache: Also persist cached responses as JSON files
+            cache_dir: Where disk cache files go (default: ~/.cache/ecolens/claude/)
+            verbose: Log this client's per-call details (temperature, prompt,
+                     cache tokens) at INFO instead of DEBUG
         """
+        # Per instance: other clients and the logger's level are left alone
+        self._detail_level = logging.INFO if verbose else logging.DEBUG
+        
         # Get API key from parameter or environment
         self.api_key = api_key or os.getenv('CLAUDE_API_KEY')
         
@@ -67,7 +159,7 @@ class ClaudeClient:
             )
         
         # Initialize Anthropic client
-        self.client = Anthropic(api_key=self.api_key)
+        self.client = Anthropic(api_key=self.api_key, http_client=_get_http_client())
         
         # Default model (Sonnet 4 - good balance of cost/quality)
         self.model = "claude-sonnet-4-20250514"
@@ -75,19 +167,58 @@ class ClaudeClient:
         # Maximum tokens Claude can generate
         self.max_tokens = 4000
         
+        # Per-token prices (the class constants are per million tokens)
+        self._input_rate = self.INPUT_COST_PER_1M / 1_000_000
+        self._output_rate = self.OUTPUT_COST_PER_1M / 1_000_000
+        self._cache_write_rate = self.CACHE_WRITE_COST_PER_1M / 1_000_000
+        self._cache_read_rate = self.CACHE_READ_COST_PER_1M / 1_000_000
+        self._batch_input_rate = self.BATCH_INPUT_COST_PER_1M / 1_000_000
+        self._batch_output_rate = self.BATCH_OUTPUT_COST_PER_1M / 1_000_000
+        
         # Cost tracking
         self.total_input_tokens = 0
         self.total_output_tokens = 0
+        self.total_cache_write_tokens = 0
+        self.total_cache_read_tokens = 0
+        self.total_batch_input_tokens = 0
+        self.total_batch_output_tokens = 0
         self.call_count = 0
+        self.cache_hits = 0
+        
+        # Response cache
+        self.cache = cache
+        self.cache_dir = None
+        if cache and disk_cache:
+            self.cache_dir = Path(cache_dir) if cache_dir else self.DEFAULT_CACHE_DIR
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
         
-        print(f"✅ Claude API client initialized")
-        print(f"   Model: {self.model}")
-        print(f"   Max tokens: {self.max_tokens}")
+        # count_tokens() results, keyed by request hash
+        self._token_counts: Dict[str, int] = {}
+        
+        # Guards the counters when calls run on several threads
+        self._lock = threading.Lock()
+        
+        log.info("✅ Claude API client initialized")
+        log.info("   Model: %s", self.model)
+        log.info("   Max tokens: %s", self.max_tokens)
+    
+    def close(self):
+        """
+        Close the process-wide connection pool.
+        
+        The pool is shared by every ClaudeClient, so only call this at
+        shutdown; clients created afterwards open a new pool.
+        """
+        with _SHARED_LOCK:
+            if _HTTP_CLIENT is not None:
+                _HTTP_CLIENT.close()
     
     def call(self, 
             messages: List[Dict],
             system: Optional[str] = None,
-            temperature: float = 1.0) -> Dict:
+            temperature: float = 1.0,
+            cache_system: bool = False,
+            strip_fences: bool = True) -> Dict:
         """
         Make a call to Claude API.
         
@@ -104,76 +235,394 @@ class ClaudeClient:
                 - 0.0 = deterministic (same input → same output)
                 - 1.0 = creative (more variation)
                 Use lower for categorization, higher for coaching
+            
+            cache_system: Mark the system prompt for Anthropic prompt caching.
+                Use it for long system prompts that repeat across calls;
+                later calls read the cached prefix at 10% of the input price.
+            
+            strip_fences: Remove a markdown code fence (```json ... ```)
+                wrapped around the whole response, which Claude sometimes
+                adds despite being asked for bare JSON
+        
+        When the client was created with cache=True and temperature is 0,
+        an identical earlier call's response is returned without hitting
+        the API (no tokens are billed or counted; 'cached' is True).
+        Only complete answers are cached: one cut off at max_tokens is
+        asked for again next time.
         
         Returns:
             {
                 'content': "Claude's response text",
+                'stop_reason': 'end_turn' (or 'max_tokens' if cut off),
                 'usage': {
                     'input_tokens': 150,
-                    'output_tokens': 300
+                    'output_tokens': 300,
+                    'cache_creation_input_tokens': 0,
+                    'cache_read_input_tokens': 1200
                 }
             }
         """
+        cache_key, cached = self._lookup_cached(messages, system, temperature)
+        if cached is not None:
+            return self._strip_fences(cached) if strip_fences else cached
+        
         try:
-            # Build API call parameters
-            params = {
-                'model': self.model,
-                'max_tokens': self.max_tokens,
-                'messages': messages,
-                'temperature': temperature
-            }
-            
-            # Add system prompt if provided
-            if system:
-                params['system'] = system
-            
-            print(f"\n🤖 Calling Claude API...")
-            print(f"   Temperature: {temperature}")
-            if system:
-                print(f"   System prompt: {system[:50]}...")
+            params = self._build_params(messages, system, temperature, cache_system)
+            self._log_request(system, temperature)
             
             # Make the API call
             response = self.client.messages.create(**params)
+            result = self._record_response(response)
             
-            # Extract usage information
-            input_tokens = response.usage.input_tokens
-            output_tokens = response.usage.output_tokens
-            
-            # Update cost tracking
-            self.total_input_tokens += input_tokens
-            self.total_output_tokens += output_tokens
-            self.call_count += 1
-            
-            # Extract response text
-            content = response.content[0].text
-            
-            print(f"✅ API call successful")
-            print(f"   Input tokens: {input_tokens}")
-            print(f"   Output tokens: {output_tokens}")
-            print(f"   Cost: ${self._calculate_call_cost(input_tokens, output_tokens):.4f}")
-            
-            return {
-                'content': content,
-                'usage': {
-                    'input_tokens': input_tokens,
-                    'output_tokens': output_tokens
-                }
+        except Exception as e:
+            log.error("❌ Claude API error: %s", e)
+            raise Exception(f"Claude API call failed: {e}")
+        
+        if cache_key is not None and result['stop_reason'] == 'end_turn':
+            self._cache_put(cache_key, result)
+        
+        return self._strip_fences(result) if strip_fences else result
+    
+    def count_tokens(self, messages: List[Dict], system: Optional[str] = None) -> int:
+        """
+        Count a request's input tokens with Anthropic's token counting endpoint.
+        
+        Free, but it is a round trip, so results are remembered per request.
+        
+        Args:
+            messages: Message dicts, as for call()
+            system: Optional system prompt
+        
+        Returns:
+            Number of input tokens the request would use
+        """
+        key = hashlib.sha256(
+            _json_dumps({'model': self.model, 'system': system, 'messages': messages}, sort_keys=True)
+        ).hexdigest()
+        
+        count = self._token_counts.get(key)
+        if count is None:
+            params = {'model': self.model, 'messages': messages}
+            if system:
+                params['system'] = system
+            try:
+                count = self.client.messages.count_tokens(**params).input_tokens
+            except Exception as e:
+                log.error("❌ Claude API error: %s", e)
+                raise Exception(f"Claude token count failed: {e}")
+            self._token_counts[key] = count
+        
+        return count
+    
+    def split_for_budget(self,
+                         items: List,
+                         build_request: Callable[[List], Dict],
+                         max_input: int = MAX_INPUT_TOKENS) -> List[List]:
+        """
+        Split items into groups whose requests fit the input token budget.
+        
+        Halves any group whose request is over budget (checked with
+        count_tokens()) until every group fits or holds a single item.
+        A request whose text is shorter in bytes than the budget always
+        fits (a token covers at least one byte), so typical requests are
+        not sent to the token counting endpoint at all.
+        Use it before call() / submit_batch() when a group of
+        items might produce a very large prompt.
+        
+        Args:
+            items: Things that go into one request (e.g. transactions)
+            build_request: Builds call() keyword arguments for a group of items
+            max_input: Input token budget per request
+        
+        Returns:
+            Groups of items, in their original order
+        """
+        if not items:
+            return []
+        
+        request = build_request(items)
+        size = len(_json_dumps(request['messages'])) + len((request.get('system') or '').encode('utf-8'))
+        if size + self.TOKEN_COUNT_MARGIN <= max_input:
+            return [items]
+        
+        tokens = self.count_tokens(request['messages'], request.get('system'))
+        if tokens <= max_input or len(items) == 1:
+            return [items]
+        
+        middle = len(items) // 2
+        log.info("   ✂️  Request is %d tokens (budget %d), splitting %d items",
+                 tokens, max_input, len(items))
+        return (
+            self.split_for_budget(items[:middle], build_request, max_input)
+            + self.split_for_budget(items[middle:], build_request, max_input)
+        )
+    
+    def _lookup_cached(self, messages: List[Dict], system, temperature: float):
+        """
+        Check the response cache for a deterministic call.
+        
+        Returns:
+            (cache_key, cached_response) - cache_key is None if the call
+            isn't cacheable, cached_response is None on a miss
+        """
+        if not self.cache or temperature > self.CACHE_MAX_TEMPERATURE:
+            return None, None
+        
+        cache_key = self._cache_key(messages, system, temperature)
+        cached = self._cache_get(cache_key)
+        if cached is None:
+            return cache_key, None
+        
+        with self._lock:
+            self.cache_hits += 1
+        log.info("\n♻️  Using cached Claude response")
+        return cache_key, {**cached, 'cached': True}
+    
+    def _build_params(self,
+                      messages: List[Dict],
+                      system: Optional[str],
+                      temperature: float,
+                      cache_system: bool) -> Dict:
+        """Build the messages.create() arguments shared by call() and submit_batch()."""
+        params = {
+            'model': self.model,
+            'max_tokens': self.max_tokens,
+            'messages': messages,
+            'temperature': temperature
+        }
+        
+        # Add system prompt if provided
+        if system and cache_system:
+            params['system'] = [{
+                'type': 'text',
+                'text': system,
+                'cache_control': {'type': 'ephemeral'}
+            }]
+        elif system:
+            params['system'] = system
+        
+        return params
+    
+    def _log_request(self, system: Optional[str], temperature: float) -> None:
+        log.log(self._detail_level, "\n🤖 Calling Claude API...")
+        log.log(self._detail_level, "   Temperature: %s", temperature)
+        if system:
+            log.log(self._detail_level, "   System prompt: %s...", system[:50])
+    
+    def submit_batch(self, requests: List[Dict]) -> str:
+        """
+        Submit calls to the Message Batches API (50% cheaper, not real-time).
+        
+        Results usually arrive within minutes and at most 24 hours later;
+        collect them with poll_batch(). Meant for offline jobs where
+        latency doesn't matter. The response cache is not used.
+        
+        Args:
+            requests: One dict of call() keyword arguments per call
+                Example: [
+                    {'messages': [...], 'system': "...", 'temperature': 0.0},
+                    {'messages': [...], 'system': "...", 'temperature': 0.0}
+                ]
+        
+        Returns:
+            Batch ID to pass to poll_batch()
+        """
+        batch_requests = [
+            {
+                'custom_id': f"req_{i}",
+                'params': self._build_params(
+                    request['messages'],
+                    request.get('system'),
+                    request.get('temperature', 1.0),
+                    request.get('cache_system', False)
+                )
             }
+            for i, request in enumerate(requests)
+        ]
+        
+        try:
+            batch = self.client.messages.batches.create(requests=batch_requests)
+        except Exception as e:
+            log.error("❌ Claude API error: %s", e)
+            raise Exception(f"Claude batch submission failed: {e}")
+        
+        log.info("\n📦 Submitted message batch %s (%d requests)", batch.id, len(batch_requests))
+        return batch.id
+    
+    def poll_batch(self, batch_id: str, interval: float = BATCH_POLL_INTERVAL) -> List[Optional[Dict]]:
+        """
+        Wait for a message batch to finish and collect its results.
+        
+        Args:
+            batch_id: ID returned by submit_batch()
+            interval: Seconds between status checks
+        
+        Returns:
+            One response per submitted request, in submission order
+            (same format as call(), fences stripped), or None for requests that failed,
+            were canceled or expired
+        """
+        try:
+            while True:
+                batch = self.client.messages.batches.retrieve(batch_id)
+                if batch.processing_status == 'ended':
+                    break
+                log.info("   ⏳ Batch %s is %s, checking again in %ss",
+                         batch_id, batch.processing_status, interval)
+                time.sleep(interval)
             
+            entries = list(self.client.messages.batches.results(batch_id))
         except Exception as e:
-            print(f"❌ Claude API error: {e}")
-            raise Exception(f"Claude API call failed: {e}")
+            log.error("❌ Claude API error: %s", e)
+            raise Exception(f"Claude batch polling failed: {e}")
+        
+        results: List[Optional[Dict]] = [None] * len(entries)
+        for entry in entries:
+            index = int(entry.custom_id.rsplit('_', 1)[1])
+            if entry.result.type == 'succeeded':
+                results[index] = self._strip_fences(
+                    self._record_response(entry.result.message, batch=True)
+                )
+            else:
+                log.warning("⚠️  Batch request %s %s", entry.custom_id, entry.result.type)
+        
+        log.info("✅ Batch %s finished: %d/%d succeeded",
+                 batch_id, sum(r is not None for r in results), len(results))
+        return results
+    
+    def run_batch(self, requests: List[Dict], interval: float = BATCH_POLL_INTERVAL) -> List[Optional[Dict]]:
+        """submit_batch() then poll_batch(): blocks until the batch has ended."""
+        return self.poll_batch(self.submit_batch(requests), interval=interval)
+    
+    def _strip_fences(self, result: Dict) -> Dict:
+        """Unwrap content that is entirely one markdown code block."""
+        match = _FENCE_RE.match(result['content'])
+        if match is None:
+            return result
+        return {**result, 'content': match.group(1)}
+    
+    def _record_response(self, response, batch: bool = False) -> Dict:
+        """
+        Add an API response's token usage to the totals and unpack it.
+        
+        batch=True counts the tokens at the Message Batches API rates.
+        """
+        # Extract usage information
+        input_tokens = response.usage.input_tokens
+        output_tokens = response.usage.output_tokens
+        cache_write_tokens = getattr(response.usage, 'cache_creation_input_tokens', None) or 0
+        cache_read_tokens = getattr(response.usage, 'cache_read_input_tokens', None) or 0
+        
+        # Update cost tracking
+        with self._lock:
+            if batch:
+                self.total_batch_input_tokens += input_tokens
+                self.total_batch_output_tokens += output_tokens
+            else:
+                self.total_input_tokens += input_tokens
+                self.total_output_tokens += output_tokens
+            self.total_cache_write_tokens += cache_write_tokens
+            self.total_cache_read_tokens += cache_read_tokens
+            self.call_count += 1
+        
+        # Extract response text
+        content = response.content[0].text
+        
+        # One summary line per call; the breakdown only at DEBUG level
+        if not batch and log.isEnabledFor(logging.INFO):
+            log.info("🤖 Claude call: %d input / %d output tokens, $%.4f",
+                     input_tokens, output_tokens,
+                     self._calculate_call_cost(input_tokens, output_tokens,
+                                               cache_write_tokens, cache_read_tokens))
+            if cache_write_tokens or cache_read_tokens:
+                log.log(self._detail_level, "   Prompt cache: %d written, %d read",
+                        cache_write_tokens, cache_read_tokens)
+        
+        return {
+            'content': content,
+            'stop_reason': getattr(response, 'stop_reason', None),
+            'usage': {
+                'input_tokens': input_tokens,
+                'output_tokens': output_tokens,
+                'cache_creation_input_tokens': cache_write_tokens,
+                'cache_read_input_tokens': cache_read_tokens
+            }
+        }
+    
+    def _cache_key(self, messages: List[Dict], system, temperature: float) -> str:
+        """SHA-256 of everything that determines the response."""
+        payload = _json_dumps(
+            {
+                'model': self.model,
+                'system': system,
+                'messages': messages,
+                'temperature': temperature,
+                'max_tokens': self.max_tokens
+            },
+            sort_keys=True
+        )
+        return hashlib.sha256(payload).hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[Dict]:
+        """Look a response up in memory, then on disk (if enabled)."""
+        with _RESPONSE_CACHE_LOCK:
+            cached = _RESPONSE_CACHE.get(key)
+            if cached is not None:
+                _RESPONSE_CACHE.move_to_end(key)
+                return cached
+        
+        if self.cache_dir is not None:
+            path = self.cache_dir / f"{key}.json"
+            try:
+                cached = _json_loads(path.read_bytes())
+            except (OSError, ValueError):
+                return None
+            self._remember(key, cached)
+            return cached
+        
+        return None
     
-    def _calculate_call_cost(self, input_tokens: int, output_tokens: int) -> float:
+    def _cache_put(self, key: str, result: Dict) -> None:
+        """Store a response in memory and on disk (if enabled)."""
+        self._remember(key, result)
+        
+        if self.cache_dir is not None:
+            path = self.cache_dir / f"{key}.json"
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            try:
+                tmp_path.write_bytes(_json_dumps(result))
+                tmp_path.replace(path)  # atomic, so readers never see partial files
+            except OSError as e:
+                log.warning("⚠️  Could not write Claude cache file %s: %s", path, e)
+    
+    def _remember(self, key: str, result: Dict) -> None:
+        """Insert into the shared in-memory LRU, evicting the oldest entry."""
+        with _RESPONSE_CACHE_LOCK:
+            _RESPONSE_CACHE[key] = result
+            _RESPONSE_CACHE.move_to_end(key)
+            while len(_RESPONSE_CACHE) > self.CACHE_MAX_ENTRIES:
+                _RESPONSE_CACHE.popitem(last=False)
+    
+    def _calculate_call_cost(self,
+                             input_tokens: int,
+                             output_tokens: int,
+                             cache_write_tokens: int = 0,
+                             cache_read_tokens: int = 0) -> float:
         """
         Calculate cost of a single API call.
         
         Formula:
             cost = (input_tokens / 1M * $3) + (output_tokens / 1M * $15)
+                 + (cache_write_tokens / 1M * $3.75) + (cache_read_tokens / 1M * $0.30)
+        
+        input_tokens excludes the cached prefix, which the API reports separately.
         """
-        input_cost = (input_tokens / 1_000_000) * self.INPUT_COST_PER_1M
-        output_cost = (output_tokens / 1_000_000) * self.OUTPUT_COST_PER_1M
-        return input_cost + output_cost
+        return (
+            input_tokens * self._input_rate
+            + output_tokens * self._output_rate
+            + cache_write_tokens * self._cache_write_rate
+            + cache_read_tokens * self._cache_read_rate
+        )
     
     def get_cost_estimate(self) -> Dict:
         """
@@ -182,23 +631,48 @@ class ClaudeClient:
         Returns:
             {
                 'total_calls': 5,
+                'cache_hits': 2,
                 'total_input_tokens': 2500,
                 'total_output_tokens': 1800,
+                'total_cache_write_tokens': 1200,
+                'total_cache_read_tokens': 4800,
+                'total_batch_input_tokens': 0,
+                'total_batch_output_tokens': 0,
                 'input_cost_usd': 0.0075,
                 'output_cost_usd': 0.027,
-                'total_cost_usd': 0.0345
+                'cache_cost_usd': 0.0059,
+                'batch_cost_usd': 0.0,
+                'total_cost_usd': 0.0404
             }
+        
+        Prompt cache tokens of batch requests are priced at the regular
+        cache rates, so cache_cost_usd slightly overestimates those.
         """
-        input_cost = (self.total_input_tokens / 1_000_000) * self.INPUT_COST_PER_1M
-        output_cost = (self.total_output_tokens / 1_000_000) * self.OUTPUT_COST_PER_1M
-        total_cost = input_cost + output_cost
+        input_cost = self.total_input_tokens * self._input_rate
+        output_cost = self.total_output_tokens * self._output_rate
+        cache_cost = (
+            self.total_cache_write_tokens * self._cache_write_rate
+            + self.total_cache_read_tokens * self._cache_read_rate
+        )
+        batch_cost = (
+            self.total_batch_input_tokens * self._batch_input_rate
+            + self.total_batch_output_tokens * self._batch_output_rate
+        )
+        total_cost = input_cost + output_cost + cache_cost + batch_cost
         
         return {
             'total_calls': self.call_count,
+            'cache_hits': self.cache_hits,
             'total_input_tokens': self.total_input_tokens,
             'total_output_tokens': self.total_output_tokens,
+            'total_cache_write_tokens': self.total_cache_write_tokens,
+            'total_cache_read_tokens': self.total_cache_read_tokens,
+            'total_batch_input_tokens': self.total_batch_input_tokens,
+            'total_batch_output_tokens': self.total_batch_output_tokens,
             'input_cost_usd': round(input_cost, 4),
             'output_cost_usd': round(output_cost, 4),
+            'cache_cost_usd': round(cache_cost, 4),
+            'batch_cost_usd': round(batch_cost, 4),
             'total_cost_usd': round(total_cost, 4)
         }
     
@@ -206,8 +680,13 @@ class ClaudeClient:
         """Reset cost tracking counters."""
         self.total_input_tokens = 0
         self.total_output_tokens = 0
+        self.total_cache_write_tokens = 0
+        self.total_cache_read_tokens = 0
+        self.total_batch_input_tokens = 0
+        self.total_batch_output_tokens = 0
         self.call_count = 0
-        print("🔄 Cost tracking reset")
+        self.cache_hits = 0
+        log.info("🔄 Cost tracking reset")
 
 
 # Example usage / testing
@@ -220,7 +699,7 @@ if __name__ == "__main__":
     
     Note: Requires CLAUDE_API_KEY environment variable
     """
-    import json
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     
     # Create client
     try:
@@ -12,11 +12,32 @@ This module handles:
 No AI used here - just data processing.
 """
 
-from typing import List, Dict, Optional
+import csv
+import logging
+from typing import List, Dict, Iterator, Optional
 from datetime import datetime
 from pathlib import Path
 import pandas as pd
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, TypeAdapter, ValidationError, field_validator
+
+# PyArrow's CSV readers are several times faster than pandas' C engine on
+# large files; fall back to the C engine if it isn't installed
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+log = logging.getLogger(__name__)
+
+# charset-normalizer guesses a file's encoding from a sample, so the
+# right encoding is usually the first one tried
+try:
+    from charset_normalizer import from_bytes
+    CHARSET_NORMALIZER_AVAILABLE = True
+except ImportError:
+    CHARSET_NORMALIZER_AVAILABLE = False
 
 
 class Transaction(BaseModel):
@@ -28,6 +49,11 @@ class Transaction(BaseModel):
     - description must be a string
     - amount must be a float
     - category is optional (will be filled by Claude AI later)
+    
+    TransactionParser._clean_dataframe also checks the business rules
+    (amount positive, description not empty) on whole columns first, so
+    parsed chunks pass bulk validation in one call and bad rows are
+    reported by row number.
     """
     date: datetime
     description: str
@@ -49,6 +75,11 @@ class Transaction(BaseModel):
         return v.strip()
 
 
+# Validates a whole list of row dicts at once, and dumps a list of
+# transactions back to dicts (built once, reused per chunk)
+_TRANSACTION_LIST = TypeAdapter(List[Transaction])
+
+
 class TransactionParser:
     """
     Parse transaction CSV files into validated Transaction objects.
@@ -65,10 +96,23 @@ class TransactionParser:
     # Try these encodings in order (handles different CSV exports)
     SUPPORTED_ENCODINGS = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']
     
-    def __init__(self):
-        """Initialize parser with empty transaction list"""
+    # Bytes sampled for encoding detection
+    ENCODING_SAMPLE_SIZE = 64 * 1024
+    
+    def __init__(self, verbose: bool = False):
+        """
+        Initialize parser with empty transaction list.
+        
+        Args:
+            verbose: Log every skipped row at INFO (instead of DEBUG);
+                     otherwise only a summary count shows at INFO
+        """
+        # Per instance: other parsers and the logger's level are left alone
+        self._detail_level = logging.INFO if verbose else logging.DEBUG
+        
         self.transactions: List[Transaction] = []
         self.errors: List[str] = []  # Track any parsing errors
+        self._reset_stats()
     
     def parse_csv(self, file_path: str) -> List[Transaction]:
         """
@@ -81,6 +125,9 @@ class TransactionParser:
         4. Convert each row to Transaction object
         5. Skip invalid rows (but log them)
         
+        The whole file and every Transaction are held in memory; use
+        iter_csv() to process large files chunk by chunk.
+        
         Args:
             file_path: Path to CSV file
             
@@ -90,7 +137,8 @@ class TransactionParser:
         Raises:
             ValueError: If file can't be read or columns are missing
         """
-        print(f"📄 Parsing CSV file: {file_path}")
+        log.info("📄 Parsing CSV file: %s", file_path)
+        self._reset_stats()
         
         # Step 1: Read CSV with encoding detection
         df = self._read_csv_with_encoding(file_path)
@@ -106,23 +154,142 @@ class TransactionParser:
         
         self.transactions = transactions
         
-        print(f"✅ Successfully parsed {len(transactions)} transactions")
-        if self.errors:
-            print(f"⚠️  Skipped {len(self.errors)} invalid rows")
+        self._log_result()
         
         return transactions
     
+    def iter_csv(self, file_path: str, chunk_size: int = 1000) -> Iterator[List[Transaction]]:
+        """
+        Parse a CSV file in chunks instead of all at once.
+        
+        Same validation as parse_csv(), but only one chunk of rows is in
+        memory at a time and parsed transactions are not kept on the parser.
+        get_summary() still covers the whole file once iteration finishes.
+        
+        Args:
+            file_path: Path to CSV file
+            chunk_size: Rows read per chunk
+            
+        Yields:
+            Lists of validated Transaction objects (at most chunk_size each)
+            
+        Raises:
+            ValueError: If file can't be read or columns are missing
+        """
+        log.info("📄 Parsing CSV file in chunks of %d: %s", chunk_size, file_path)
+        
+        encoding = self._detect_encoding(file_path)
+        self.transactions = []
+        self._reset_stats()
+        
+        for i, df in enumerate(self._read_csv_chunks(file_path, encoding, chunk_size)):
+            if i == 0:
+                self._validate_columns(df)
+            
+            transactions = self._convert_to_transactions(self._clean_dataframe(df))
+            if transactions:
+                yield transactions
+        
+        self._log_result()
+    
+    def _read_csv_chunks(self, file_path: str, encoding: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """
+        Read a CSV file chunk_size rows at a time, with PyArrow's streaming
+        reader when available.
+        
+        If PyArrow rejects the file partway (ragged rows, ...), pandas' C
+        engine carries on after the rows already yielded. Frames are
+        indexed by data row across chunks, so error messages report the
+        same row numbers either way.
+        """
+        offset = 0
+        if PYARROW_AVAILABLE:
+            try:
+                for df in self._arrow_chunks(file_path, encoding, chunk_size):
+                    df.index = pd.RangeIndex(offset, offset + len(df))
+                    offset += len(df)
+                    yield df
+                return
+            except ValueError as e:  # pyarrow.ArrowInvalid is a ValueError
+                log.warning("  ⚠️  PyArrow could not read the file (%s), using the C engine", e)
+        
+        with pd.read_csv(file_path, encoding=encoding, chunksize=chunk_size,
+                         skiprows=range(1, offset + 1)) as reader:
+            for df in reader:
+                df.index += offset
+                yield df
+    
+    def _arrow_chunks(self, file_path: str, encoding: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """
+        PyArrow's streaming CSV reader, regrouped into chunk_size-row frames.
+        
+        Every column is read as text and converted by _clean_dataframe:
+        the streaming reader infers types from its first block only, so a
+        later value that doesn't fit them would fail the whole read.
+        """
+        with open(file_path, encoding=encoding, newline='') as f:
+            header = next(csv.reader(f), [])
+        
+        reader = pa_csv.open_csv(
+            file_path,
+            read_options=pa_csv.ReadOptions(encoding=encoding),
+            parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={name: pa.string() for name in header},
+                strings_can_be_null=True
+            )
+        )
+        try:
+            pending = []
+            pending_rows = 0
+            for batch in reader:
+                pending.append(batch)
+                pending_rows += batch.num_rows
+                while pending_rows >= chunk_size:
+                    table = pa.Table.from_batches(pending)
+                    yield table.slice(0, chunk_size).to_pandas()
+                    rest = table.slice(chunk_size)
+                    pending = rest.to_batches()
+                    pending_rows = rest.num_rows
+            if pending_rows:
+                yield pa.Table.from_batches(pending).to_pandas()
+        finally:
+            reader.close()
+    
+    def _detect_encoding(self, file_path: str) -> str:
+        """
+        Find the first supported encoding that decodes the whole file.
+        
+        Decodes in blocks so the file never has to fit in memory
+        (used by iter_csv, where pandas reads lazily and would only hit
+        a decode error partway through).
+        """
+        for encoding in self._candidate_encodings(file_path):
+            try:
+                with open(file_path, encoding=encoding) as f:
+                    while f.read(1 << 20):
+                        pass
+                log.info("  ✓ Read with %s encoding", encoding)
+                return encoding
+            except UnicodeDecodeError:
+                continue
+        
+        # If all encodings fail
+        raise ValueError(
+            f"Could not read CSV with any supported encoding: {self.SUPPORTED_ENCODINGS}"
+        )
+    
     def _read_csv_with_encoding(self, file_path: str) -> pd.DataFrame:
         """
         Try reading CSV with different encodings.
         
         Why: Different banks/systems export CSVs with different encodings.
-        We try common ones until one works.
+        We try the detected encoding first, then common ones until one works.
         """
-        for encoding in self.SUPPORTED_ENCODINGS:
+        for encoding in self._candidate_encodings(file_path):
             try:
-                df = pd.read_csv(file_path, encoding=encoding)
-                print(f"  ✓ Read with {encoding} encoding")
+                df = self._read_csv(file_path, encoding)
+                log.info("  ✓ Read with %s encoding", encoding)
                 return df
             except UnicodeDecodeError:
                 continue
@@ -132,6 +299,55 @@ class TransactionParser:
             f"Could not read CSV with any supported encoding: {self.SUPPORTED_ENCODINGS}"
         )
     
+    def _candidate_encodings(self, file_path: str) -> List[str]:
+        """
+        Encodings to try, most likely first.
+        
+        charset-normalizer looks at the first ENCODING_SAMPLE_SIZE bytes;
+        its guess goes first and SUPPORTED_ENCODINGS stay as the fallback
+        (the sample may not show every character in the file).
+        """
+        candidates = list(self.SUPPORTED_ENCODINGS)
+        if not CHARSET_NORMALIZER_AVAILABLE:
+            return candidates
+        
+        with open(file_path, 'rb') as f:
+            sample = f.read(self.ENCODING_SAMPLE_SIZE)
+        
+        best = from_bytes(sample).best()
+        if best is None:
+            return candidates
+        
+        # Plain ASCII so far: UTF-8 reads that and anything beyond the sample
+        guess = 'utf-8' if best.encoding in ('ascii', 'utf_8') else best.encoding
+        return [guess] + [e for e in candidates if e != guess]
+    
+    def _read_csv(self, file_path: str, encoding: str) -> pd.DataFrame:
+        """
+        Read a whole CSV file, with the PyArrow engine when available.
+        
+        Falls back to pandas' C engine if PyArrow rejects the file
+        (ragged rows, text that doesn't decode, ...); the C engine then
+        raises UnicodeDecodeError so the caller can try the next encoding.
+        """
+        if PYARROW_AVAILABLE:
+            try:
+                return pd.read_csv(
+                    file_path,
+                    encoding=encoding,
+                    engine='pyarrow',
+                    dtype_backend='pyarrow',
+                    # Typed as string so PyArrow validates the text (an untyped
+                    # column with bad bytes would be read as binary instead)
+                    dtype={'description': 'string[pyarrow]'}
+                )
+            except UnicodeDecodeError:
+                raise
+            except ValueError as e:  # pyarrow.ArrowInvalid is a ValueError
+                log.warning("  ⚠️  PyArrow could not read the file (%s), using the C engine", e)
+        
+        return pd.read_csv(file_path, encoding=encoding)
+    
     def _validate_columns(self, df: pd.DataFrame) -> None:
         """
         Check that all required columns are present.
@@ -148,7 +364,7 @@ class TransactionParser:
                 f"Required: {self.REQUIRED_COLUMNS}"
             )
         
-        print(f"  ✓ All required columns present: {self.REQUIRED_COLUMNS}")
+        log.info("  ✓ All required columns present: %s", self.REQUIRED_COLUMNS)
     
     def _clean_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -159,6 +375,8 @@ class TransactionParser:
         2. Clean descriptions (remove extra spaces)
         3. Convert amounts to float
         4. Add empty category column if not present
+        5. Drop rows with missing data
+        6. Drop rows breaking the Transaction rules (logged in self.errors)
         """
         # Parse dates - pandas tries to auto-detect format
         df['date'] = pd.to_datetime(df['date'], errors='coerce')
@@ -166,8 +384,9 @@ class TransactionParser:
         # Clean descriptions (strip whitespace, uppercase for consistency)
         df['description'] = df['description'].astype(str).str.strip()
         
-        # Ensure amount is float
-        df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
+        # Ensure amount is float (as NumPy float64: in PyArrow-backed columns
+        # unparseable values become NaN, which dropna would not remove)
+        df['amount'] = pd.to_numeric(df['amount'], errors='coerce').astype('float64')
         
         # Add category column if not present
         if 'category' not in df.columns:
@@ -178,8 +397,20 @@ class TransactionParser:
         df = df.dropna(subset=['date', 'description', 'amount'])
         after_count = len(df)
         
-        if before_count > after_count:
-            print(f"  ⚠️  Removed {before_count - after_count} rows with missing data")
+        # Counted here, reported once per file (see _log_result)
+        self._stats['dropped'] += before_count - after_count
+        
+        # Transaction rules, checked on whole columns instead of per row
+        bad_amount = df['amount'] <= 0
+        bad_description = (df['description'].str.len() == 0) & ~bad_amount
+        invalid = bad_amount | bad_description
+        if invalid.any():
+            for row, amount_is_bad in bad_amount[invalid].items():
+                reason = 'Amount must be positive' if amount_is_bad else 'Description cannot be empty'
+                error_msg = f"Row {row + 2}: {reason}"  # +2 for 1-indexing and header
+                self.errors.append(error_msg)
+                log.log(self._detail_level, "  ⚠️  %s", error_msg)
+            df = df[~invalid]
         
         return df
     
@@ -189,32 +420,47 @@ class TransactionParser:
         
         Uses Pydantic for validation - if a row is invalid,
         we log it and skip (don't crash the whole process).
+        Rows are validated in bulk; only a failing chunk is
+        re-checked row by row to report which rows were bad.
+        
+        Also adds the converted rows to the summary statistics.
         """
-        transactions = []
+        # Plain dicts are much cheaper to build than a pd.Series per row
+        records = df[['date', 'description', 'amount', 'category']].to_dict(orient='records')
         
-        for index, row in df.iterrows():
+        # Validate the whole chunk in one pydantic-core call
+        try:
+            transactions = _TRANSACTION_LIST.validate_python(records)
+            self._update_stats(df)
+            return transactions
+        except ValidationError as e:
+            bad_rows = {error['loc'][0] for error in e.errors()}
+        
+        # Some rows are invalid: log those one by one, keep the rest
+        for position, (index, record) in enumerate(zip(df.index, records)):
+            if position not in bad_rows:
+                continue
             try:
-                # Create Transaction object (Pydantic validates automatically)
-                transaction = Transaction(
-                    date=row['date'],
-                    description=row['description'],
-                    amount=row['amount'],
-                    category=row.get('category')
-                )
-                transactions.append(transaction)
-                
-            except Exception as e:
+                Transaction.model_validate(record)
+            except ValidationError as e:
                 # Log error but continue processing
                 error_msg = f"Row {index + 2}: {e}"  # +2 for 1-indexing and header
                 self.errors.append(error_msg)
-                print(f"  ⚠️  {error_msg}")
+                log.log(self._detail_level, "  ⚠️  %s", error_msg)
         
+        valid_records = [r for position, r in enumerate(records) if position not in bad_rows]
+        transactions = _TRANSACTION_LIST.validate_python(valid_records)
+        self._update_stats(df.drop(index=df.index[sorted(bad_rows)]))
         return transactions
     
-    def to_dict_list(self) -> List[Dict]:
+    def to_dict_list(self, transactions: Optional[List[Transaction]] = None) -> List[Dict]:
         """
         Convert transactions to list of dictionaries.
         
+        Args:
+            transactions: Transactions to convert (default: the last parse_csv result,
+                          pass a chunk from iter_csv to convert just that chunk)
+        
         Useful for:
         - Sending to Claude API (needs JSON format)
         - Saving to database
@@ -231,36 +477,65 @@ class TransactionParser:
                 ...
             ]
         """
-        return [
-            {
-                'date': t.date.isoformat(),
-                'description': t.description,
-                'amount': t.amount,
-                'category': t.category
-            }
-            for t in self.transactions
-        ]
+        # One pydantic-core pass; dates come out in isoformat
+        return _TRANSACTION_LIST.dump_python(
+            self.transactions if transactions is None else transactions,
+            mode='json'
+        )
+    
+    def _log_result(self) -> None:
+        """Log one summary of the finished parse (instead of a line per bad row)."""
+        log.info("✅ Successfully parsed %d transactions", self._stats['count'])
+        if self._stats['dropped']:
+            log.warning("  ⚠️  Removed %d rows with missing data", self._stats['dropped'])
+        if self.errors:
+            log.warning("⚠️  Skipped %d invalid rows (TransactionParser.errors has the details)", len(self.errors))
+    
+    def _reset_stats(self) -> None:
+        """Clear the running summary statistics."""
+        self._stats = {'count': 0, 'total': 0.0, 'first': None, 'last': None, 'dropped': 0}
+    
+    def _update_stats(self, df: pd.DataFrame) -> None:
+        """
+        Fold a batch of converted rows into the running summary statistics.
+        
+        Reduces the cleaned DataFrame columns (vectorized) rather than
+        looping over the Transaction objects.
+        """
+        if df.empty:
+            return
+        
+        stats = self._stats
+        first, last = df['date'].min(), df['date'].max()
+        
+        stats['count'] += len(df)
+        stats['total'] += float(df['amount'].sum())
+        if stats['first'] is None or first < stats['first']:
+            stats['first'] = first
+        if stats['last'] is None or last > stats['last']:
+            stats['last'] = last
     
     def get_summary(self) -> Dict:
         """
         Get summary statistics about parsed transactions.
         
-        Useful for quick sanity checks.
+        Useful for quick sanity checks. Covers the last parse_csv() call
+        or the whole file after an iter_csv() loop.
         """
-        if not self.transactions:
+        stats = self._stats
+        if not stats['count']:
             return {"error": "No transactions parsed"}
         
-        dates = [t.date for t in self.transactions]
-        amounts = [t.amount for t in self.transactions]
+        first, last = stats['first'], stats['last']
         
         return {
-            'total_transactions': len(self.transactions),
-            'total_amount': round(sum(amounts), 2),
-            'average_amount': round(sum(amounts) / len(amounts), 2),
+            'total_transactions': stats['count'],
+            'total_amount': round(stats['total'], 2),
+            'average_amount': round(stats['total'] / stats['count'], 2),
             'date_range': {
-                'start': min(dates).strftime('%Y-%m-%d'),
-                'end': max(dates).strftime('%Y-%m-%d'),
-                'days': (max(dates) - min(dates)).days + 1
+                'start': first.strftime('%Y-%m-%d'),
+                'end': last.strftime('%Y-%m-%d'),
+                'days': (last - first).days + 1
             },
             'errors_count': len(self.errors)
         }
@@ -276,6 +551,8 @@ if __name__ == "__main__":
     """
     import json
 
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
     # Path to sample CSV (adjust as needed)
     csv_path = "src/services/carbon/samples/sample_transactions_5.csv"
     
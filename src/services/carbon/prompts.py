@@ -7,6 +7,10 @@ This module contains:
 1. Categorization prompt - classify transactions
 2. Coaching prompt - generate reduction advice
 
+Each prompt is split into a static system prompt (CATEGORIZATION_SYSTEM,
+COACHING_SYSTEM) and a short per-call user message, so the static part
+can be served from Anthropic's prompt cache.
+
 Good prompts are:
 - Clear and specific
 - Include examples
@@ -14,36 +18,14 @@ Good prompts are:
 - Give context/constraints
 """
 
+from itertools import islice
 from typing import List, Dict
 
 
-def categorization_prompt(transactions: List[Dict]) -> str:
-    """
-    Generate prompt for transaction categorization.
-    
-    This prompt asks Claude to:
-    1. Look at transaction descriptions
-    2. Categorize each one
-    3. Return structured JSON
-    4. Include confidence level
-    
-    Args:
-        transactions: List of dicts with 'description' and 'amount'
-    
-    Returns:
-        Formatted prompt string for Claude
-    """
-    
-    # Format transactions for the prompt
-    # Example: "- Delta Airlines ($420.00)"
-    transactions_text = "\n".join([
-        f"- {t['description']} (${t['amount']:.2f})"
-        for t in transactions
-    ])
-    
-    # Build the prompt
-    # Note: We're very explicit about what we want
-    prompt = f"""You are an expert at categorizing financial transactions for carbon footprint analysis.
+# Static instructions, sent as the system prompt. They are identical on
+# every call, so the client marks them for Anthropic prompt caching
+# (cached prefix tokens are billed at 10% of the input rate).
+CATEGORIZATION_SYSTEM = """You are an expert at categorizing financial transactions for carbon footprint analysis.
 
 AVAILABLE CATEGORIES:
 - air_travel: Flights, airlines (Delta, United, Southwest, etc.)
@@ -56,76 +38,30 @@ AVAILABLE CATEGORIES:
 - goods_clothing: Clothing stores (Nordstrom, Gap, H&M, etc.)
 - goods_general: Other purchases (Target, Walmart, general merchandise)
 
-TRANSACTIONS TO CATEGORIZE:
-{transactions_text}
-
 INSTRUCTIONS:
-1. Categorize each transaction based on the merchant/description
+1. Categorize each transaction in the user's message based on the merchant/description
 2. Use your best judgment for unclear cases
 3. Return ONLY valid JSON (no markdown, no explanations)
 4. Include confidence level: high/medium/low
 
 REQUIRED JSON FORMAT:
-{{
+{
   "categorized_transactions": [
-    {{
+    {
       "description": "exact original description",
       "amount": exact_amount,
       "category": "chosen_category",
       "confidence": "high/medium/low",
       "reasoning": "brief 1-sentence explanation"
-    }}
+    }
   ]
-}}
+}
 
 Remember: Return ONLY the JSON object, nothing else."""
-    
-    return prompt
 
 
-def coaching_prompt(analysis_result: Dict) -> str:
-    """
-    Generate prompt for personalized coaching.
-    
-    This prompt asks Claude to:
-    1. Analyze the user's emission breakdown
-    2. Identify highest-impact areas
-    3. Generate specific, actionable advice
-    4. Estimate potential savings
-    5. Return structured JSON
-    
-    Args:
-        analysis_result: Complete emission analysis with breakdown
-    
-    Returns:
-        Formatted prompt string for Claude
-    """
-    
-    # Extract key information
-    total_kg = analysis_result['total_emissions_kg']
-    breakdown = analysis_result['breakdown']
-    
-    # Find top 3 emission sources
-    top_categories = sorted(
-        breakdown.items(),
-        key=lambda x: x[1]['emissions_kg'],
-        reverse=True
-    )[:3]
-    
-    # Format top categories for the prompt
-    top_text = "\n".join([
-        f"- {cat}: {data['emissions_kg']} kg CO2 ({data['percentage']}% of total)"
-        for cat, data in top_categories
-    ])
-    
-    # Build the prompt
-    prompt = f"""You are an expert environmental coach helping someone reduce their carbon footprint.
-
-CURRENT SITUATION:
-- Total monthly emissions: {total_kg} kg CO2
-- Projected annual emissions: {total_kg * 12} kg CO2
-- Top emission sources:
-{top_text}
+COACHING_SYSTEM = """You are an expert environmental coach helping someone reduce their carbon footprint.
+The user's message describes their current situation.
 
 GLOBAL CONTEXT:
 - US Average: 16,000 kg CO2/year
@@ -156,53 +92,120 @@ EXAMPLES OF BAD RECOMMENDATIONS:
 ✗ "Move to a different country" (impractical)
 
 REQUIRED JSON FORMAT:
-{{
+{
   "recommendations": [
-    {{
+    {
       "action": "specific action to take",
       "category": "which emission category this addresses",
       "potential_savings_kg": annual_kg_saved,
       "difficulty": "easy/medium/hard",
       "timeline": "how long to implement",
       "explanation": "why this works and how to do it"
-    }}
+    }
   ],
   "overall_strategy": "2-3 sentence summary of recommended approach",
   "realistic_annual_target_kg": achievable_annual_target_number
-}}
+}
 
 EXAMPLE COMPLETE OUTPUT:
-{{
+{
   "recommendations": [
-    {{
+    {
       "action": "Take train instead of flying for trips under 300 miles",
       "category": "air_travel",
       "potential_savings_kg": 1200,
       "difficulty": "medium",
       "timeline": "start next trip",
       "explanation": "Trains emit 80% less CO2 than flights for short distances. For a 300-mile flight, switching to train saves ~400kg per trip."
-    }},
-    {{
+    },
+    {
       "action": "Switch to renewable energy plan with your utility provider",
       "category": "electricity",
       "potential_savings_kg": 2000,
       "difficulty": "easy",
       "timeline": "1 week to switch",
       "explanation": "Most utilities offer renewable energy plans at similar prices. This eliminates emissions from grid electricity immediately."
-    }}
+    }
   ],
   "overall_strategy": "Focus on high-impact changes first, starting with renewable energy and reducing air travel.",
   "realistic_annual_target_kg": 35000
-}}
+}
 
 CRITICAL OUTPUT REQUIREMENTS:
 - Return ONLY valid JSON
 - Do NOT wrap in markdown code blocks (no ```json or ```)
 - Do NOT include any explanatory text before or after the JSON
 - Your ENTIRE response must be parseable by json.loads()
-- The response must start with {{ and end with }}"""
+- The response must start with { and end with }"""
+
+
+# Static heading of the categorization user message
+_CATEGORIZATION_HEADER = "TRANSACTIONS TO CATEGORIZE:\n"
+
+
+def categorization_prompt(transactions: List[Dict]) -> str:
+    """
+    Generate the user message for transaction categorization.
     
-    return prompt
+    The categories, instructions and output format live in
+    CATEGORIZATION_SYSTEM (send it as the system prompt); this
+    message only lists the transactions to categorize.
+    
+    Args:
+        transactions: List of dicts with 'description' and 'amount'
+    
+    Returns:
+        Formatted prompt string for Claude
+    """
+    
+    # Format transactions for the prompt
+    # Example: "- Delta Airlines ($420.00)"
+    # (A list, not a generator: str.join turns a generator into a list
+    # first anyway, so the list comprehension is the faster of the two.)
+    transactions_text = "\n".join([
+        f"- {t['description']} (${t['amount']:.2f})"
+        for t in transactions
+    ])
+    
+    return _CATEGORIZATION_HEADER + transactions_text
+
+
+def coaching_prompt(analysis_result: Dict) -> str:
+    """
+    Generate the user message for personalized coaching.
+    
+    The task, requirements and output format live in COACHING_SYSTEM
+    (send it as the system prompt); this message only describes the
+    user's emissions:
+    1. Total monthly and projected annual emissions
+    2. The 3 highest emission categories
+    
+    Args:
+        analysis_result: Complete emission analysis with breakdown
+    
+    Returns:
+        Formatted prompt string for Claude
+    """
+    
+    # Extract key information
+    total_kg = analysis_result['total_emissions_kg']
+    breakdown = analysis_result['breakdown']
+    
+    # Top 3 emission sources (calculate_total already orders the breakdown
+    # by emissions, highest first)
+    top_categories = list(islice(breakdown.items(), 3))
+    
+    # Format top categories for the prompt
+    top_text = "\n".join([
+        f"- {cat}: {data['emissions_kg']} kg CO2 ({data['percentage']}% of total)"
+        for cat, data in top_categories
+    ])
+    
+    return f"""CURRENT SITUATION:
+- Total monthly emissions: {total_kg} kg CO2
+- Projected annual emissions: {total_kg * 12} kg CO2
+- Top emission sources:
+{top_text}"""
 
 
 # Example usage / testing
@@ -243,6 +246,8 @@ if __name__ == "__main__":
     print("="*70)
     print("CATEGORIZATION PROMPT")
     print("="*70)
+    print(CATEGORIZATION_SYSTEM)
+    print()
     print(categorization_prompt(sample_transactions))
     
     print("\n\n")
@@ -250,4 +255,6 @@ if __name__ == "__main__":
     print("="*70)
     print("COACHING PROMPT")
     print("="*70)
+    print(COACHING_SYSTEM)
+    print()
     print(coaching_prompt(sample_analysis))
\ No newline at end of file
@@ -0,0 +1,293 @@
+"""
+Semantic Category Cache
+=======================
+Remembers how Claude categorized merchant descriptions and reuses the
+answer for near-identical ones ("STARBUCKS #123" ≈ "STARBUCKS STORE 456").
+
+This module:
+1. Embeds transaction descriptions locally (fastembed or sentence-transformers)
+2. Finds the most similar previously categorized description (cosine similarity)
+3. Reuses its category when the similarity is above the threshold
+4. Persists descriptions, embeddings and categories between runs
+   (one file, merged with entries other processes saved meanwhile)
+
+Every backend is optional: without an embedding library the cache simply
+reports itself unavailable and every transaction goes to Claude. FAISS is
+used for the similarity search when installed, otherwise a NumPy dot product.
+
+Used by: analyzer.py
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Locks the store file between processes while it is merged and rewritten;
+# without fcntl (Windows) only threads of one process are serialized
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_STORE_DIR = Path.home() / ".cache" / "ecolens" / "semcache"
+
+# Loaded embedding models, shared by every cache in the process
+_EMBEDDERS: Dict[str, object] = {}
+_EMBEDDERS_LOCK = threading.Lock()
+
+# Serializes save() across the caches of one process (e.g. one per API request)
+_SAVE_LOCK = threading.Lock()
+
+
+def _load_embedder(model_name: str):
+    """
+    Return a function mapping a list of strings to L2-normalized float32
+    embeddings, or None if no embedding library is installed.
+    """
+    with _EMBEDDERS_LOCK:
+        if model_name in _EMBEDDERS:
+            return _EMBEDDERS[model_name]
+
+        embed = None
+        try:
+            from fastembed import TextEmbedding
+            model = TextEmbedding(model_name=model_name)
+            embed = lambda texts: np.asarray(list(model.embed(texts)), dtype=np.float32)
+        except ImportError:
+            try:
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(model_name)
+                embed = lambda texts: model.encode(
+                    texts, convert_to_numpy=True, show_progress_bar=False
+                ).astype(np.float32)
+            except ImportError:
+                log.info("ℹ️  No embedding library installed, semantic cache disabled")
+
+        if embed is not None:
+            def normalized(texts: List[str]) -> np.ndarray:
+                vectors = embed(texts)
+                norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                return vectors / np.maximum(norms, 1e-12)
+            embed = normalized
+
+        _EMBEDDERS[model_name] = embed
+        return embed
+
+
+class SemanticCategoryCache:
+    """
+    Nearest-neighbour cache of description → category.
+
+    Usage:
+        cache = SemanticCategoryCache()
+        hits = cache.lookup(["STARBUCKS STORE 456", "NEW MERCHANT"])
+        # → [{'category': 'food_restaurant', 'confidence': 'high'}, None]
+        cache.add(["NEW MERCHANT"], [{'category': 'goods_general', 'confidence': 'medium'}])
+        cache.save()
+    """
+
+    # Minimum cosine similarity to reuse a stored category
+    SIMILARITY_THRESHOLD = 0.92
+
+    def __init__(self,
+                 store_dir: Optional[str] = None,
+                 model_name: str = DEFAULT_MODEL,
+                 threshold: float = SIMILARITY_THRESHOLD):
+        """
+        Initialize the cache and load any stored entries.
+
+        Args:
+            store_dir: Directory for the persisted cache (default: ~/.cache/ecolens/semcache/)
+            model_name: Embedding model to use
+            threshold: Minimum cosine similarity for a hit
+        """
+        self.store_dir = Path(store_dir) if store_dir else DEFAULT_STORE_DIR
+        self.threshold = threshold
+        self._embed = _load_embedder(model_name)
+        self._lock = threading.Lock()
+
+        self._descriptions: List[str] = []
+        self._labels: List[Dict] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._index = None
+        self._saved = 0  # entries before this index are already on disk
+
+        if self.available:
+            self._load()
+
+    @property
+    def available(self) -> bool:
+        """True if an embedding backend is installed."""
+        return self._embed is not None
+
+    def __len__(self) -> int:
+        return len(self._descriptions)
+
+    def lookup(self, descriptions: List[str]) -> List[Optional[Dict]]:
+        """
+        Find a cached category for each description.
+
+        Args:
+            descriptions: Transaction descriptions
+
+        Returns:
+            One entry per description: {'category', 'confidence', 'similarity'}
+            for a hit, None for a miss
+        """
+        if not self.available or not descriptions:
+            return [None] * len(descriptions)
+
+        with self._lock:
+            if not self._descriptions:
+                return [None] * len(descriptions)
+
+            queries = self._embed(descriptions)
+            similarity, nearest = self._search(queries)
+
+            return [
+                {**self._labels[i], 'similarity': round(float(sim), 3)}
+                if sim >= self.threshold else None
+                for sim, i in zip(similarity.tolist(), nearest.tolist())
+            ]
+
+    def add(self, descriptions: List[str], labels: List[Dict]) -> None:
+        """
+        Store newly categorized descriptions.
+
+        Args:
+            descriptions: Transaction descriptions
+            labels: Matching dicts with at least 'category' (and 'confidence')
+        """
+        if not self.available or not descriptions:
+            return
+
+        entries = [
+            {'category': label['category'], 'confidence': label.get('confidence', 'medium')}
+            for label in labels
+        ]
+        vectors = self._embed(descriptions)
+
+        with self._lock:
+            self._descriptions.extend(descriptions)
+            self._labels.extend(entries)
+            if self._vectors is None:
+                self._vectors = vectors
+            else:
+                self._vectors = np.vstack([self._vectors, vectors])
+            self._index = None  # rebuilt on the next search
+
+    def save(self) -> None:
+        """
+        Write the cache to store_dir (no-op if nothing was added).
+
+        Entries saved by other caches since this one was loaded are kept:
+        the file on disk is re-read and this cache's new entries are
+        appended to it. The file is replaced atomically, so a reader never
+        sees a partial write. Call it once per run, not per batch.
+        """
+        if not self.available:
+            return
+
+        with self._lock:
+            if self._saved == len(self._descriptions):
+                return
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+
+            with _SAVE_LOCK, open(self.store_dir / "store.lock", 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)  # released when the file closes
+
+                stored = self._read_store()
+                if stored is None:
+                    descriptions, labels, vectors = [], [], None
+                else:
+                    descriptions, labels, vectors = stored
+                # This cache's entries that aren't on disk yet
+                known = set(descriptions)
+                new = []
+                for i in range(self._saved, len(self._descriptions)):
+                    if self._descriptions[i] not in known:
+                        known.add(self._descriptions[i])
+                        new.append(i)
+                descriptions = descriptions + [self._descriptions[i] for i in new]
+                labels = labels + [self._labels[i] for i in new]
+                new_vectors = self._vectors[new]
+                vectors = new_vectors if vectors is None else np.vstack([vectors, new_vectors])
+
+                path = self.store_dir / "store.npz"
+                tmp_path = self.store_dir / f".store.npz.{os.getpid()}.tmp"
+                try:
+                    with open(tmp_path, 'wb') as f:
+                        np.savez(f, vectors=vectors, entries=np.array(
+                            json.dumps({'descriptions': descriptions, 'labels': labels})
+                        ))
+                    os.replace(tmp_path, path)
+                except OSError as e:
+                    log.warning("⚠️  Could not save semantic cache to %s: %s", self.store_dir, e)
+                    return
+
+            # Adopt the merged view (it includes other runs' entries)
+            self._descriptions, self._labels, self._vectors = descriptions, labels, vectors
+            self._saved = len(descriptions)
+            self._index = None
+
+    def _load(self) -> None:
+        """Read a previously saved cache, if there is one."""
+        stored = self._read_store()
+        if stored is None:
+            return
+
+        self._descriptions, self._labels, self._vectors = stored
+        self._saved = len(self._descriptions)
+        log.info("✅ Loaded %d cached categorizations", len(self._descriptions))
+
+    def _read_store(self):
+        """
+        Read the saved cache file.
+
+        Returns:
+            (descriptions, labels, vectors), or None if there is no usable file
+        """
+        path = self.store_dir / "store.npz"
+        if not path.exists():
+            return None
+
+        try:
+            with np.load(path) as store:
+                entries = json.loads(store['entries'].item())
+                vectors = store['vectors'].astype(np.float32)
+        except (OSError, ValueError, KeyError) as e:
+            log.warning("⚠️  Could not load semantic cache from %s: %s", self.store_dir, e)
+            return None
+
+        if len(entries['descriptions']) != len(vectors):
+            log.warning("⚠️  Semantic cache in %s is inconsistent, ignoring it", self.store_dir)
+            return None
+
+        return entries['descriptions'], entries['labels'], vectors
+
+    def _search(self, queries: np.ndarray):
+        """Best inner-product match (= cosine, vectors are normalized) per query."""
+        try:
+            import faiss
+        except ImportError:
+            faiss = None
+
+        if faiss is not None:
+            if self._index is None:
+                self._index = faiss.IndexFlatIP(self._vectors.shape[1])
+                self._index.add(self._vectors)
+            similarity, nearest = self._index.search(queries, 1)
+            return similarity[:, 0], nearest[:, 0]
+
+        scores = queries @ self._vectors.T
+        nearest = scores.argmax(axis=1)
+        return scores[np.arange(len(queries)), nearest], nearest
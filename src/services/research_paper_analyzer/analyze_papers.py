@@ -6,6 +6,8 @@ Ties all components together into a complete paper analysis pipeline.
 Pipeline:
 1. Process PDF → extract text + images
 2. Analyze images → understand charts
+   (steps 1 and 2 are streamed: each figure page is sent to Claude Vision
+   as soon as it is extracted, while later pages are still being parsed)
 3. Summarize text → get key findings
 4. Combine results → complete analysis
 
@@ -16,16 +18,56 @@ Usage:
     result = analyzer.analyze_paper("research_paper.pdf")
 """
 
+import asyncio
+import functools
 import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime
 from pathlib import Path
-from typing import Dict
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
-# Import our components
-from pdf_processor import PDFProcessor
-from vision_analyzer import VisionAnalyzer
-from summarizer import PaperSummarizer
-from client import ClaudeClient
+# orjson (C-backed) serializes result files much faster than stdlib
+# json; fall back to json if it isn't installed
+try:
+    import orjson
+
+    def _json_dumps(obj, pretty: bool = False) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+except ImportError:
+
+    def _json_dumps(obj, pretty: bool = False) -> bytes:
+        if pretty:
+            return json.dumps(obj, indent=2).encode('utf-8')
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+# Results larger than this (compact) are saved without indentation
+PRETTY_JSON_MAX_BYTES = 1_000_000
+
+# Our components (and their PyMuPDF / Pillow / NumPy dependencies) are
+# imported when the first PaperAnalyzer is created, so the CLI's argument
+# errors and plain imports of this module don't pay for them
+if TYPE_CHECKING:
+    from pdf_processor import PDFProcessor
+    from pdf_cache import PDFCache
+
+
+@functools.lru_cache(maxsize=1)
+def _get_pdf_processor() -> 'PDFProcessor':
+    """PDFProcessor holds no per-paper state, so one instance serves every analyzer"""
+    from pdf_processor import PDFProcessor
+    return PDFProcessor()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_pdf_cache() -> 'PDFCache':
+    """Extraction cache in the default location, shared by every analyzer"""
+    from pdf_cache import PDFCache
+    return PDFCache()
 
 
 class PaperAnalyzer:
@@ -38,21 +80,31 @@ class PaperAnalyzer:
         print(result)
     """
     
-    def __init__(self, api_key: str = None):
+    __slots__ = ('claude', 'pdf_processor', 'pdf_cache', 'vision_analyzer', 'summarizer')
+    
+    def __init__(self, api_key: str = None, cache: bool = True):
         """
         Initialize analyzer with all components.
         
         Args:
             api_key: Claude API key (optional, uses env var if not provided)
+            cache: Reuse stored Claude responses when a paper is analyzed
+                again (identical requests only, kept for 7 days), and the
+                extracted text / rendered pages of unchanged PDF files
         """
         print("\n📚 Initializing Paper Analyzer...")
         print("="*70)
         
+        from vision_analyzer import VisionAnalyzer
+        from summarizer import PaperSummarizer
+        from client import ClaudeClient
+        
         # Initialize shared Claude client (for cost tracking across all components)
-        self.claude = ClaudeClient(api_key=api_key)
+        self.claude = ClaudeClient(api_key=api_key, cache=cache)
         
         # Initialize components
-        self.pdf_processor = PDFProcessor()
+        self.pdf_processor = _get_pdf_processor()
+        self.pdf_cache = _get_pdf_cache() if cache else None
         self.vision_analyzer = VisionAnalyzer(claude_client=self.claude)
         self.summarizer = PaperSummarizer(claude_client=self.claude)
         
@@ -90,56 +142,41 @@ class PaperAnalyzer:
         if analyze_images:
             print(f"Max images: {max_images}")
         
-        # STEP 1: Process PDF
-        print("\n" + "="*70)
-        print("STEP 1: PROCESSING PDF")
-        print("="*70)
-        
-        content = self.pdf_processor.extract(
-            pdf_path,
-            extract_images=analyze_images
-        )
+        visual_insights = None
         
-        print(f"\n✓ Extracted:")
-        print(f"   Pages: {content['pages']}")
-        print(f"   Characters: {len(content['text']):,}")
         if analyze_images:
-            print(f"   Images: {len(content['images'])}")
-        
-        # STEP 2: Analyze Images (if enabled)
-        visual_insights = None
-        if analyze_images and content['images']:
+            # STEPS 1 + 2: Process PDF and analyze charts, overlapped
             print("\n" + "="*70)
-            print("STEP 2: ANALYZING CHARTS AND GRAPHS")
+            print("STEPS 1-2: PROCESSING PDF AND ANALYZING CHARTS AND GRAPHS")
             print("="*70)
             
-            # Detect figure captions to filter important images
-            captions = self.pdf_processor.detect_figure_captions(content['page_texts'])
+            content, image_analyses = asyncio.run(
+                self._extract_and_analyze_images(pdf_path, max_images)
+            )
+            
+            print(f"\n✓ Extracted:")
+            print(f"   Pages: {content['pages']}")
+            print(f"   Characters: {sum(len(page) for page in content['page_texts']):,}")
+            print(f"   Images: {len(content['images'])}")
             
-            if captions:
-                print(f"📊 Found {sum(len(c) for c in captions.values())} figure captions")
+            if image_analyses:
+                # Summarize visual insights
+                visual_insights = self.vision_analyzer.summarize_visual_insights(image_analyses)
+                visual_insights['detailed_analyses'] = image_analyses
                 
-                # Filter to only images with captions (likely figures)
-                important_images = self.vision_analyzer.filter_important_images(
-                    content['images'],
-                    captions
-                )
-            else:
-                print(f"⚠️  No figure captions detected, analyzing all images")
-                important_images = content['images']
+                print(f"\n✓ Analyzed {visual_insights['successful_analyses']} images successfully")
+        else:
+            # STEP 1: Process PDF
+            print("\n" + "="*70)
+            print("STEP 1: PROCESSING PDF")
+            print("="*70)
             
-            # Analyze images
-            image_analyses = self.vision_analyzer.analyze_multiple(
-                important_images,
-                max_images=max_images
-            )
+            content = self._extract_text(pdf_path)
             
-            # Summarize visual insights
-            visual_insights = self.vision_analyzer.summarize_visual_insights(image_analyses)
-            visual_insights['detailed_analyses'] = image_analyses
+            print(f"\n✓ Extracted:")
+            print(f"   Pages: {content['pages']}")
+            print(f"   Characters: {sum(len(page) for page in content['page_texts']):,}")
             
-            print(f"\n✓ Analyzed {visual_insights['successful_analyses']} images successfully")
-        else:
             print("\n⏭️  STEP 2: Skipping image analysis")
         
         # STEP 3: Summarize Text
@@ -148,7 +185,7 @@ class PaperAnalyzer:
         print("="*70)
         
         text_analysis = self.summarizer.full_analysis(
-            text=content['text'],
+            text=None,  # sections are built from page_texts
             page_texts=content['page_texts'],
             first_page=content['page_texts'][0] if content['page_texts'] else None
         )
@@ -182,6 +219,190 @@ class PaperAnalyzer:
         
         return result
     
+    async def _extract_and_analyze_images(self,
+                                          pdf_path: str,
+                                          max_images: int) -> Tuple[Dict, List[Dict]]:
+        """
+        Extract the PDF page by page and analyze figures as they appear.
+        
+        Each page whose text has a figure/table caption is rendered and its
+        Vision call started right away, so PDF parsing overlaps the API
+        wait instead of finishing first. Only captioned pages are rendered,
+        and renders that are blank or near-uniform are skipped
+        (VisionAnalyzer.is_likely_figure). If the paper has no captions at
+        all, the first pages passing that check are analyzed instead.
+        
+        PDF work runs on a single worker thread (PyMuPDF isn't thread-safe),
+        keeping the event loop free to drive the Vision calls.
+        
+        Args:
+            pdf_path: Path to PDF file
+            max_images: Maximum images to analyze (cost control)
+        
+        Returns:
+            (content, image_analyses) - content has the same keys as
+            PDFProcessor.extract(), minus metadata and the joined 'text'
+            (neither is used here); 'images' entries have no 'image_bytes'
+            (released once their Vision call is done)
+        """
+        
+        pdf_path = str(pdf_path)
+        if not Path(pdf_path).exists():
+            raise FileNotFoundError(f"PDF not found: {pdf_path}")
+        
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.vision_analyzer.MAX_CONCURRENT_CALLS)
+        page_texts = []
+        images = []
+        tasks = []
+        captioned_pages = 0
+        first_tasks = {}  # image digest -> task analyzing its first occurrence
+        cache_key = None
+        cached = None
+        # The PDF is opened at most once, on the PDF worker thread, and shared
+        # by iter_pages() and render_page()
+        documents = ExitStack()
+        doc = None
+        
+        def document():
+            nonlocal doc
+            if doc is None:
+                doc = documents.enter_context(self.pdf_processor.open_document(pdf_path))
+            return doc
+        
+        def cached_pages():
+            yield from enumerate(cached['page_texts'], start=1)
+        
+        def render_figure(page_num: int, scan: bool = False) -> Optional[Dict]:
+            # Runs on the PDF worker thread
+            image = None
+            settings = self.pdf_processor.render_settings(scan)
+            if cache_key is not None:
+                image = self.pdf_cache.get_page_image(cache_key, page_num, settings)
+            if image is None:
+                image = self.pdf_processor.render_page(pdf_path, page_num, scan, document())
+                if cache_key is not None:
+                    self.pdf_cache.put_page_image(cache_key, image, settings)
+            if not self.vision_analyzer.is_likely_figure(image['image_bytes']):
+                print(f"   ⏭️  Page {page_num}: no figure content, skipping")
+                return None
+            return image
+        
+        async def shared(first: asyncio.Task, image: Dict) -> Dict:
+            return self.vision_analyzer.shared_result(await first, image)
+        
+        def dispatch(image: Dict, caption: str):
+            image['caption'] = caption
+            images.append(image)
+            # Identical images (e.g. repeated pages) share one Vision call
+            digest = self.vision_analyzer.image_digest(image['image_bytes'])
+            first = first_tasks.get(digest)
+            if first is not None:
+                print(f"   ♻️  Page {image['page']} repeats an earlier image, reusing its analysis")
+                del image['image_bytes']
+                tasks.append(asyncio.create_task(shared(first, image)))
+                return
+            task = asyncio.create_task(
+                self.vision_analyzer.aanalyze_limited(image, semaphore)
+            )
+            # The bytes are only needed for the Vision call, don't keep every
+            # dispatched image in memory until the whole paper is done
+            task.add_done_callback(lambda _: image.pop('image_bytes', None))
+            first_tasks[digest] = task
+            tasks.append(task)
+        
+        with ThreadPoolExecutor(max_workers=1) as pdf_worker:
+            try:
+                if self.pdf_cache is not None:
+                    cache_key = await loop.run_in_executor(pdf_worker, self.pdf_cache.file_key, pdf_path)
+                    cached = self.pdf_cache.get(cache_key)
+                
+                if cached is not None:
+                    print(f"♻️  Using cached PDF text")
+                    pages = cached_pages()
+                else:
+                    pages = self.pdf_processor.iter_pages(
+                        pdf_path, await loop.run_in_executor(pdf_worker, document)
+                    )
+                try:
+                    while True:
+                        item = await loop.run_in_executor(pdf_worker, next, pages, None)
+                        if item is None:
+                            break
+                        
+                        page_num, text = item
+                        page_texts.append(text)
+                        
+                        captions = self.pdf_processor.page_captions(text)
+                        if captions:
+                            captioned_pages += 1
+                        if captions and len(tasks) < max_images:
+                            print(f"📊 Page {page_num}: {captions[0][:60]}")
+                            image = await loop.run_in_executor(pdf_worker, render_figure, page_num)
+                            if image is not None:
+                                # Assign the first caption (heuristic)
+                                dispatch(image, captions[0])
+                finally:
+                    await loop.run_in_executor(pdf_worker, pages.close)
+                
+                if not captioned_pages:
+                    print(f"⚠️  No figure captions detected, analyzing all images")
+                    for page_num in range(1, len(page_texts) + 1):
+                        if len(tasks) >= max_images:
+                            break
+                        # No caption points at a figure, so these are whole-page scans
+                        image = await loop.run_in_executor(pdf_worker, render_figure, page_num, True)
+                        if image is not None:
+                            dispatch(image, image['caption'])
+            finally:
+                await loop.run_in_executor(pdf_worker, documents.close)
+        
+        print(f"\n🖼️  Waiting for {len(tasks)} image analyses...")
+        try:
+            image_analyses = await asyncio.gather(*tasks)
+        finally:
+            # This loop ends with asyncio.run(), so release its connections
+            await self.claude.aclose()
+        
+        content = {
+            'pages': len(page_texts),
+            'page_texts': page_texts,
+            'images': images,
+            'file_name': Path(pdf_path).name
+        }
+        if cache_key is not None and cached is None:
+            self.pdf_cache.put(cache_key, content)
+        return content, list(image_analyses)
+    
+    def _extract_text(self, pdf_path: str) -> Dict:
+        """
+        PDFProcessor.extract() without images, served from the PDF cache
+        when this exact file was extracted before.
+        
+        Like _extract_and_analyze_images(), the result has no joined
+        'text' (only page_texts), so the whole document isn't held twice.
+        """
+        if self.pdf_cache is None:
+            return self.pdf_processor.extract(pdf_path, extract_images=False, join_text=False)
+        
+        if not Path(pdf_path).exists():
+            raise FileNotFoundError(f"PDF not found: {pdf_path}")
+        
+        cache_key = self.pdf_cache.file_key(pdf_path)
+        cached = self.pdf_cache.get(cache_key)
+        if cached is not None:
+            print(f"♻️  Using cached PDF text")
+            return {
+                'metadata': {},
+                **cached,
+                'images': [],
+                'file_name': Path(pdf_path).name
+            }
+        
+        content = self.pdf_processor.extract(pdf_path, extract_images=False, join_text=False)
+        self.pdf_cache.put(cache_key, content)
+        return content
+    
     def _save_results(self, result: Dict, original_file: str) -> str:
         """
         Save analysis results to JSON file.
@@ -190,6 +411,8 @@ class PaperAnalyzer:
             research_paper.pdf → paper_analysis_research_paper_2025-01-30.json
 
         Saves to: src/services/research_paper_analyzer/results/
+        Indented for reading, unless the compact JSON is over
+        PRETTY_JSON_MAX_BYTES (indentation would roughly double it).
         """
         # Create output filename
         original_name = Path(original_file).stem
@@ -204,9 +427,11 @@ class PaperAnalyzer:
         # Create results directory if needed
         results_dir.mkdir(exist_ok=True)
 
-        # Save as formatted JSON
-        with open(output_path, 'w') as f:
-            json.dump(result, f, indent=2)
+        # Save as JSON bytes (no text-mode encoding layer)
+        data = _json_dumps(result)
+        if len(data) <= PRETTY_JSON_MAX_BYTES:
+            data = _json_dumps(result, pretty=True)
+        output_path.write_bytes(data)
 
         return str(output_path)
     
@@ -262,6 +487,8 @@ class PaperAnalyzer:
         print(f"   Total calls: {cost.get('total_calls', 0)}")
         print(f"   Text calls: {cost.get('text_calls', 0)}")
         print(f"   Vision calls: {cost.get('vision_calls', 0)}")
+        if cost.get('cache_hits'):
+            print(f"   Cached responses reused: {cost['cache_hits']}")
         print(f"   Total cost: ${cost.get('total_cost_usd', 0):.4f}")
         
         print("\n" + "="*70)
@@ -279,10 +506,15 @@ if __name__ == "__main__":
         
     Or with options:
         python analyzer.py research_paper.pdf --no-images
+        python analyzer.py research_paper.pdf --no-cache
     """
     
+    import logging
     import sys
     
+    # Claude call summaries (client.py) are logged at INFO level
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     print("\n" + "="*70)
     print("ECOLENS - RESEARCH PAPER ANALYZER")
     print("="*70)
@@ -303,11 +535,12 @@ if __name__ == "__main__":
     
     # Check for options
     analyze_images = '--no-images' not in sys.argv
+    use_cache = '--no-cache' not in sys.argv
     
     try:
         # Create analyzer
         print("\n📍 Step: Initializing Paper Analyzer...")
-        analyzer = PaperAnalyzer()
+        analyzer = PaperAnalyzer(cache=use_cache)
 
         # Run analysis
         print(f"\n📍 Step: Starting analysis of {pdf_file}...")
@@ -344,16 +577,10 @@ if __name__ == "__main__":
         print(f"\n❌ ImportError: {e}")
         print(f"\n📍 Location: Missing required module")
         print("\nRequired dependencies:")
-        print("  - PyPDF2")
-        print("  - pdf2image")
+        print("  - pymupdf")
         print("  - anthropic")
         print("  - python-dotenv")
         print("\nInstall with: pip install -r requirements.txt")
-        print("\nAdditional system requirements:")
-        print("  - poppler (for pdf2image)")
-        print("    macOS: brew install poppler")
-        print("    Ubuntu: sudo apt install poppler-utils")
-        print("    Windows: Download from https://github.com/oschwartz10612/poppler-windows/releases/")
         print("\nFull traceback:")
         import traceback
         traceback.print_exc()
@@ -5,16 +5,47 @@ Enhanced version of the client that supports both text and vision API calls.
 
 New additions:
 - call_vision() method for analyzing images
-- Support for base64 image input
+- acall_vision() async version, so many images can be analyzed concurrently
+- acall_vision_multi() analyzes several images in one call
+- acall() async text calls, so paper sections can be summarized concurrently
+- call_json() / acall_json() stream JSON answers and cancel ones that aren't JSON
+- call_batch() runs text calls through the Message Batches API (half price, offline)
+- Support for raw image bytes (encoded once, media type detected) or base64 input
+- Anthropic prompt caching for static system prompts (cache_system=True)
+- Optional persistent response cache (cache=True), so re-running a paper is free
+- Keep-alive connection pools reused across calls (HTTP_LIMITS)
 - Separate cost tracking for vision API
 
 Used by: vision_analyzer.py, summarizer.py
 """
 
+import asyncio
+import base64
+import binascii
+import functools
+import hashlib
+import logging
 import os
-from typing import Dict, List, Optional
-from anthropic import Anthropic
+import random
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+import httpx
 from dotenv import load_dotenv, find_dotenv
+from response_cache import ResponseCache
+
+# The anthropic SDK takes over a second to import, so it is imported
+# where it's first needed (creating a client, classifying an API error);
+# importing this module, or the ones built on it, stays fast
+if TYPE_CHECKING:
+    from anthropic import Anthropic, AsyncAnthropic
+
+# Per-call details go through logging, not print(): one INFO line per
+# call, the rest at DEBUG (free when disabled, and concurrent calls don't
+# interleave partial blocks of output)
+log = logging.getLogger(__name__)
 
 # Load environment variables from .env file
 # find_dotenv() automatically searches up the directory tree for .env
@@ -22,11 +53,102 @@ from dotenv import load_dotenv, find_dotenv
 dotenv_path = find_dotenv()
 if dotenv_path:
     load_dotenv(dotenv_path)
-    print(f"✅ Loaded .env from: {dotenv_path}")
+    log.debug("✅ Loaded .env from: %s", dotenv_path)
 else:
     # Fallback: try loading from current working directory
     load_dotenv()  # This will silently fail if .env doesn't exist
 
+# Connection pool settings. Reusing keep-alive connections saves a TLS
+# handshake (~100 ms) on every call after the first.
+HTTP_LIMITS = httpx.Limits(
+    max_keepalive_connections=20,
+    max_connections=20,
+    keepalive_expiry=30.0
+)
+
+# Sync connection pool shared by every ClaudeClient in the process
+_HTTP_CLIENT: Optional[httpx.Client] = None
+_HTTP_LOCK = threading.Lock()
+
+
+def _get_http_client() -> httpx.Client:
+    """Return the process-wide HTTP connection pool, creating it on first use."""
+    global _HTTP_CLIENT
+    with _HTTP_LOCK:
+        if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+            # DefaultHttpxClient keeps the SDK's timeout and redirect defaults
+            from anthropic import DefaultHttpxClient
+            _HTTP_CLIENT = DefaultHttpxClient(limits=HTTP_LIMITS)
+        return _HTTP_CLIENT
+
+
+@functools.lru_cache(maxsize=8)
+def _get_anthropic(api_key: str) -> 'Anthropic':
+    """
+    Sync SDK client for an API key, shared by every ClaudeClient using it.
+    
+    Keyed by the key itself, so different keys never share a client.
+    """
+    from anthropic import Anthropic
+    
+    # Retries are done by ClaudeClient (see _retry_delay)
+    return Anthropic(api_key=api_key, http_client=_get_http_client(), max_retries=0)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_response_cache(cache_path: Optional[str]) -> ResponseCache:
+    """Open a response cache database once per path (None = default path)"""
+    return ResponseCache(cache_path)
+
+
+# pybase64 (SIMD kernels) encodes Vision images several times faster
+# than the stdlib; fall back to binascii's C encoder if it isn't installed
+try:
+    from pybase64 import b64encode_as_string as _b64encode
+except ImportError:
+    def _b64encode(data) -> str:
+        return binascii.b2a_base64(data, newline=False).decode('ascii')
+
+
+# Leading bytes of the image formats the Vision API accepts
+_IMAGE_SIGNATURES = (
+    (b'\x89PNG', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF8', 'image/gif'),
+)
+
+
+def _opens_json(text: str) -> Optional[bool]:
+    """
+    Whether the start of an answer is a JSON object or array.
+    
+    A leading ```json fence is skipped (see summarizer.strip_markdown_json).
+    
+    Returns:
+        None while too little has arrived to tell
+    """
+    head = text.lstrip()
+    if head.startswith('```'):
+        newline = head.find('\n')
+        if newline < 0:
+            return None
+        head = head[newline:].lstrip()
+    elif '```'.startswith(head):
+        return None
+    if not head:
+        return None
+    return head[0] in '{['
+
+
+def _image_media_type(head: bytes) -> str:
+    """Detect an image's media type from its first bytes (default: PNG)."""
+    for signature, media_type in _IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return media_type
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'image/png'
+
 
 class ClaudeClient:
     """
@@ -43,24 +165,65 @@ class ClaudeClient:
         # Text call
         response = client.call(messages=[...])
         
-        # Vision call
+        # Vision call (raw bytes or a base64 string)
         response = client.call_vision(
-            image_data=base64_encoded_image,
+            image_data=png_bytes,
             prompt="Analyze this chart"
         )
     """
     
+    # Fixed attribute set: attribute access in the per-call bookkeeping
+    # is a slot lookup instead of an instance-dict lookup
+    __slots__ = (
+        'api_key', 'client', '_async_clients', '_next_vision_start',
+        'model', 'max_tokens',
+        '_input_rate', '_output_rate', '_cache_write_rate', '_cache_read_rate',
+        'total_input_tokens', 'total_output_tokens',
+        'total_cache_write_tokens', 'total_cache_read_tokens',
+        'text_calls', 'vision_calls', 'cache_hits', 'image_bytes_saved',
+        'batch_savings', 'aborted_calls', 'cache', '_lock', '_detail_level'
+    )
+    
     # Pricing (as of December 2024)
     INPUT_COST_PER_1M = 3.00    # $3 per million input tokens
     OUTPUT_COST_PER_1M = 15.00  # $15 per million output tokens
+    CACHE_WRITE_COST_PER_1M = 3.75  # Prompt cache writes: 1.25x input rate
+    CACHE_READ_COST_PER_1M = 0.30   # Prompt cache reads: 0.1x input rate
+    BATCH_DISCOUNT = 0.5            # Message Batches API: every token at half price
+    
+    # How often call_batch() checks whether a submitted batch has ended
+    BATCH_POLL_SECONDS = 10.0
+    
+    # Minimum gap between the starts of concurrent async Vision calls, so a
+    # burst of images reaches the API as a steady stream (fewer 429s)
+    VISION_STAGGER_SECONDS = 0.15
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Retries of transient API failures (rate limits, overload, timeouts,
+    # dropped connections): exponential backoff with jitter, or the
+    # server's Retry-After when it sends one. Other errors fail at once.
+    MAX_ATTEMPTS = 5
+    RETRY_INITIAL_SECONDS = 1.0
+    RETRY_MAX_SECONDS = 60.0
+    
+    def __init__(self,
+                 api_key: Optional[str] = None,
+                 cache: bool = False,
+                 cache_path: Optional[str] = None,
+                 verbose: bool = False):
         """
         Initialize Claude API client.
         
         Args:
             api_key: Anthropic API key (or use CLAUDE_API_KEY env variable)
+            cache: Reuse stored responses for identical requests (see response_cache.py)
+            cache_path: SQLite file for the response cache
+                (default: ~/.cache/ecolens/papers/responses.sqlite3)
+            verbose: Log this client's per-call details (call start, prompt
+                cache tokens) at INFO instead of DEBUG
         """
+        # Per instance: other clients and the logger's level are left alone
+        self._detail_level = logging.INFO if verbose else logging.DEBUG
+        
         self.api_key = api_key or os.getenv('CLAUDE_API_KEY')
         
         if not self.api_key:
@@ -69,22 +232,51 @@ class ClaudeClient:
                 "Set CLAUDE_API_KEY environment variable"
             )
         
-        self.client = Anthropic(api_key=self.api_key)
+        # SDK client and response cache are shared between instances (cheap
+        # repeat construction when analyzing many papers); the cost
+        # counters below stay per instance
+        self.client = _get_anthropic(self.api_key)
+        
+        # Async clients for acall_vision(), one per event loop (created on first use)
+        self._async_clients = weakref.WeakKeyDictionary()
+        
+        # Earliest start time (time.monotonic()) of the next async Vision call
+        self._next_vision_start = 0.0
+        
         self.model = "claude-sonnet-4-20250514"
         self.max_tokens = 4000
         
+        # Per-token prices (the class constants are per million tokens)
+        self._input_rate = self.INPUT_COST_PER_1M / 1_000_000
+        self._output_rate = self.OUTPUT_COST_PER_1M / 1_000_000
+        self._cache_write_rate = self.CACHE_WRITE_COST_PER_1M / 1_000_000
+        self._cache_read_rate = self.CACHE_READ_COST_PER_1M / 1_000_000
+        
         # Cost tracking
         self.total_input_tokens = 0
         self.total_output_tokens = 0
+        self.total_cache_write_tokens = 0
+        self.total_cache_read_tokens = 0
         self.text_calls = 0
         self.vision_calls = 0
+        self.cache_hits = 0
+        self.image_bytes_saved = 0
+        self.batch_savings = 0.0  # USD saved by the batch discount
+        self.aborted_calls = 0  # streamed JSON calls cancelled (see call_json)
+        
+        # Response cache (identical requests skip the API entirely)
+        self.cache = _get_response_cache(cache_path) if cache else None
+        
+        # Guards the counters when calls finish on several threads / tasks
+        self._lock = threading.Lock()
         
-        print(f"✅ Claude API client initialized (with Vision support)")
+        log.info("✅ Claude API client initialized (with Vision support)")
     
     def call(self, 
             messages: List[Dict],
             system: Optional[str] = None,
-            temperature: float = 1.0) -> Dict:
+            temperature: float = 1.0,
+            cache_system: bool = False) -> Dict:
         """
         Make a standard text-only API call.
         
@@ -94,66 +286,225 @@ class ClaudeClient:
             messages: List of message dicts [{'role': 'user', 'content': '...'}]
             system: Optional system prompt
             temperature: Sampling temperature (0-1)
+            cache_system: Mark the system prompt for Anthropic prompt caching.
+                Use it for static instructions sent on many calls; repeats
+                are billed at CACHE_READ_COST_PER_1M instead of the input rate.
             
         Returns:
             {
                 'content': "Claude's response",
-                'usage': {'input_tokens': ..., 'output_tokens': ...}
+                'stop_reason': 'end_turn' (or 'max_tokens' if cut off),
+                'usage': {'input_tokens': ..., 'output_tokens': ...,
+                          'cache_creation_input_tokens': ..., 'cache_read_input_tokens': ...}
             }
         """
         try:
-            params = {
-                'model': self.model,
-                'max_tokens': self.max_tokens,
-                'messages': messages,
-                'temperature': temperature
-            }
+            cache_key = self._text_cache_key(messages, temperature, system)
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                return cached
             
-            if system:
-                params['system'] = system
+            log.log(self._detail_level, "🤖 Calling Claude API (text)...")
             
-            print(f"🤖 Calling Claude API (text)...")
+            response = self._create(
+                self._text_params(messages, temperature, system, cache_system)
+            )
             
-            response = self.client.messages.create(**params)
+            return self._store_response(cache_key, self._record_response(response, vision=False))
             
-            # Track usage
-            input_tokens = response.usage.input_tokens
-            output_tokens = response.usage.output_tokens
-            self.total_input_tokens += input_tokens
-            self.total_output_tokens += output_tokens
-            self.text_calls += 1
+        except Exception as e:
+            log.error("❌ Claude API error: %s", e)
+            raise Exception(f"Claude API call failed: {e}")
+    
+    async def acall(self,
+                    messages: List[Dict],
+                    system: Optional[str] = None,
+                    temperature: float = 1.0,
+                    cache_system: bool = False) -> Dict:
+        """
+        Async version of call().
+        
+        Lets independent text calls (e.g. one per paper section) wait on
+        the API together (see PaperSummarizer.asummarize_sections).
+        
+        Args:
+            messages: List of message dicts [{'role': 'user', 'content': '...'}]
+            system: Optional system prompt
+            temperature: Sampling temperature (0-1)
+            cache_system: Mark the system prompt for Anthropic prompt caching
             
-            content = response.content[0].text
+        Returns:
+            Same as call()
+        """
+        try:
+            cache_key = self._text_cache_key(messages, temperature, system)
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                return cached
             
-            print(f"✅ API call successful")
-            print(f"   Input: {input_tokens} tokens, Output: {output_tokens} tokens")
-            print(f"   Cost: ${self._calculate_call_cost(input_tokens, output_tokens):.4f}")
+            log.log(self._detail_level, "🤖 Calling Claude API (text, async)...")
             
-            return {
-                'content': content,
-                'usage': {
-                    'input_tokens': input_tokens,
-                    'output_tokens': output_tokens
-                }
-            }
+            response = await self._acreate(
+                self._text_params(messages, temperature, system, cache_system)
+            )
+            
+            return self._store_response(cache_key, self._record_response(response, vision=False))
+            
+        except Exception as e:
+            log.error("❌ Claude API error: %s", e)
+            raise Exception(f"Claude API call failed: {e}")
+    
+    def call_json(self,
+                  messages: List[Dict],
+                  system: Optional[str] = None,
+                  temperature: float = 1.0,
+                  cache_system: bool = False) -> Dict:
+        """
+        Make a text call whose answer should be a JSON object.
+        
+        Same as call(), but the response is streamed and the request is
+        cancelled as soon as the answer starts with something other than
+        JSON (e.g. "I'm sorry..." or "Here is..."), instead of paying for
+        an answer the caller would fail to parse.
+        
+        Args:
+            Same as call()
+            
+        Returns:
+            Same as call()
+        """
+        try:
+            cache_key = self._text_cache_key(messages, temperature, system)
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                return cached
+            
+            log.log(self._detail_level, "🤖 Calling Claude API (text, streamed JSON)...")
+            
+            response = self._stream_json(
+                self._text_params(messages, temperature, system, cache_system)
+            )
+            
+            return self._store_response(cache_key, self._record_response(response, vision=False))
             
         except Exception as e:
-            print(f"❌ Claude API error: {e}")
+            log.error("❌ Claude API error: %s", e)
             raise Exception(f"Claude API call failed: {e}")
     
+    async def acall_json(self,
+                         messages: List[Dict],
+                         system: Optional[str] = None,
+                         temperature: float = 1.0,
+                         cache_system: bool = False) -> Dict:
+        """
+        Async version of call_json().
+        
+        Args:
+            Same as call()
+            
+        Returns:
+            Same as call()
+        """
+        try:
+            cache_key = self._text_cache_key(messages, temperature, system)
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                return cached
+            
+            log.log(self._detail_level, "🤖 Calling Claude API (text, streamed JSON, async)...")
+            
+            response = await self._astream_json(
+                self._text_params(messages, temperature, system, cache_system)
+            )
+            
+            return self._store_response(cache_key, self._record_response(response, vision=False))
+            
+        except Exception as e:
+            log.error("❌ Claude API error: %s", e)
+            raise Exception(f"Claude API call failed: {e}")
+    
+    def call_batch(self,
+                   requests: List[Dict],
+                   poll_seconds: float = BATCH_POLL_SECONDS) -> Dict[str, Dict]:
+        """
+        Run text calls through the Message Batches API.
+        
+        Batched calls cost half as much, but Anthropic processes them in
+        the background: this blocks until the batch has ended (usually
+        minutes, at most 24 hours), so it suits offline analysis only.
+        Requests with a cached response aren't submitted.
+        
+        Args:
+            requests: [{'custom_id': 'section-1', 'messages': [...],
+                        'system': ..., 'temperature': ..., 'cache_system': ...}]
+                (unique custom_ids; system, temperature and cache_system
+                are optional, with the same defaults as call())
+            poll_seconds: How often to check whether the batch has ended
+        
+        Returns:
+            {custom_id: result dict, same as call()} - requests that errored
+            or expired inside the batch are missing
+        """
+        results = {}
+        pending = {}  # custom_id -> (cache key, messages.create() arguments)
+        
+        for request in requests:
+            temperature = request.get('temperature', 1.0)
+            system = request.get('system')
+            cache_key = self._text_cache_key(request['messages'], temperature, system)
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                results[request['custom_id']] = cached
+                continue
+            pending[request['custom_id']] = (cache_key, self._text_params(
+                request['messages'], temperature, system, request.get('cache_system', False)
+            ))
+        
+        if not pending:
+            return results
+        
+        batches = self.client.messages.batches
+        batch = batches.create(requests=[
+            {'custom_id': custom_id, 'params': params}
+            for custom_id, (_, params) in pending.items()
+        ])
+        log.info("📦 Submitted message batch %s (%d requests)", batch.id, len(pending))
+        
+        while batch.processing_status != 'ended':
+            time.sleep(poll_seconds)
+            batch = batches.retrieve(batch.id)
+            log.log(self._detail_level, "   Batch %s: %d processing, %d succeeded",
+                    batch.id, batch.request_counts.processing, batch.request_counts.succeeded)
+        
+        for entry in batches.results(batch.id):
+            if entry.result.type != 'succeeded':
+                log.warning("⚠️  Batch request %s %s", entry.custom_id, entry.result.type)
+                continue
+            cache_key, _ = pending[entry.custom_id]
+            results[entry.custom_id] = self._store_response(
+                cache_key, self._record_response(entry.result.message, vision=False, batch=True)
+            )
+        
+        return results
+    
     def call_vision(self,
-                   image_data: str,
+                   image_data: Union[bytes, str],
                    prompt: str,
-                   temperature: float = 0.5) -> Dict:
+                   temperature: float = 0.5,
+                   system: Optional[str] = None,
+                   cache_system: bool = False) -> Dict:
         """
         Make a Vision API call to analyze an image.
         
         NEW METHOD for Feature 2!
         
         Args:
-            image_data: Base64-encoded image string
+            image_data: Raw image bytes (PNG/JPEG/GIF/WebP), or a base64-encoded
+                string. Bytes are base64-encoded once, just before sending.
             prompt: What to ask Claude about the image
             temperature: Sampling temperature (default 0.5 for analysis)
+            system: Optional system prompt (instructions shared by every image)
+            cache_system: Mark the system prompt for Anthropic prompt caching
             
         Returns:
             {
@@ -168,66 +519,539 @@ class ClaudeClient:
             )
         """
         try:
-            # Build message with image
-            messages = [
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": "image/png",  # or "image/jpeg"
-                                "data": image_data
-                            }
-                        },
-                        {
-                            "type": "text",
-                            "text": prompt
-                        }
-                    ]
-                }
-            ]
+            cache_key = self._vision_cache_key(image_data, prompt, temperature, system)
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                return cached
             
-            print(f"👁️  Calling Claude Vision API...")
+            log.log(self._detail_level, "👁️  Calling Claude Vision API...")
             
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                messages=messages,
-                temperature=temperature
+            response = self._create(
+                self._vision_params(image_data, prompt, temperature, system, cache_system)
             )
             
-            # Track usage
-            input_tokens = response.usage.input_tokens
-            output_tokens = response.usage.output_tokens
-            self.total_input_tokens += input_tokens
-            self.total_output_tokens += output_tokens
-            self.vision_calls += 1
+            return self._store_response(cache_key, self._record_response(response, vision=True))
             
-            content = response.content[0].text
+        except Exception as e:
+            log.error("❌ Claude Vision API error: %s", e)
+            raise Exception(f"Vision API call failed: {e}")
+    
+    async def acall_vision(self,
+                           image_data: Union[bytes, str],
+                           prompt: str,
+                           temperature: float = 0.5,
+                           system: Optional[str] = None,
+                           cache_system: bool = False) -> Dict:
+        """
+        Async version of call_vision().
+        
+        Vision calls spend almost all their time waiting on the API, so
+        running several with asyncio.gather() overlaps that wait instead
+        of paying it once per image (see VisionAnalyzer.aanalyze_multiple).
+        
+        Args:
+            image_data: Raw image bytes (PNG/JPEG/GIF/WebP), or a base64-encoded
+                string. Bytes are base64-encoded once, just before sending.
+            prompt: What to ask Claude about the image
+            temperature: Sampling temperature (default 0.5 for analysis)
+            system: Optional system prompt (instructions shared by every image)
+            cache_system: Mark the system prompt for Anthropic prompt caching
             
-            print(f"✅ Vision API call successful")
-            print(f"   Input: {input_tokens} tokens, Output: {output_tokens} tokens")
-            print(f"   Cost: ${self._calculate_call_cost(input_tokens, output_tokens):.4f}")
+        Returns:
+            Same as call_vision()
+        """
+        try:
+            cache_key = self._vision_cache_key(image_data, prompt, temperature, system)
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                return cached
             
-            return {
-                'content': content,
-                'usage': {
-                    'input_tokens': input_tokens,
-                    'output_tokens': output_tokens
-                }
+            await self._stagger_vision_start()
+            log.log(self._detail_level, "👁️  Calling Claude Vision API (async)...")
+            
+            response = await self._acreate(
+                self._vision_params(image_data, prompt, temperature, system, cache_system)
+            )
+            
+            return self._store_response(cache_key, self._record_response(response, vision=True))
+            
+        except Exception as e:
+            log.error("❌ Claude Vision API error: %s", e)
+            raise Exception(f"Vision API call failed: {e}")
+    
+    async def acall_vision_multi(self,
+                                 images: List[Tuple[Union[bytes, str], str]],
+                                 temperature: float = 0.5,
+                                 system: Optional[str] = None,
+                                 cache_system: bool = False) -> Dict:
+        """
+        Vision call about several images at once.
+        
+        One request instead of one per image: the system prompt and the
+        round trip are paid once for the group (see
+        VisionAnalyzer.aanalyze_multiple).
+        
+        Args:
+            images: (image_data, prompt) pairs; each prompt is placed just
+                before its image (e.g. "Image 2" and its caption)
+            temperature: Sampling temperature (default 0.5 for analysis)
+            system: Optional system prompt (asking for one answer per image)
+            cache_system: Mark the system prompt for Anthropic prompt caching
+            
+        Returns:
+            Same as call_vision()
+        """
+        try:
+            cache_key = self._vision_multi_cache_key(images, temperature, system)
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                return cached
+            
+            await self._stagger_vision_start()
+            log.log(self._detail_level, "👁️  Calling Claude Vision API (%d images, async)...",
+                    len(images))
+            
+            params = {
+                'model': self.model,
+                'max_tokens': self.max_tokens,
+                'messages': self._vision_multi_messages(images),
+                'temperature': temperature
             }
+            if system:
+                params['system'] = self._system_param(system, cache_system)
+            response = await self._acreate(params)
+            
+            return self._store_response(cache_key, self._record_response(response, vision=True))
             
         except Exception as e:
-            print(f"❌ Claude Vision API error: {e}")
+            log.error("❌ Claude Vision API error: %s", e)
             raise Exception(f"Vision API call failed: {e}")
     
-    def _calculate_call_cost(self, input_tokens: int, output_tokens: int) -> float:
+    def _create(self, params: Dict):
+        """messages.create() with retries of transient failures"""
+        attempt = 1
+        while True:
+            try:
+                return self.client.messages.create(**params)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+    
+    async def _acreate(self, params: Dict):
+        """Async messages.create() with retries of transient failures"""
+        attempt = 1
+        while True:
+            try:
+                return await self._async_client().messages.create(**params)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+    
+    def _stream_json(self, params: Dict):
+        """
+        messages.stream() that gives up once the answer isn't JSON.
+        
+        Retries transient failures like _create().
+        
+        Returns:
+            The final Anthropic Message
+        """
+        attempt = 1
+        while True:
+            try:
+                with self.client.messages.stream(**params) as stream:
+                    text = ''
+                    for chunk in stream.text_stream:
+                        if text is not None:
+                            text += chunk
+                            opens_json = _opens_json(text)
+                            if opens_json is False:
+                                self._abort_stream(stream.current_message_snapshot, text)
+                            if opens_json:
+                                text = None  # the rest needs no checking
+                    return stream.get_final_message()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+    
+    async def _astream_json(self, params: Dict):
+        """Async _stream_json()"""
+        attempt = 1
+        while True:
+            try:
+                async with self._async_client().messages.stream(**params) as stream:
+                    text = ''
+                    async for chunk in stream.text_stream:
+                        if text is not None:
+                            text += chunk
+                            opens_json = _opens_json(text)
+                            if opens_json is False:
+                                self._abort_stream(stream.current_message_snapshot, text)
+                            if opens_json:
+                                text = None
+                    return await stream.get_final_message()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+    
+    def _abort_stream(self, snapshot, text: str):
+        """
+        Count a cancelled non-JSON answer and raise.
+        
+        Leaving the stream's context closes the connection, which stops
+        generation. Output tokens are only reported at the end of a
+        message, so the snapshot undercounts them.
+        """
+        with self._lock:
+            self.aborted_calls += 1
+        self._record_response(snapshot, vision=False)
+        raise ValueError(f"Answer is not JSON, cancelled after {len(text)} chars: {text[:100]!r}")
+    
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """
+        Seconds to wait before retrying a failed call (None = don't retry).
+        
+        Args:
+            error: Exception raised by messages.create()
+            attempt: Number of the attempt that failed (starting at 1)
+        """
+        from anthropic import APIConnectionError, APIStatusError
+        
+        # Timeouts (408), lock conflicts (409), rate limits (429), 5xx and
+        # overloaded (529) responses, and dropped connections are transient
+        # (the statuses the SDK's own retries cover); 400/401/403/404 would
+        # fail the same way again. Checked by status code: OverloadedError
+        # is not an InternalServerError subclass.
+        if isinstance(error, APIStatusError):
+            status = error.status_code
+            transient = status in (408, 409, 429) or status >= 500
+        else:
+            transient = isinstance(error, APIConnectionError)
+        if not transient or attempt >= self.MAX_ATTEMPTS:
+            return None
+        
+        delay = min(self.RETRY_MAX_SECONDS, self.RETRY_INITIAL_SECONDS * 2 ** (attempt - 1))
+        delay += random.uniform(0, delay / 2)  # jitter, so retries don't line up again
+        
+        if isinstance(error, APIStatusError):
+            try:
+                retry_after = float(error.response.headers.get('retry-after', ''))
+                delay = min(self.RETRY_MAX_SECONDS, max(0.0, retry_after))
+            except ValueError:
+                pass
+        
+        log.warning("⏳ %s (attempt %d/%d), retrying in %.1fs",
+                    type(error).__name__, attempt, self.MAX_ATTEMPTS, delay)
+        return delay
+    
+    async def _stagger_vision_start(self):
+        """
+        Wait for this call's start slot.
+        
+        Each call books the next slot VISION_STAGGER_SECONDS after the
+        previous one before awaiting, so concurrent calls (even the ones
+        released together by a semaphore) start one after another.
+        """
+        now = time.monotonic()
+        start = max(now, self._next_vision_start)
+        self._next_vision_start = start + self.VISION_STAGGER_SECONDS
+        if start > now:
+            await asyncio.sleep(start - now)
+    
+    def _async_client(self) -> 'AsyncAnthropic':
+        """
+        AsyncAnthropic client for the running event loop.
+        
+        All async calls (acall, acall_vision) in a loop share one client, and so one keep-alive
+        connection pool. Connections belong to the loop that opened them,
+        and every asyncio.run() starts a new loop, so each loop gets its own.
+        """
+        loop = asyncio.get_running_loop()
+        aclient = self._async_clients.get(loop)
+        if aclient is None:
+            from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+            aclient = AsyncAnthropic(
+                api_key=self.api_key,
+                http_client=DefaultAsyncHttpxClient(limits=HTTP_LIMITS),
+                max_retries=0  # retries are done by ClaudeClient (see _retry_delay)
+            )
+            self._async_clients[loop] = aclient
+        return aclient
+    
+    async def aclose(self):
+        """
+        Close the running event loop's async connection pool.
+        
+        Call it before the loop ends (e.g. at the end of the coroutine
+        passed to asyncio.run()).
+        """
+        aclient = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if aclient is not None:
+            await aclient.close()
+    
+    @staticmethod
+    def close():
+        """Close the process-wide sync connection pool (e.g. at shutdown)."""
+        with _HTTP_LOCK:
+            if _HTTP_CLIENT is not None:
+                _HTTP_CLIENT.close()
+        # Cached SDK clients hold the closed pool; later ones get a new pool
+        _get_anthropic.cache_clear()
+    
+    def _text_cache_key(self,
+                        messages: List[Dict],
+                        temperature: float,
+                        system: Optional[str]) -> Optional[str]:
+        """Response cache key of a text call (None if caching is off)"""
+        if self.cache is None:
+            return None
+        return ResponseCache.make_key(self.model, system, messages, temperature)
+    
+    def _vision_cache_key(self,
+                          image_data: Union[bytes, str],
+                          prompt: str,
+                          temperature: float,
+                          system: Optional[str]) -> Optional[str]:
+        """Response cache key of a Vision call (None if caching is off)"""
+        if self.cache is None:
+            return None
+        # Hash the (large) image separately instead of embedding it in the key payload
+        if isinstance(image_data, str):
+            image_data = image_data.encode('ascii')
+        image_hash = hashlib.sha256(image_data).hexdigest()
+        return ResponseCache.make_key(self.model, system, image_hash, prompt, temperature)
+    
+    def _vision_multi_cache_key(self,
+                                images: List[Tuple[Union[bytes, str], str]],
+                                temperature: float,
+                                system: Optional[str]) -> Optional[str]:
+        """Response cache key of a multi-image Vision call (None if caching is off)"""
+        if self.cache is None:
+            return None
+        parts = [
+            [hashlib.sha256(image_data.encode('ascii') if isinstance(image_data, str)
+                            else image_data).hexdigest(), prompt]
+            for image_data, prompt in images
+        ]
+        return ResponseCache.make_key(self.model, system, parts, temperature)
+    
+    def _cached_response(self, cache_key: Optional[str]) -> Optional[Dict]:
+        """Return the stored response for cache_key, or None on a miss"""
+        if cache_key is None:
+            return None
+        
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            return None
+        
+        with self._lock:
+            self.cache_hits += 1
+        log.info("♻️  Using cached Claude response")
+        return {**cached, 'cached': True}
+    
+    def _store_response(self, cache_key: Optional[str], result: Dict) -> Dict:
+        """
+        Store a fresh response in the cache (if enabled) and return it.
+        
+        Only complete answers are stored: one cut off at max_tokens (or
+        otherwise not ended by the model) would be replayed on every
+        rerun, with no way to retry it.
+        """
+        if cache_key is not None and result.get('stop_reason') == 'end_turn':
+            self.cache.put(cache_key, result)
+        return result
+    
+    @staticmethod
+    def _system_param(system: str, cache_system: bool):
+        """
+        System prompt as sent to the API.
+        
+        With cache_system, it becomes a single text block marked
+        cache_control 'ephemeral', so Anthropic caches it (for ~5 minutes)
+        and later calls read it at 10% of the input price. Prompts shorter
+        than the model's minimum cacheable length (1024 tokens for Sonnet)
+        are simply not cached; the marker costs nothing.
+        """
+        if not cache_system:
+            return system
+        return [{
+            'type': 'text',
+            'text': system,
+            'cache_control': {'type': 'ephemeral'}
+        }]
+    
+    def _text_params(self,
+                     messages: List[Dict],
+                     temperature: float,
+                     system: Optional[str],
+                     cache_system: bool) -> Dict:
+        """Build messages.create() arguments for a text call"""
+        params = {
+            'model': self.model,
+            'max_tokens': self.max_tokens,
+            'messages': messages,
+            'temperature': temperature
+        }
+        if system:
+            params['system'] = self._system_param(system, cache_system)
+        return params
+    
+    def _vision_params(self,
+                       image_data: Union[bytes, str],
+                       prompt: str,
+                       temperature: float,
+                       system: Optional[str],
+                       cache_system: bool) -> Dict:
+        """Build messages.create() arguments for a Vision call"""
+        params = {
+            'model': self.model,
+            'max_tokens': self.max_tokens,
+            'messages': self._vision_messages(image_data, prompt),
+            'temperature': temperature
+        }
+        if system:
+            params['system'] = self._system_param(system, cache_system)
+        return params
+    
+    @staticmethod
+    def _image_source(image_data: Union[bytes, str]) -> Dict:
+        """
+        Build the base64 image source block.
+        
+        The API only takes inline images as base64, so raw bytes are
+        encoded here, once per request.
+        """
+        if isinstance(image_data, str):
+            # 8 base64 characters decode to the 6 bytes needed for detection
+            try:
+                head = base64.b64decode(image_data[:8])
+            except (binascii.Error, ValueError):
+                head = b''
+            data = image_data
+        else:
+            head = bytes(image_data[:12])
+            data = _b64encode(image_data)
+        
+        return {
+            "type": "base64",
+            "media_type": _image_media_type(head),
+            "data": data
+        }
+    
+    @classmethod
+    def _vision_messages(cls, image_data: Union[bytes, str], prompt: str) -> List[Dict]:
+        """Build the user message holding one image and the prompt"""
+        return [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image",
+                        "source": cls._image_source(image_data)
+                    },
+                    {
+                        "type": "text",
+                        "text": prompt
+                    }
+                ]
+            }
+        ]
+    
+    @classmethod
+    def _vision_multi_messages(cls, images: List[Tuple[Union[bytes, str], str]]) -> List[Dict]:
+        """Build the user message holding several images, each after its prompt"""
+        content = []
+        for image_data, prompt in images:
+            content.append({"type": "text", "text": prompt})
+            content.append({"type": "image", "source": cls._image_source(image_data)})
+        return [{"role": "user", "content": content}]
+    
+    def _record_response(self, response, vision: bool, batch: bool = False) -> Dict:
+        """
+        Track token usage of a finished call and build the result dict.
+        
+        Args:
+            response: Anthropic Message
+            vision: True for Vision calls, False for text calls
+            batch: The call ran in a message batch (billed at BATCH_DISCOUNT)
+        
+        Returns:
+            {'content': ..., 'stop_reason': ...,
+             'usage': {'input_tokens': ..., 'output_tokens': ...,
+                       'cache_creation_input_tokens': ..., 'cache_read_input_tokens': ...}}
+        """
+        input_tokens = response.usage.input_tokens
+        output_tokens = response.usage.output_tokens
+        # Prompt cache tokens are reported separately from input_tokens
+        cache_write_tokens = getattr(response.usage, 'cache_creation_input_tokens', None) or 0
+        cache_read_tokens = getattr(response.usage, 'cache_read_input_tokens', None) or 0
+        
+        saved = 0.0
+        if batch:
+            saved = (1 - self.BATCH_DISCOUNT) * self._calculate_call_cost(
+                input_tokens, output_tokens, cache_write_tokens, cache_read_tokens)
+        
+        with self._lock:
+            self.batch_savings += saved
+            self.total_input_tokens += input_tokens
+            self.total_output_tokens += output_tokens
+            self.total_cache_write_tokens += cache_write_tokens
+            self.total_cache_read_tokens += cache_read_tokens
+            if vision:
+                self.vision_calls += 1
+            else:
+                self.text_calls += 1
+        
+        # One summary line per call; the breakdown only at DEBUG level
+        if log.isEnabledFor(logging.INFO):
+            log.info("%s Claude call: %d input / %d output tokens, $%.4f",
+                     "👁️ " if vision else "🤖", input_tokens, output_tokens,
+                     self._calculate_call_cost(input_tokens, output_tokens,
+                                               cache_write_tokens, cache_read_tokens) - saved)
+            if cache_write_tokens or cache_read_tokens:
+                log.log(self._detail_level, "   Prompt cache: %d written, %d read",
+                        cache_write_tokens, cache_read_tokens)
+        
+        return {
+            'content': response.content[0].text,
+            'stop_reason': getattr(response, 'stop_reason', None),
+            'usage': {
+                'input_tokens': input_tokens,
+                'output_tokens': output_tokens,
+                'cache_creation_input_tokens': cache_write_tokens,
+                'cache_read_input_tokens': cache_read_tokens
+            }
+        }
+    
+    def record_image_bytes_saved(self, saved: int):
+        """Count bytes removed from an image before a Vision call (see VisionAnalyzer.prepare_image)"""
+        with self._lock:
+            self.image_bytes_saved += saved
+    
+    def _calculate_call_cost(self,
+                             input_tokens: int,
+                             output_tokens: int,
+                             cache_write_tokens: int = 0,
+                             cache_read_tokens: int = 0) -> float:
         """Calculate cost of a single API call"""
-        input_cost = (input_tokens / 1_000_000) * self.INPUT_COST_PER_1M
-        output_cost = (output_tokens / 1_000_000) * self.OUTPUT_COST_PER_1M
-        return input_cost + output_cost
+        return (
+            input_tokens * self._input_rate
+            + output_tokens * self._output_rate
+            + cache_write_tokens * self._cache_write_rate
+            + cache_read_tokens * self._cache_read_rate
+        )
     
     def get_cost_estimate(self) -> Dict:
         """
@@ -235,18 +1059,29 @@ class ClaudeClient:
         
         Enhanced to show text vs vision breakdown.
         """
-        input_cost = (self.total_input_tokens / 1_000_000) * self.INPUT_COST_PER_1M
-        output_cost = (self.total_output_tokens / 1_000_000) * self.OUTPUT_COST_PER_1M
-        total_cost = input_cost + output_cost
+        input_cost = self.total_input_tokens * self._input_rate
+        output_cost = self.total_output_tokens * self._output_rate
+        cache_cost = (
+            self.total_cache_write_tokens * self._cache_write_rate
+            + self.total_cache_read_tokens * self._cache_read_rate
+        )
+        total_cost = input_cost + output_cost + cache_cost - self.batch_savings
         
         return {
             'total_calls': self.text_calls + self.vision_calls,
             'text_calls': self.text_calls,
             'vision_calls': self.vision_calls,
+            'cache_hits': self.cache_hits,
+            'aborted_calls': self.aborted_calls,
+            'image_bytes_saved': self.image_bytes_saved,
             'total_input_tokens': self.total_input_tokens,
             'total_output_tokens': self.total_output_tokens,
+            'total_cache_write_tokens': self.total_cache_write_tokens,
+            'total_cache_read_tokens': self.total_cache_read_tokens,
             'input_cost_usd': round(input_cost, 4),
             'output_cost_usd': round(output_cost, 4),
+            'cache_cost_usd': round(cache_cost, 4),
+            'batch_discount_usd': round(self.batch_savings, 4),
             'total_cost_usd': round(total_cost, 4)
         }
     
@@ -254,9 +1089,15 @@ class ClaudeClient:
         """Reset cost tracking counters"""
         self.total_input_tokens = 0
         self.total_output_tokens = 0
+        self.total_cache_write_tokens = 0
+        self.total_cache_read_tokens = 0
         self.text_calls = 0
         self.vision_calls = 0
-        print("🔄 Cost tracking reset")
+        self.cache_hits = 0
+        self.image_bytes_saved = 0
+        self.batch_savings = 0.0
+        self.aborted_calls = 0
+        log.info("🔄 Cost tracking reset")
 
 
 # Example usage / testing
@@ -266,6 +1107,8 @@ if __name__ == "__main__":
     """
     import json
     
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     try:
         client = ClaudeClient()
         
@@ -0,0 +1,144 @@
+"""
+PDF Extraction Cache
+====================
+Disk cache of extracted PDF content, so re-analyzing an unchanged paper
+(e.g. after tweaking prompts) skips PDF parsing and page rendering.
+
+This module:
+1. Keys each PDF by a SHA-256 of its bytes (renamed/copied files still hit)
+2. Stores the extracted text as JSON (page texts, metadata)
+3. Stores page images (PNG renders or embedded JPEG/PNG figures) as
+   files next to it, named after the render settings that produced them
+
+Layout:
+    ~/.cache/ecolens/papers/extracted/<sha256>/content.json
+    ~/.cache/ecolens/papers/extracted/<sha256>/page-12-<render settings>.img
+
+Used by: analyze_papers.py
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+from pathlib import Path
+from io import BytesIO
+from typing import Dict, Optional
+
+from PIL import Image
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "ecolens" / "papers" / "extracted"
+
+# Extracted fields worth keeping (images are stored as separate files)
+# (the joined full text isn't stored, it's "\n\n".join(page_texts))
+CACHED_FIELDS = ('pages', 'page_texts', 'metadata')
+
+
+class PDFCache:
+    """
+    File-backed cache of PDFProcessor output.
+
+    Usage:
+        cache = PDFCache()
+        key = PDFCache.file_key("paper.pdf")
+
+        content = cache.get(key)
+        if content is None:
+            content = processor.extract("paper.pdf", extract_images=False)
+            cache.put(key, content)
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Args:
+            cache_dir: Where cache entries go (default: ~/.cache/ecolens/papers/extracted/)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+
+    @staticmethod
+    def file_key(pdf_path: str) -> str:
+        """
+        SHA-256 of the PDF's bytes.
+        
+        The file is memory-mapped and hashed in one call (no read buffers;
+        hashlib releases the GIL while it works).
+        """
+        with open(pdf_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return hashlib.sha256().hexdigest()  # empty files can't be mapped
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return hashlib.sha256(mm).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up extracted text.
+
+        Args:
+            key: Key from file_key()
+
+        Returns:
+            {'pages': ..., 'page_texts': [...], 'metadata': {...}}
+            ('metadata' may be missing), or None on a miss
+        """
+        try:
+            with open(self.cache_dir / key / "content.json", 'rb') as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, content: Dict) -> None:
+        """
+        Store extracted text (the CACHED_FIELDS of content).
+
+        Args:
+            key: Key from file_key()
+            content: PDFProcessor.extract()-style dict
+        """
+        data = {field: content[field] for field in CACHED_FIELDS if field in content}
+        self._write(key, "content.json", json.dumps(data).encode('utf-8'))
+
+    def get_page_image(self, key: str, page_num: int, settings: str) -> Optional[Dict]:
+        """
+        Rendered page, or None if it isn't cached.
+
+        Args:
+            key: Key from file_key()
+            page_num: Page number (starting at 1)
+            settings: PDFProcessor.render_settings() of the wanted render
+
+        Returns:
+            Image dict, same shape as PDFProcessor.render_page()
+        """
+        try:
+            image_bytes = (self.cache_dir / key / f"page-{page_num}-{settings}.img").read_bytes()
+            # Only the header is parsed, the pixels aren't decoded
+            with Image.open(BytesIO(image_bytes)) as image:
+                width, height = image.size
+        except OSError:
+            return None
+
+        return {
+            'page': page_num,
+            'image_bytes': image_bytes,
+            'width': width,
+            'height': height,
+            'caption': f"Page {page_num}"
+        }
+
+    def put_page_image(self, key: str, image: Dict, settings: str) -> None:
+        """Store a page image (a PDFProcessor.render_page() dict rendered with settings)"""
+        self._write(key, f"page-{image['page']}-{settings}.img", image['image_bytes'])
+
+    def _write(self, key: str, name: str, data: bytes) -> None:
+        """Write a cache file atomically (readers never see a partial file)"""
+        entry_dir = self.cache_dir / key
+        tmp_path = entry_dir / f".{name}.{os.getpid()}.tmp"
+        try:
+            entry_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, entry_dir / name)
+        except OSError as e:
+            log.warning("⚠️  Could not write PDF cache file %s: %s", name, e)
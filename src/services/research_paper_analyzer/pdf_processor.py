@@ -8,23 +8,131 @@ This module:
 2. Extracts all text content
 3. Extracts images (charts, graphs, diagrams)
 4. Detects document structure (sections, headings)
-5. Converts images to base64 for Vision API
+5. Renders figure pages to PNG bytes for the Vision API
 
 Dependencies:
-- PyPDF2: For basic PDF reading
-- pdf2image: For converting PDF pages to images
-- Pillow (PIL): For image processing
+- PyMuPDF: For PDF reading and page rendering (MuPDF C engine, ~10x faster
+  than PyPDF2 and needs no Poppler install)
+- Fallback when PyMuPDF isn't installed:
+  - PyPDF2: For basic PDF reading
+  - pypdfium2 (optional): Faster text extraction than PyPDF2 (PDFium C++ engine)
+  - pdf2image: For converting PDF pages to images (needs Poppler)
+  - Pillow (PIL): For image processing
 
 Used by: analyzer.py
 """
 
-import base64
-import io
+import hashlib
+import logging
+import mmap
+import os
 import re
-from typing import Dict, List, Optional
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from pathlib import Path
-from PyPDF2 import PdfReader
-import pdf2image
+
+from PIL import Image
+
+try:
+    import pymupdf
+    PYMUPDF_AVAILABLE = True
+    PDFIUM_AVAILABLE = False  # not needed
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+    from PyPDF2 import PdfReader
+    import pdf2image
+    
+    # Without PyMuPDF, pypdfium2 (Google's PDFium, C++) extracts text
+    # several times faster than PyPDF2's pure-Python parser; PyPDF2 still
+    # reads page counts and metadata, Poppler still renders
+    try:
+        import pypdfium2
+        PDFIUM_AVAILABLE = True
+    except ImportError:
+        PDFIUM_AVAILABLE = False
+
+# Progress goes through logging, not print(): one INFO line per PDF, the
+# per-step and per-page lines at DEBUG (free when disabled; print() takes
+# the stdout lock and formats even when nobody reads it)
+log = logging.getLogger(__name__)
+
+
+@contextmanager
+def _pypdf_reader(pdf_path):
+    """
+    PyPDF2 reader over a read-only memory map of the file.
+    
+    Given a path, PdfReader copies the whole file into memory first; over
+    an mmap, pages are read from the OS page cache as they are parsed.
+    The reader is only valid inside the with-block.
+    """
+    with open(pdf_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        yield PdfReader(mm)
+
+
+@contextmanager
+def _open_pdf(pdf_path):
+    """
+    Open a PDF once for text, metadata and page rendering.
+    
+    Yields a PyMuPDF Document, or without PyMuPDF a PyPDF2 reader
+    (see _pypdf_reader). Only valid inside the with-block.
+    """
+    if PYMUPDF_AVAILABLE:
+        with pymupdf.open(pdf_path) as doc:
+            yield doc
+    else:
+        with _pypdf_reader(pdf_path) as reader:
+            yield reader
+
+
+def _pdfium_page_texts(pdf_path, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+    """
+    Text of pages [start, end) (0-based; default: all pages) with pypdfium2.
+    
+    PDFium ends lines with CRLF; they're normalized to LF like the other
+    backends.
+    """
+    pdf = pypdfium2.PdfDocument(str(pdf_path))
+    try:
+        for i in range(start, len(pdf) if end is None else end):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            try:
+                yield textpage.get_text_range().replace('\r\n', '\n')
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> Tuple[int, List[str]]:
+    """
+    Extract the text of pages [start, end) (0-based).
+    
+    Runs in a worker process of PDFProcessor._extract_text(); it opens
+    its own document, so module level (picklable by reference) is required.
+    
+    Returns:
+        (start, page texts), so results can be put back in order
+    """
+    if PYMUPDF_AVAILABLE:
+        with pymupdf.open(pdf_path) as doc:
+            return start, [doc[i].get_text("text") for i in range(start, end)]
+    
+    if PDFIUM_AVAILABLE:
+        return start, list(_pdfium_page_texts(pdf_path, start, end))
+    
+    with _pypdf_reader(pdf_path) as reader:
+        return start, [reader.pages[i].extract_text() for i in range(start, end)]
+
+
+# Figure/table captions
+# Matches: "Figure 3.2: Some caption text"
+CAPTION_PATTERN = re.compile(r'(Figure|Table|Fig\.|Tab\.)\s+\d+\.?\d*:?\s+([^\n]{10,100})', re.IGNORECASE)
 
 
 class PDFProcessor:
@@ -39,29 +147,69 @@ class PDFProcessor:
         text = content['text']
         images = content['images']
         metadata = content['metadata']
+        
+        # Or page by page (render only the pages you need), with the
+        # document opened once
+        with processor.open_document("paper.pdf") as doc:
+            for page_num, text in processor.iter_pages("paper.pdf", doc):
+                if processor.page_captions(text):
+                    image = processor.render_page("paper.pdf", page_num, doc=doc)
     """
     
+    # Resolution for rendering pages to images
+    RENDER_DPI = 150  # Balance quality vs size
+    
+    # Pages rendered without a figure caption (papers with no recognizable
+    # captions) are whole-page captures: a 100 DPI JPEG is a fraction of
+    # the size of a 150 DPI PNG and still readable
+    SCAN_DPI = 100
+    SCAN_JPEG_QUALITY = 85
+    
+    # extract() drops rendered pages whose gray levels span less than this
+    # (blank pages, dividers) before they are encoded
+    MIN_PAGE_CONTRAST = 20
+    
+    # Text extraction is split across worker processes from this many pages
+    # on. Starting the pool costs ~0.1-0.3 s, which PyPDF2 (~10-50 ms/page)
+    # earns back on short papers but PyMuPDF/PDFium (~2 ms/page) only on
+    # long ones.
+    PARALLEL_MIN_PAGES = 400 if PYMUPDF_AVAILABLE or PDFIUM_AVAILABLE else 16
+    
+    # A page whose largest embedded raster image covers this much of it is
+    # sent as that image (original bytes) instead of a page render
+    MIN_EMBEDDED_FIGURE_AREA = 0.25
+    MIN_EMBEDDED_FIGURE_SIZE = 100  # px, smaller images are icons/logos
+    
     def __init__(self):
         """Initialize PDF processor"""
-        print("✅ PDF Processor initialized")
+        backend = "PyMuPDF" if PYMUPDF_AVAILABLE else "PyPDF2 + pdf2image"
+        log.info("✅ PDF Processor initialized (%s)", backend)
     
-    def extract(self, pdf_path: str, extract_images: bool = True) -> Dict:
+    def extract(self,
+                pdf_path: str,
+                extract_images: bool = True,
+                workers: Optional[int] = None,
+                join_text: bool = True) -> Dict:
         """
         Extract all content from a PDF file.
         
         Args:
             pdf_path: Path to PDF file
-            extract_images: Whether to extract images (can be slow for large PDFs)
+            extract_images: Whether to extract images (can be slow for large PDFs);
+                only pages with a figure/table caption are rendered
+            workers: Processes for text extraction (default: CPU count; see _extract_text)
+            join_text: Also return the pages joined into 'text' (callers that
+                only use 'page_texts' can skip holding the text twice)
         
         Returns:
             {
-                'text': "full paper text",
+                'text': "full paper text",  # only with join_text
                 'pages': 127,
                 'metadata': {'title': ..., 'author': ...},
                 'images': [
                     {
                         'page': 23,
-                        'image_data': 'base64...',
+                        'image_bytes': b'\\x89PNG...',
                         'caption': 'Figure 3.2: ...'
                     }
                 ],
@@ -69,72 +217,114 @@ class PDFProcessor:
             }
         """
         
-        print(f"\n📄 Processing PDF: {pdf_path}")
-        print("="*60)
+        log.info("📄 Processing PDF: %s", pdf_path)
         
         pdf_path = Path(pdf_path)
         if not pdf_path.exists():
             raise FileNotFoundError(f"PDF not found: {pdf_path}")
         
-        # Extract text
-        print("📖 Extracting text...")
-        text_data = self._extract_text(pdf_path)
-        
-        # Extract metadata
-        print("ℹ️  Extracting metadata...")
-        metadata = self._extract_metadata(pdf_path)
-        
-        # Extract images (optional, can be slow)
-        images = []
-        if extract_images:
-            print("🖼️  Extracting images (this may take a while)...")
-            images = self._extract_images(pdf_path)
-        else:
-            print("⏭️  Skipping image extraction (set extract_images=True to enable)")
+        # The document is parsed once and shared by every step
+        # (worker processes and Poppler still open the file themselves)
+        with _open_pdf(pdf_path) as doc:
+            # Extract text
+            log.debug("📖 Extracting text...")
+            text_data = self._extract_text(pdf_path, doc, workers)
+            
+            # Extract metadata
+            log.debug("ℹ️  Extracting metadata...")
+            metadata = self._extract_metadata(doc)
+            
+            # Extract images (optional, can be slow)
+            images = []
+            if extract_images:
+                log.debug("🖼️  Extracting images (this may take a while)...")
+                # Only pages with a figure/table caption are rendered; a
+                # paper without any recognizable caption gets every page
+                figure_pages = set(self.detect_figure_captions(text_data['page_texts']))
+                images = self._extract_images(pdf_path, doc, pages=figure_pages or None)
+            else:
+                log.debug("⏭️  Skipping image extraction (set extract_images=True to enable)")
         
-        print(f"\n✅ PDF processing complete!")
-        print(f"   Pages: {text_data['pages']}")
-        print(f"   Characters: {len(text_data['text']):,}")
-        print(f"   Images: {len(images)}")
+        if log.isEnabledFor(logging.INFO):
+            log.info("✅ PDF processed: %d pages, %s characters, %d images",
+                     text_data['pages'],
+                     f"{sum(len(page) for page in text_data['page_texts']):,}",
+                     len(images))
         
-        return {
-            'text': text_data['text'],
+        content = {
             'pages': text_data['pages'],
             'page_texts': text_data['page_texts'],
             'metadata': metadata,
             'images': images,
             'file_name': pdf_path.name
         }
+        if join_text:
+            # One exact-size allocation; the page texts are the only other copy
+            content['text'] = "\n\n".join(text_data['page_texts'])
+        return content
     
-    def _extract_text(self, pdf_path: Path) -> Dict:
+    def _extract_text(self, pdf_path: Path, doc, workers: Optional[int] = None) -> Dict:
         """
         Extract text from PDF.
         
+        Papers with at least PARALLEL_MIN_PAGES pages are split into one
+        contiguous block of pages per worker process (pages are independent,
+        and the parsers are CPU-bound Python/C code holding the GIL).
+        
+        Args:
+            pdf_path: Path to PDF (for the worker processes)
+            doc: The open document, from _open_pdf()
+            workers: Worker processes (default: os.cpu_count(); 1 = no pool)
+        
         Returns:
             {
-                'text': "combined text from all pages",
                 'pages': total_page_count,
                 'page_texts': ["page 1 text", "page 2 text", ...]
             }
         """
         
+        total_pages = doc.page_count if PYMUPDF_AVAILABLE else len(doc.pages)
+        page_texts = self._extract_text_parallel(pdf_path, total_pages, workers or os.cpu_count() or 1)
+        if page_texts is not None:
+            return {
+                'pages': len(page_texts),
+                'page_texts': page_texts
+            }
+        
+        if PYMUPDF_AVAILABLE:
+            try:
+                page_texts = [page.get_text("text") for page in doc]
+            except Exception as e:
+                raise Exception(f"Failed to extract text from PDF: {e}")
+            
+            return {
+                'pages': len(page_texts),
+                'page_texts': page_texts
+            }
+        
+        if PDFIUM_AVAILABLE:
+            try:
+                page_texts = list(_pdfium_page_texts(pdf_path))
+            except Exception as e:
+                raise Exception(f"Failed to extract text from PDF: {e}")
+            
+            return {
+                'pages': len(page_texts),
+                'page_texts': page_texts
+            }
+        
         try:
-            reader = PdfReader(str(pdf_path))
-            page_texts = []
+            # Sized up front (the page count is known), filled by index
+            page_texts = [None] * total_pages
             
-            for page_num, page in enumerate(reader.pages, 1):
+            for page_num, page in enumerate(doc.pages, 1):
                 # Extract text from page
-                text = page.extract_text()
-                page_texts.append(text)
+                page_texts[page_num - 1] = page.extract_text()
                 
                 if page_num % 10 == 0:
-                    print(f"   Processed {page_num} pages...")
-            
-            # Combine all pages
-            full_text = "\n\n".join(page_texts)
+                    log.debug("   Processed %d pages...", page_num)
             
             return {
-                'text': full_text,
                 'pages': len(page_texts),
                 'page_texts': page_texts
             }
@@ -142,17 +332,68 @@ class PDFProcessor:
         except Exception as e:
             raise Exception(f"Failed to extract text from PDF: {e}")
     
-    def _extract_metadata(self, pdf_path: Path) -> Dict:
+    def _extract_text_parallel(self, pdf_path: Path, total_pages: int,
+                               workers: int) -> Optional[List[str]]:
+        """
+        Page texts extracted by a process pool.
+        
+        Returns:
+            The page texts, or None when the paper is too short to be worth
+            it, only one worker is allowed, or the pool failed (the caller
+            then extracts serially)
+        """
+        if workers <= 1 or total_pages < self.PARALLEL_MIN_PAGES:
+            return None
+        
+        workers = min(workers, total_pages)
+        block = -(-total_pages // workers)  # ceil division
+        ranges = [(start, min(start + block, total_pages))
+                  for start in range(0, total_pages, block)]
+        
+        log.debug("   Using %d processes for %d pages...", len(ranges), total_pages)
+        
+        # Each block lands in its own slice, whatever order they finish in
+        page_texts = [None] * total_pages
+        done = 0
+        try:
+            with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+                futures = [pool.submit(_extract_page_range, str(pdf_path), start, end)
+                           for start, end in ranges]
+                for future in as_completed(futures):
+                    start, texts = future.result()
+                    page_texts[start:start + len(texts)] = texts
+                    done += len(texts)
+                    log.debug("   Processed %d/%d pages...", done, total_pages)
+        except Exception as e:
+            log.warning("⚠️  Parallel extraction failed (%s), extracting serially", e)
+            return None
+        
+        return page_texts
+    
+    def _extract_metadata(self, doc) -> Dict:
         """
         Extract PDF metadata (title, author, etc.)
         
         Note: Many PDFs have incomplete metadata.
         We'll also try to extract from first page text.
+        
+        Args:
+            doc: The open document, from _open_pdf()
         """
         
         try:
-            reader = PdfReader(str(pdf_path))
-            pdf_metadata = reader.metadata or {}
+            if PYMUPDF_AVAILABLE:
+                pdf_metadata = doc.metadata or {}
+                
+                return {
+                    'title': pdf_metadata.get('title') or 'Unknown',
+                    'author': pdf_metadata.get('author') or 'Unknown',
+                    'subject': pdf_metadata.get('subject', ''),
+                    'creator': pdf_metadata.get('creator', ''),
+                    'creation_date': pdf_metadata.get('creationDate', '')
+                }
+            
+            pdf_metadata = dict(doc.metadata or {})
             
             return {
                 'title': pdf_metadata.get('/Title', 'Unknown'),
@@ -163,12 +404,13 @@ class PDFProcessor:
             }
             
         except Exception as e:
-            print(f"   Warning: Could not extract metadata: {e}")
+            log.warning("⚠️  Could not extract metadata: %s", e)
             return {}
     
-    def _extract_images(self, pdf_path: Path, 
+    def _extract_images(self, pdf_path: Path, doc,
                        max_images: int = 50,
-                       min_size: int = 100) -> List[Dict]:
+                       min_size: int = 100,
+                       pages: Optional[Set[int]] = None) -> List[Dict]:
         """
         Extract images from PDF.
         
@@ -179,84 +421,376 @@ class PDFProcessor:
         
         Strategy: Convert each page to image, detect if it contains figures
         
+        Without PyMuPDF, Poppler renders the pages on cpu_count() - 1
+        threads into a temporary folder, and the PNG files are read (and
+        deleted) one at a time as-is, instead of every page being held as
+        a decoded PIL image and re-encoded. Poppler keeps a file per page open while
+        rendering; very long PDFs may need a higher open-file limit
+        (e.g. `ulimit -n 10000`).
+        
         Args:
-            pdf_path: Path to PDF
+            pdf_path: Path to PDF (Poppler opens the file itself)
+            doc: The open document, from _open_pdf()
             max_images: Maximum images to extract (to control costs)
             min_size: Minimum image size in pixels
+            pages: Page numbers (1-based) to render (default: all pages)
         
         Returns:
-            List of image dicts with base64 data
+            List of image dicts with PNG bytes (JPEG for whole-page scans)
         """
         
+        if PYMUPDF_AVAILABLE:
+            return self._render_pages(doc, max_images, min_size, pages)
+        
         images = []
         
         try:
-            # Convert PDF pages to images
-            # This captures everything, including vector graphics
-            pages = pdf2image.convert_from_path(
+            with tempfile.TemporaryDirectory() as output_folder:
+                # Without a selection every page is rendered, as a scan
+                for page_num, page_path in self._poppler_pages(pdf_path, output_folder,
+                                                               pages, scan=not pages):
+                    # Pages that might have charts were picked by the caller
+                    # (pages with "Figure" or "Table" captions in their text)
+                    
+                    if len(images) >= max_images:
+                        log.debug("   Reached max images (%d), stopping extraction", max_images)
+                        break
+                    
+                    # Poppler already wrote the encoded bytes; they're only
+                    # decoded (at reduced size, for JPEG) for the blank check
+                    with Image.open(page_path) as page_image:
+                        width, height = page_image.size
+                        skip = (width < min_size or height < min_size
+                                or self._is_blank(page_image))
+                    
+                    # Skip very small images and blank pages
+                    if skip:
+                        os.remove(page_path)
+                        continue
+                    
+                    with open(page_path, 'rb') as f:
+                        image_bytes = f.read()
+                    os.remove(page_path)  # free the disk space as we go
+                    
+                    images.append({
+                        'page': page_num,
+                        'image_bytes': image_bytes,
+                        'width': width,
+                        'height': height,
+                        'caption': f"Page {page_num}"  # Will try to extract captions later
+                    })
+                    
+                    if page_num % 10 == 0:
+                        log.debug("   Extracted %d images from %d pages...", len(images), page_num)
+            
+            return images
+            
+        except Exception as e:
+            error_msg = str(e).lower()
+
+            # Specific error handling for poppler not installed
+            if 'poppler' in error_msg or 'page count' in error_msg:
+                log.error(
+                    "❌ ERROR: Poppler is not installed or not in PATH!\n"
+                    "   📍 This is required for extracting images from PDFs\n"
+                    "   Windows Installation:\n"
+                    "      1. Download: https://github.com/oschwartz10612/poppler-windows/releases/\n"
+                    "      2. Extract to: C:\\Program Files\\poppler-XX.XX.X\n"
+                    "      3. Add to PATH: C:\\Program Files\\poppler-XX.XX.X\\Library\\bin\n"
+                    "      4. Restart terminal/IDE\n"
+                    "      5. Test with: pdftoppm -v\n"
+                    "   macOS: brew install poppler\n"
+                    "   Ubuntu: sudo apt install poppler-utils\n"
+                    "   ⚠️  Continuing with text-only analysis..."
+                )
+            else:
+                log.warning("⚠️  Could not extract images: %s "
+                            "(make sure pdf2image and poppler are installed)", e)
+
+            return []
+    
+    def _poppler_pages(self, pdf_path: Path, output_folder: str,
+                       pages: Optional[Set[int]] = None,
+                       scan: bool = False) -> Iterator[Tuple[int, str]]:
+        """
+        Render pages to PNG files with Poppler (pdf2image).
+        
+        Consecutive selected pages are rendered by one Poppler call
+        (first_page/last_page), so each run still uses all the threads.
+        
+        Args:
+            pages: Page numbers (1-based) to render (default: all pages)
+            scan: Whole-page captures (SCAN_DPI JPEG instead of RENDER_DPI PNG)
+        
+        Yields:
+            (page number, image file path), in page order
+        """
+        if scan:
+            render = {'dpi': self.SCAN_DPI, 'fmt': 'jpeg',
+                      'jpegopt': {'quality': self.SCAN_JPEG_QUALITY, 'optimize': True}}
+        else:
+            render = {'dpi': self.RENDER_DPI, 'fmt': 'png'}
+        
+        # Convert PDF pages to images
+        # This captures everything, including vector graphics
+        runs = [(None, None)]
+        if pages:
+            runs = []
+            for page_num in sorted(pages):
+                if runs and runs[-1][1] == page_num - 1:
+                    runs[-1] = (runs[-1][0], page_num)
+                else:
+                    runs.append((page_num, page_num))
+        
+        for first_page, last_page in runs:
+            page_paths = pdf2image.convert_from_path(
                 pdf_path,
-                dpi=150,  # Balance quality vs size
-                fmt='png'
+                first_page=first_page,
+                last_page=last_page,
+                thread_count=max(1, (os.cpu_count() or 1) - 1),
+                output_folder=output_folder,
+                paths_only=True,
+                **render
             )
-            
-            for page_num, page_image in enumerate(pages, 1):
-                # Check if this page likely contains a figure
-                # (This is a heuristic - we look for pages with less text)
-                
-                # For now, let's extract images from pages that might have charts
-                # We'll look for pages with "Figure" or "Table" in their text
-                
-                # For simplicity in MVP, let's extract first N pages
-                # that might contain important charts
-                
+            yield from enumerate(page_paths, first_page or 1)
+    
+    def _render_pages(self, doc, max_images: int, min_size: int,
+                      pages: Optional[Set[int]] = None) -> List[Dict]:
+        """
+        Render pages to PNG images with PyMuPDF.
+        
+        Same output as the pdf2image path in _extract_images(), but pages
+        are rendered one at a time (and only until max_images), in-process
+        instead of through Poppler.
+        """
+        
+        images = []
+        # Without a selection every page is rendered, as a scan
+        scan = not pages
+        page_nums = sorted(pages) if pages else range(1, doc.page_count + 1)
+        
+        try:
+            for page_num in page_nums:
+                page = doc[page_num - 1]
                 if len(images) >= max_images:
-                    print(f"   Reached max images ({max_images}), stopping extraction")
+                    log.debug("   Reached max images (%d), stopping extraction", max_images)
                     break
                 
-                # Skip very small images
-                if page_image.width < min_size or page_image.height < min_size:
-                    continue
+                image = self._render_pymupdf_page(page, page_num, scan, skip_blank=True)
                 
-                # Convert to base64
-                buffered = io.BytesIO()
-                page_image.save(buffered, format="PNG")
-                img_base64 = base64.b64encode(buffered.getvalue()).decode()
+                # Skip blank pages and very small images
+                if image is None or image['width'] < min_size or image['height'] < min_size:
+                    continue
                 
-                images.append({
-                    'page': page_num,
-                    'image_data': img_base64,
-                    'width': page_image.width,
-                    'height': page_image.height,
-                    'caption': f"Page {page_num}"  # Will try to extract captions later
-                })
+                images.append(image)
                 
                 if page_num % 10 == 0:
-                    print(f"   Extracted {len(images)} images from {page_num} pages...")
+                    log.debug("   Extracted %d images from %d pages...", len(images), page_num)
             
             return images
             
         except Exception as e:
-            error_msg = str(e).lower()
-
-            # Specific error handling for poppler not installed
-            if 'poppler' in error_msg or 'page count' in error_msg:
-                print(f"   ❌ ERROR: Poppler is not installed or not in PATH!")
-                print(f"   \n   📍 This is required for extracting images from PDFs")
-                print(f"   \n   Windows Installation:")
-                print(f"      1. Download: https://github.com/oschwartz10612/poppler-windows/releases/")
-                print(f"      2. Extract to: C:\\Program Files\\poppler-XX.XX.X")
-                print(f"      3. Add to PATH: C:\\Program Files\\poppler-XX.XX.X\\Library\\bin")
-                print(f"      4. Restart terminal/IDE")
-                print(f"      5. Test with: pdftoppm -v")
-                print(f"   \n   macOS: brew install poppler")
-                print(f"   Ubuntu: sudo apt install poppler-utils")
-                print(f"   \n   ⚠️  Continuing with text-only analysis...")
-            else:
-                print(f"   ⚠️  Warning: Could not extract images: {e}")
-                print(f"   Make sure pdf2image and poppler are installed")
-
+            log.warning("⚠️  Could not extract images: %s", e)
             return []
     
+    def _render_pymupdf_page(self, page, page_num: int, scan: bool = False,
+                             skip_blank: bool = False) -> Optional[Dict]:
+        """
+        Render one PyMuPDF page to an image dict.
+        
+        A page whose figure is one embedded raster image returns that
+        image's own bytes instead (see _embedded_figure), skipping the
+        rasterization of the page's drawing operators.
+        
+        Args:
+            scan: Whole-page capture (SCAN_DPI JPEG instead of RENDER_DPI PNG)
+            skip_blank: Return None for a blank render (see _is_blank),
+                before it is encoded
+        """
+        figure = self._embedded_figure(page, page_num)
+        if figure is not None:
+            return figure
+        
+        pixmap = page.get_pixmap(dpi=self.SCAN_DPI if scan else self.RENDER_DPI)
+        if skip_blank:
+            # A view of the pixmap's samples, not a copy
+            page_image = Image.frombuffer("RGB", (pixmap.width, pixmap.height),
+                                          pixmap.samples_mv, "raw", "RGB", pixmap.stride, 1)
+            if self._is_blank(page_image):
+                return None
+        
+        if scan:
+            image_bytes = pixmap.tobytes("jpeg", jpg_quality=self.SCAN_JPEG_QUALITY)
+        else:
+            image_bytes = pixmap.tobytes("png")
+        return {
+            'page': page_num,
+            'image_bytes': image_bytes,
+            'width': pixmap.width,
+            'height': pixmap.height,
+            'caption': f"Page {page_num}"  # Will try to extract captions later
+        }
+    
+    def _is_blank(self, page_image) -> bool:
+        """
+        True if a rendered page is (nearly) one flat color.
+        
+        getextrema() is one pass in C over the grayscale pixels; JPEGs are
+        decoded at 1/8 scale for it (draft), which keeps the extremes of
+        anything larger than a few pixels.
+        """
+        page_image.draft('L', (page_image.width // 8, page_image.height // 8))
+        lo, hi = page_image.convert('L').getextrema()
+        return hi - lo < self.MIN_PAGE_CONTRAST
+    
+    def _embedded_figure(self, page, page_num: int) -> Optional[Dict]:
+        """
+        The page's main embedded image, read straight from the PDF.
+        
+        Used when one raster image covers at least MIN_EMBEDDED_FIGURE_AREA
+        of the page and is stored as PNG/JPEG without a transparency
+        mask (so the stored bytes look like the rendered figure). Vector
+        charts have no embedded image and are rendered as before.
+        
+        Returns:
+            Image dict, or None if the page should be rendered
+        """
+        page_area = abs(page.rect)
+        if not page_area:
+            return None
+        
+        best = None
+        best_area = 0.0
+        for xref, smask, *_ in page.get_images(full=True):
+            area = sum(abs(rect & page.rect) for rect in page.get_image_rects(xref))
+            if area > best_area:
+                best, best_area = (xref, smask), area
+        
+        if best is None or best_area / page_area < self.MIN_EMBEDDED_FIGURE_AREA or best[1]:
+            return None
+        
+        extracted = page.parent.extract_image(best[0])
+        if not extracted or extracted.get('ext') not in ('png', 'jpeg', 'jpg'):
+            return None
+        if min(extracted['width'], extracted['height']) < self.MIN_EMBEDDED_FIGURE_SIZE:
+            return None
+        
+        return {
+            'page': page_num,
+            'image_bytes': extracted['image'],
+            'width': extracted['width'],
+            'height': extracted['height'],
+            'caption': f"Page {page_num}"
+        }
+    
+    def open_document(self, pdf_path: str):
+        """
+        Open a PDF once for iter_pages() and render_page() calls.
+        
+        A context manager; the document is only valid inside the
+        with-block and, like any PyMuPDF document, on one thread at a time.
+        """
+        return _open_pdf(pdf_path)
+    
+    def iter_pages(self, pdf_path: str, doc=None) -> Iterator[Tuple[int, str]]:
+        """
+        Extract text one page at a time.
+        
+        Lets a caller act on early pages (e.g. start analyzing their
+        figures) while later pages are still being parsed.
+        
+        Args:
+            pdf_path: Path to PDF file
+            doc: Document from open_document() (default: open the file here)
+        
+        Yields:
+            (page_number, page_text), page numbers starting at 1
+        """
+        
+        pdf_path = Path(pdf_path)
+        if not pdf_path.exists():
+            raise FileNotFoundError(f"PDF not found: {pdf_path}")
+        
+        if PYMUPDF_AVAILABLE:
+            with nullcontext(doc) if doc is not None else pymupdf.open(pdf_path) as doc:
+                for page_num, page in enumerate(doc, 1):
+                    yield page_num, page.get_text("text")
+        elif PDFIUM_AVAILABLE:
+            yield from enumerate(_pdfium_page_texts(pdf_path), 1)
+        else:
+            with nullcontext(doc) if doc is not None else _pypdf_reader(pdf_path) as reader:
+                for page_num, page in enumerate(reader.pages, 1):
+                    yield page_num, page.extract_text()
+    
+    def render_page(self, pdf_path: str, page_num: int, scan: bool = False,
+                    doc=None) -> Dict:
+        """
+        Render a single page to an image.
+        
+        Args:
+            pdf_path: Path to PDF file
+            page_num: Page number (starting at 1)
+            scan: Whole-page capture of a page without a figure caption
+                (SCAN_DPI JPEG instead of RENDER_DPI PNG)
+            doc: Document from open_document() (default: open the file
+                here); Poppler always reads the file itself
+        
+        Returns:
+            Image dict, same shape as the entries of extract()['images']
+        """
+        
+        if PYMUPDF_AVAILABLE:
+            with nullcontext(doc) if doc is not None else pymupdf.open(pdf_path) as doc:
+                return self._render_pymupdf_page(doc[page_num - 1], page_num, scan)
+        
+        # Poppler writes the encoded file itself; it's read back as-is
+        # (no decoded PIL image, no re-encode)
+        with tempfile.TemporaryDirectory() as output_folder:
+            _, page_path = next(self._poppler_pages(pdf_path, output_folder, {page_num}, scan))
+            with Image.open(page_path) as page_image:
+                width, height = page_image.size
+            with open(page_path, 'rb') as f:
+                image_bytes = f.read()
+        
+        return {
+            'page': page_num,
+            'image_bytes': image_bytes,
+            'width': width,
+            'height': height,
+            'caption': f"Page {page_num}"
+        }
+    
+    def render_settings(self, scan: bool = False) -> str:
+        """
+        Short hash of everything that shapes render_page()'s output.
+        
+        Cached page images are stored under it, so changing a setting
+        (DPI, format, JPEG quality, embedded figure thresholds) or the
+        rendering library renders the pages again.
+        
+        Args:
+            scan: Settings for whole-page captures (see render_page)
+        """
+        if scan:
+            render = ('jpeg', self.SCAN_DPI, self.SCAN_JPEG_QUALITY)
+        else:
+            render = ('png', self.RENDER_DPI)
+        backend = 'pymupdf' if PYMUPDF_AVAILABLE else 'poppler'
+        settings = (backend, render, self.MIN_EMBEDDED_FIGURE_AREA, self.MIN_EMBEDDED_FIGURE_SIZE)
+        return hashlib.blake2b(repr(settings).encode(), digest_size=4).hexdigest()
+    
+    def page_captions(self, text: str) -> List[str]:
+        """
+        Find figure/table captions in one page's text.
+        
+        Args:
+            text: Text of a single page
+        
+        Returns:
+            Captions found, e.g. ["Figure 3.2 Ocean pH trends..."]
+        """
+        return [f"{match[0]} {match[1]}" for match in CAPTION_PATTERN.findall(text)]
+    
     def detect_figure_captions(self, page_texts: List[str]) -> Dict[int, List[str]]:
         """
         Detect figure captions in the text.
@@ -274,15 +808,10 @@ class PDFProcessor:
         
         captions = {}
         
-        # Regex pattern for figure/table captions
-        # Matches: "Figure 3.2: Some caption text"
-        pattern = r'(Figure|Table|Fig\.|Tab\.)\s+\d+\.?\d*:?\s+([^\n]{10,100})'
-        
         for page_num, text in enumerate(page_texts, 1):
-            matches = re.findall(pattern, text, re.IGNORECASE)
+            page_captions = self.page_captions(text)
             
-            if matches:
-                page_captions = [f"{match[0]} {match[1]}" for match in matches]
+            if page_captions:
                 captions[page_num] = page_captions
         
         return captions
@@ -304,27 +833,30 @@ class PDFProcessor:
         
         # Simple chunking by character count
         # Better approach: chunk by sections, but this works for MVP
+        # Same chunks as packing text.split() words greedily (a word costs
+        # its length + 1 for the space), but each chunk is one slice of
+        # the space-joined words instead of a join per chunk
         
         chunks = []
-        words = text.split()
-        current_chunk = []
-        current_size = 0
-        
-        for word in words:
-            word_size = len(word) + 1  # +1 for space
+        text = ' '.join(text.split())
+        start = 0
+        
+        while start < len(text):
+            # Last position a chunk's final word may end at
+            limit = start + chunk_size - 1
+            if len(text) <= limit:
+                chunks.append(text[start:])
+                break
             
-            if current_size + word_size > chunk_size and current_chunk:
-                # Save current chunk and start new one
-                chunks.append(' '.join(current_chunk))
-                current_chunk = [word]
-                current_size = word_size
-            else:
-                current_chunk.append(word)
-                current_size += word_size
-        
-        # Add last chunk
-        if current_chunk:
-            chunks.append(' '.join(current_chunk))
+            end = text.rfind(' ', start, limit + 1) if limit > start else -1
+            if end < 0:
+                # The first word alone is too long: it's a chunk by itself
+                end = text.find(' ', start)
+                if end < 0:
+                    end = len(text)
+            
+            chunks.append(text[start:end])
+            start = end + 1
         
         return chunks
 
@@ -343,6 +875,8 @@ if __name__ == "__main__":
     
     from pathlib import Path
 
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
     if len(sys.argv) < 2:
         print("Usage: python pdf_processor.py <pdf_file>")
         print("\nExample: python pdf_processor.py research_paper.pdf")
@@ -410,7 +944,7 @@ if __name__ == "__main__":
             content_with_images = processor.extract(pdf_file, extract_images=True)
             print(f"   Extracted {len(content_with_images['images'])} images")
             if content_with_images['images']:
-                print(f"   First image size: {len(content_with_images['images'][0]['image_data'])} bytes (base64)")
+                print(f"   First image size: {len(content_with_images['images'][0]['image_bytes'])} bytes (PNG)")
 
         print("\n✅ PDF processing test complete!")
 
@@ -427,10 +961,11 @@ if __name__ == "__main__":
         print(f"\n❌ ImportError: {e}")
         print(f"\n📍 Location: Missing required module")
         print("\nRequired dependencies:")
+        print("  - PyMuPDF: pip install pymupdf")
+        print("\nOr, without PyMuPDF:")
         print("  - PyPDF2: pip install PyPDF2")
         print("  - pdf2image: pip install pdf2image")
         print("  - Pillow: pip install Pillow")
-        print("\nSystem requirements:")
         print("  - poppler (for pdf2image)")
         print("    macOS: brew install poppler")
         print("    Ubuntu: sudo apt install poppler-utils")
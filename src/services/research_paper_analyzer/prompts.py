@@ -9,30 +9,22 @@ Contains prompts for:
 3. Full paper synthesis (Text API)
 4. Citation extraction (Text API)
 
+The prompts sent on many calls (one per image, one per section) keep
+their static instructions in a system prompt (VISION_CHART_ANALYSIS_SYSTEM,
+SECTION_SUMMARY_SYSTEM) and only the changing part in the user message,
+so the instructions can be served from Anthropic's prompt cache.
+
 Used by: vision_analyzer.py, summarizer.py
 """
 
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, List, Tuple
 
 
-def vision_chart_analysis_prompt(caption: str = "") -> str:
-    """
-    Prompt for Claude Vision API to analyze a chart/graph.
-    
-    This prompt is sent WITH an image to the Vision API.
-    
-    Args:
-        caption: Optional caption from the PDF (e.g., "Figure 3.2: Ocean pH trends")
-    
-    Returns:
-        Prompt string for Vision API
-    """
-    
-    caption_text = f"\nImage caption: {caption}" if caption else ""
-    
-    prompt = f"""You are analyzing a scientific chart or graph from a research paper.{caption_text}
+# Static instructions for every chart, sent as the Vision system prompt
+VISION_CHART_ANALYSIS_SYSTEM = """You are analyzing a scientific chart or graph from a research paper.
 
-Please analyze this image and provide:
+Please analyze the image and provide:
 
 1. **Chart Type**: What kind of visualization is this? (line graph, bar chart, scatter plot, map, etc.)
 
@@ -51,42 +43,23 @@ Please analyze this image and provide:
 8. **Scientific Implication**: Why does this chart matter? What does it tell us?
 
 Return your analysis as a JSON object with this structure:
-{{
+{
   "chart_type": "type of chart",
   "title": "what the chart shows",
-  "axes": {{"x": "x-axis description", "y": "y-axis description"}},
+  "axes": {"x": "x-axis description", "y": "y-axis description"},
   "key_data": "important values or ranges",
   "trend": "overall pattern",
   "key_finding": "one sentence insight",
   "confidence_indicators": "error bars, uncertainty, or 'none'",
   "scientific_implication": "why this matters"
-}}
+}
 
 Important: Return ONLY the JSON object, no other text."""
-    
-    return prompt
 
 
-def section_summary_prompt(section_title: str, section_text: str) -> str:
-    """
-    Prompt for summarizing a single section of a paper.
-    
-    Papers are too long to analyze at once, so we chunk by section.
-    
-    Args:
-        section_title: Name of the section (e.g., "Methodology", "Results")
-        section_text: The text content of that section
-    
-    Returns:
-        Prompt string for Text API
-    """
-    
-    prompt = f"""You are analyzing a section from a scientific research paper.
-
-Section: {section_title}
-
-Text:
-{section_text}
+# Static instructions for every section, sent as the summarizer system prompt
+SECTION_SUMMARY_SYSTEM = """You are analyzing a section from a scientific research paper.
+The user's message gives the section name and its text.
 
 Please extract:
 
@@ -103,19 +76,117 @@ Please extract:
 6. **Technical Terms**: List any important technical terms and briefly define them.
 
 Return your analysis as a JSON object:
-{{
-  "section": "{section_title}",
+{
+  "section": "the section name from the message",
   "main_points": ["point 1", "point 2", "point 3"],
   "methodology": "methods used (if applicable)",
   "findings": ["finding 1", "finding 2"],
   "evidence": "supporting data or evidence",
   "confidence_level": "high/medium/low",
-  "technical_terms": {{"term": "definition", ...}}
-}}
+  "technical_terms": {"term": "definition", ...}
+}
 
 Return ONLY the JSON object."""
+
+
+# Instructions for several sections in one message (see section_batch_prompt)
+SECTION_BATCH_SUMMARY_SYSTEM = SECTION_SUMMARY_SYSTEM + """
+
+The user's message may hold several sections, each starting with a "Section:" line.
+Analyze each one separately and return them together, in the same order:
+{"summaries": [{...one object per section, in the format above...}]}"""
+
+
+# System prompt for analyzing several charts in one Vision call
+VISION_BATCH_ANALYSIS_SYSTEM = VISION_CHART_ANALYSIS_SYSTEM + """
+
+The user's message may hold several images, each following an "Image N" line.
+Analyze each one separately and return them together, in the same order:
+{"analyses": [{...one object per image, in the format above...}]}"""
+
+
+# Captions repeat (duplicate figures, retries), so the message is memoized
+@lru_cache(maxsize=256)
+def vision_chart_analysis_prompt(caption: str = "") -> str:
+    """
+    User message for Claude Vision API to analyze a chart/graph.
     
-    return prompt
+    This prompt is sent WITH an image to the Vision API. The analysis
+    instructions live in VISION_CHART_ANALYSIS_SYSTEM (send it as the
+    system prompt); this message only adds the figure caption.
+    
+    Args:
+        caption: Optional caption from the PDF (e.g., "Figure 3.2: Ocean pH trends")
+    
+    Returns:
+        Prompt string for Vision API
+    """
+    
+    if caption:
+        return f"Image caption: {caption}\n\nAnalyze this chart."
+    return "Analyze this chart."
+
+
+def vision_batch_prompt(index: int, caption: str = "") -> str:
+    """
+    Label placed before one image of a multi-image Vision call.
+    
+    Send the images with VISION_BATCH_ANALYSIS_SYSTEM as the system
+    prompt; the response has one analysis per image under "analyses".
+    
+    Args:
+        index: Position of the image in the message (starting at 1)
+        caption: Optional caption from the PDF
+    
+    Returns:
+        Prompt string for Vision API
+    """
+    
+    if caption:
+        return f"Image {index}\nImage caption: {caption}"
+    return f"Image {index}"
+
+
+def section_summary_prompt(section_title: str, section_text: str) -> str:
+    """
+    User message for summarizing a single section of a paper.
+    
+    Papers are too long to analyze at once, so we chunk by section.
+    The instructions and output format live in SECTION_SUMMARY_SYSTEM
+    (send it as the system prompt).
+    
+    Args:
+        section_title: Name of the section (e.g., "Methodology", "Results")
+        section_text: The text content of that section
+    
+    Returns:
+        Prompt string for Text API
+    """
+    
+    return f"""Section: {section_title}
+
+Text:
+{section_text}"""
+
+
+def section_batch_prompt(sections: List[Tuple[str, str]]) -> str:
+    """
+    User message for summarizing several short sections in one call.
+    
+    Send it with SECTION_BATCH_SUMMARY_SYSTEM as the system prompt; the
+    response has one summary per section under "summaries".
+    
+    Args:
+        sections: (section_title, section_text) pairs, in paper order
+    
+    Returns:
+        Prompt string for Text API
+    """
+    
+    return "\n\n---\n\n".join([
+        section_summary_prompt(title, text)
+        for title, text in sections
+    ])
 
 
 def full_synthesis_prompt(section_summaries: List[Dict]) -> str:
@@ -293,6 +364,8 @@ if __name__ == "__main__":
     print("="*70)
     print("VISION CHART ANALYSIS PROMPT")
     print("="*70)
+    print(VISION_CHART_ANALYSIS_SYSTEM)
+    print()
     print(vision_chart_analysis_prompt("Figure 3.2: Ocean pH trends 1950-2020"))
     
     print("\n\n")
@@ -301,6 +374,8 @@ if __name__ == "__main__":
     print("SECTION SUMMARY PROMPT")
     print("="*70)
     sample_text = "We analyzed 500 coral reef sites across 30 years..."
+    print(SECTION_SUMMARY_SYSTEM)
+    print()
     print(section_summary_prompt("Methodology", sample_text))
     
     print("\n\n")
@@ -246,7 +246,7 @@ if __name__ == "__main__":
     print("=" * 60)
 
     processor = PDFProcessor()
-    content   = processor.extract(str(pdf_path), extract_images=False)
+    content   = processor.extract(str(pdf_path), extract_images=False, join_text=False)
 
     chunker = Chunker()
     chunks  = chunker.chunk_pages(
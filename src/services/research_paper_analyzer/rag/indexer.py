@@ -160,12 +160,13 @@ class RagIndexer:
 
         # ── Step 1: Extract text ──────────────────────────────────────────
         print("\n📖 Step 1/4: Extracting text from PDF...")
-        content     = self.pdf_processor.extract(str(pdf_path), extract_images=False)
+        content     = self.pdf_processor.extract(str(pdf_path), extract_images=False,
+                                                 join_text=False)
         pages       = content["pages"]
         meta        = content.get("metadata", {})
         paper_title = meta.get("title") or source_file
         authors_raw = meta.get("author") or "Unknown"
-        print(f"   ✓ {pages} pages, {len(content['text']):,} characters")
+        print(f"   ✓ {pages} pages, {sum(len(t) for t in content['page_texts']):,} characters")
 
         # ── Step 2: Chunk ─────────────────────────────────────────────────
         print("\n✂️  Step 2/4: Splitting into overlapping chunks...")
@@ -0,0 +1,146 @@
+"""
+Response Cache
+==============
+Persistent cache of Claude responses, so re-analyzing the same paper
+doesn't pay for the same API calls again.
+
+This module:
+1. Keys each request by a SHA-256 of everything that affects the answer
+   (model, system prompt, messages / image bytes, temperature)
+2. Stores responses in a local SQLite database (zlib-compressed JSON)
+3. Expires entries after a TTL (7 days by default)
+
+Only exact matches are reused: section texts and chart images that are
+merely similar still need their own analysis.
+
+Used by: client.py
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Optional
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "ecolens" / "papers" / "responses.sqlite3"
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of Claude responses with a TTL.
+
+    Usage:
+        cache = ResponseCache()
+        key = ResponseCache.make_key(model, system, messages, temperature)
+
+        result = cache.get(key)
+        if result is None:
+            result = ...  # call Claude
+            cache.put(key, result)
+    """
+
+    # Entries older than this are ignored and purged
+    DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: SQLite file (default: ~/.cache/ecolens/papers/responses.sqlite3)
+            ttl_seconds: How long a stored response stays valid
+        """
+        self.path = Path(path) if path else DEFAULT_CACHE_PATH
+        self.ttl_seconds = ttl_seconds
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # One connection shared by worker threads and async tasks; the
+        # lock serializes access (sqlite3 objects aren't thread-safe)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " created REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE created < ?",
+                (time.time() - self.ttl_seconds,)
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """
+        Hash the parts of a request into a cache key.
+
+        Parts must be JSON-serializable; dict keys are sorted so equal
+        requests always give the same key.
+        """
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a stored response.
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            The stored result dict, or None on a miss / expired entry
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ? AND created >= ?",
+                (key, time.time() - self.ttl_seconds)
+            ).fetchone()
+
+        if row is None:
+            return None
+        try:
+            response = row[0]
+            # Entries written before compression was added are plain text
+            if isinstance(response, bytes):
+                response = zlib.decompress(response)
+            return json.loads(response)
+        except (ValueError, zlib.error):
+            return None
+
+    def put(self, key: str, result: Dict) -> None:
+        """
+        Store a response.
+
+        Args:
+            key: Key from make_key()
+            result: Result dict to return on later hits
+        """
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created) VALUES (?, ?, ?)",
+                    (key, zlib.compress(json.dumps(result).encode('utf-8')), time.time())
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            log.warning("⚠️  Could not store cached response: %s", e)
+
+    def clear(self) -> None:
+        """Delete every stored response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
@@ -5,7 +5,7 @@ Summarize research paper text using Claude API.
 
 This module:
 1. Chunks long papers into manageable sections
-2. Analyzes each section separately
+2. Analyzes the sections concurrently, batching short ones into one call
 3. Synthesizes a comprehensive summary
 4. Extracts key findings, methodology, confidence levels
 
@@ -13,16 +13,40 @@ Used by: analyzer.py
 Depends on: papers_client.py, papers_prompts.py
 """
 
+import asyncio
 import json
 import re
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from client import ClaudeClient
 from prompts import (
+    SECTION_BATCH_SUMMARY_SYSTEM,
+    SECTION_SUMMARY_SYSTEM,
+    section_batch_prompt,
     section_summary_prompt,
     full_synthesis_prompt,
     extract_metadata_prompt
 )
 
+# orjson (C-backed) parses responses faster than stdlib json; fall back
+# to json if it isn't installed. Both raise json.JSONDecodeError.
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+# Section sizes and batching
+MAX_SECTION_CHARS = 6000       # longer sections are truncated
+CHARS_PER_TOKEN = 4            # rough estimate for English text
+BATCH_TOKEN_LIMIT = 6000       # max estimated input tokens per batched call
+MAX_SECTIONS_PER_BATCH = 3     # keeps the combined JSON answer within max_tokens
+
+# Maximum section calls in flight at once
+MAX_CONCURRENT_CALLS = 5
+
+# Fewer sections than this aren't worth a message batch (it can take
+# minutes to run; see analyze_by_sections_batched)
+MIN_BATCH_SECTIONS = 4
+
 
 def strip_markdown_json(text: str) -> str:
     """
@@ -92,7 +116,7 @@ class PaperSummarizer:
         prompt = extract_metadata_prompt(first_page_text)
         
         try:
-            response = self.claude.call(
+            response = self.claude.call_json(
                 messages=[{'role': 'user', 'content': prompt}],
                 temperature=0.3  # Low temp for factual extraction
             )
@@ -100,7 +124,7 @@ class PaperSummarizer:
             # Strip markdown if present
             clean_content = strip_markdown_json(response['content'])
 
-            metadata = json.loads(clean_content)
+            metadata = _json_loads(clean_content)
             print(f"   ✓ Extracted: {metadata.get('title', 'Unknown')}")
             return metadata
 
@@ -143,15 +167,17 @@ class PaperSummarizer:
         prompt = section_summary_prompt("Full Paper", text)
         
         try:
-            response = self.claude.call(
+            response = self.claude.call_json(
                 messages=[{'role': 'user', 'content': prompt}],
-                temperature=0.5
+                system=SECTION_SUMMARY_SYSTEM,
+                temperature=0.5,
+                cache_system=True
             )
 
             # Strip markdown if present
             clean_content = strip_markdown_json(response['content'])
 
-            summary = json.loads(clean_content)
+            summary = _json_loads(clean_content)
             print(f"   ✓ Summary created")
             return summary
 
@@ -176,6 +202,8 @@ class PaperSummarizer:
         Analyze paper by splitting into sections.
         
         Better for long papers - analyzes in chunks then synthesizes.
+        The section calls run concurrently (see asummarize_sections).
+        Call asummarize_sections() directly from async code.
         
         Args:
             page_texts: List of text from each page
@@ -184,63 +212,291 @@ class PaperSummarizer:
         Returns:
             List of section summaries
         """
+        async def run() -> List[Dict]:
+            try:
+                return await self.asummarize_sections(
+                    self.split_sections(page_texts, pages_per_section)
+                )
+            finally:
+                await self.claude.aclose()
+        
+        return asyncio.run(run())
+    
+    def analyze_by_sections_batched(self,
+                                    page_texts: List[str],
+                                    pages_per_section: int = 5) -> List[Dict]:
+        """
+        analyze_by_sections() through the Message Batches API.
         
-        print(f"\n📚 Analyzing paper in sections ({pages_per_section} pages each)...")
+        Half the price, but the batch runs in the background on Anthropic's
+        side and this waits for it (minutes, up to a day): for offline
+        re-analysis, not interactive use. Papers with fewer than
+        MIN_BATCH_SECTIONS sections go through analyze_by_sections().
+        Sections the batch couldn't answer are retried with regular calls.
         
-        section_summaries = []
-        total_pages = len(page_texts)
+        Args:
+            page_texts: List of text from each page
+            pages_per_section: How many pages to group into a section
         
-        # Group pages into sections
-        for i in range(0, total_pages, pages_per_section):
-            section_num = (i // pages_per_section) + 1
-            section_pages = page_texts[i:i + pages_per_section]
-            section_text = "\n\n".join(section_pages)
+        Returns:
+            List of section summaries
+        """
+        sections = self.split_sections(page_texts, pages_per_section)
+        if len(sections) < MIN_BATCH_SECTIONS:
+            return self.analyze_by_sections(page_texts, pages_per_section)
+        
+        print(f"\n📦 Analyzing {len(sections)} sections in a message batch (this can take a while)...")
+        
+        responses = self.claude.call_batch([
+            {'custom_id': f"section-{i}", **self._section_request(title, text)}
+            for i, (title, text) in enumerate(sections)
+        ])
+        
+        summaries = []
+        failed = []
+        for i, (title, text) in enumerate(sections):
+            response = responses.get(f"section-{i}")
+            if response is None:
+                failed.append(i)
+                summaries.append(None)
+            else:
+                summaries.append(self._parse_section_summary(title, response))
+        
+        if failed:
+            print(f"   ⚠️  {len(failed)} sections failed in the batch, analyzing them directly")
             
-            print(f"\nSection {section_num} (pages {i+1}-{min(i+pages_per_section, total_pages)}):")
+            async def run() -> List[Dict]:
+                try:
+                    return await asyncio.gather(*[
+                        self._asummarize_section(*sections[i]) for i in failed
+                    ])
+                finally:
+                    await self.claude.aclose()
+            
+            for i, summary in zip(failed, asyncio.run(run())):
+                summaries[i] = summary
+        
+        print(f"\n✅ Analyzed {len(summaries)} sections")
+        return summaries
+    
+    @staticmethod
+    def split_sections(page_texts: List[str],
+                       pages_per_section: int = 5) -> List[Tuple[str, str]]:
+        """
+        Group pages into (title, text) sections.
+        
+        Args:
+            page_texts: List of text from each page
+            pages_per_section: How many pages to group into a section
+        
+        Returns:
+            [('Section 1', 'text of pages 1-5'), ...]
+        """
+        sections = []
+        
+        for i in range(0, len(page_texts), pages_per_section):
+            section_num = (i // pages_per_section) + 1
+            section_text, truncated = PaperSummarizer.pack_section(
+                page_texts[i:i + pages_per_section]
+            )
             
-            # Truncate very long sections
-            if len(section_text) > 6000:
-                print(f"   ⚠️  Section too long, truncating...")
-                section_text = section_text[:6000] + "..."
+            # Very long sections are truncated
+            if truncated:
+                print(f"   ⚠️  Section {section_num} too long, truncating...")
             
-            # Analyze section
-            prompt = section_summary_prompt(f"Section {section_num}", section_text)
+            sections.append((f"Section {section_num}", section_text))
+        
+        return sections
+    
+    @staticmethod
+    def pack_section(pages: List[str],
+                     max_chars: int = MAX_SECTION_CHARS) -> Tuple[str, bool]:
+        """
+        Join a section's pages into at most max_chars of text.
+        
+        Pages are added whole while they fit. The first one that doesn't
+        is cut at its last whitespace (so the section doesn't end
+        mid-word), and the pages after it are never joined.
+        
+        Args:
+            pages: Text of the section's pages
+            max_chars: Maximum section length (before the "..." marker)
+        
+        Returns:
+            (section text, True if it was truncated)
+        """
+        packed = []
+        length = 0
+        
+        for page in pages:
+            separator = 2 if packed else 0  # "\n\n"
+            if length + separator + len(page) <= max_chars:
+                packed.append(page)
+                length += separator + len(page)
+                continue
             
-            try:
-                response = self.claude.call(
-                    messages=[{'role': 'user', 'content': prompt}],
-                    temperature=0.5
-                )
-
-                # Strip markdown if present
-                clean_content = strip_markdown_json(response['content'])
-
-                summary = json.loads(clean_content)
-                section_summaries.append(summary)
-
-                # Show progress
-                main_points = summary.get('main_points', [])
-                if main_points:
-                    print(f"   ✓ Main point: {main_points[0][:60]}...")
-
-            except json.JSONDecodeError as e:
-                print(f"   ❌ Error parsing section JSON: {e}")
-                print(f"   Response preview: {response['content'][:200]}...")
-                section_summaries.append({
-                    'section': f"Section {section_num}",
-                    'error': f'JSON parse error: {str(e)}',
-                    'raw_response': response['content'][:500]
-                })
-            except Exception as e:
-                print(f"   ❌ Error analyzing section: {e}")
-                section_summaries.append({
-                    'section': f"Section {section_num}",
-                    'error': str(e)
-                })
+            room = max_chars - length - separator
+            if room > 0:
+                cut = max(page.rfind(' ', 0, room + 1), page.rfind('\n', 0, room + 1))
+                head = page[:cut if cut > 0 else room].rstrip()
+                if head:
+                    packed.append(head)
+            return "\n\n".join(packed) + "...", True
+        
+        return "\n\n".join(packed), False
+    
+    @staticmethod
+    def group_sections(sections: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+        """
+        Batch consecutive short sections so they share one API call.
+        
+        A group holds at most MAX_SECTIONS_PER_BATCH sections and stays
+        under BATCH_TOKEN_LIMIT input tokens (estimated from characters).
+        
+        Args:
+            sections: (title, text) pairs from split_sections()
+        
+        Returns:
+            List of groups, in paper order
+        """
+        groups = []
+        current = []
+        current_tokens = 0
+        
+        for section in sections:
+            tokens = len(section[1]) // CHARS_PER_TOKEN
+            if current and (current_tokens + tokens >= BATCH_TOKEN_LIMIT
+                            or len(current) >= MAX_SECTIONS_PER_BATCH):
+                groups.append(current)
+                current = []
+                current_tokens = 0
+            current.append(section)
+            current_tokens += tokens
+        
+        if current:
+            groups.append(current)
+        return groups
+    
+    async def asummarize_sections(self,
+                                  sections: List[Tuple[str, str]],
+                                  concurrency: int = MAX_CONCURRENT_CALLS) -> List[Dict]:
+        """
+        Summarize sections concurrently, batching short ones together.
+        
+        Each group from group_sections() is one API call; the calls run
+        at the same time (at most `concurrency` in flight).
+        
+        Args:
+            sections: (title, text) pairs from split_sections()
+            concurrency: Maximum text calls in flight at once
+        
+        Returns:
+            List of section summaries (same order as sections)
+        """
+        groups = self.group_sections(sections)
+        
+        print(f"\n📚 Analyzing {len(sections)} sections in {len(groups)} calls...")
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def limited(group: List[Tuple[str, str]]) -> List[Dict]:
+            async with semaphore:
+                return await self._asummarize_group(group)
+        
+        results = await asyncio.gather(*[limited(group) for group in groups])
+        section_summaries = [summary for group in results for summary in group]
         
         print(f"\n✅ Analyzed {len(section_summaries)} sections")
         return section_summaries
     
+    async def _asummarize_group(self, group: List[Tuple[str, str]]) -> List[Dict]:
+        """
+        Summarize one group of sections.
+        
+        A batch whose response can't be matched to its sections (bad JSON,
+        wrong count, non-object entries) is retried one section per call.
+        """
+        if len(group) == 1:
+            title, text = group[0]
+            return [await self._asummarize_section(title, text)]
+        
+        titles = ", ".join([title for title, _ in group])
+        
+        try:
+            response = await self.claude.acall_json(
+                messages=[{'role': 'user', 'content': section_batch_prompt(group)}],
+                system=SECTION_BATCH_SUMMARY_SYSTEM,
+                temperature=0.5,
+                cache_system=True
+            )
+            summaries = _json_loads(strip_markdown_json(response['content'])).get('summaries')
+            if isinstance(summaries, list) and len(summaries) == len(group) \
+                    and all(isinstance(summary, dict) for summary in summaries):
+                for (title, _), summary in zip(group, summaries):
+                    summary.setdefault('section', title)
+                print(f"   ✓ {titles}")
+                return summaries
+            print(f"   ⚠️  Batch response didn't match {titles}, retrying one by one")
+        except Exception as e:
+            print(f"   ⚠️  Batch of {titles} failed ({e}), retrying one by one")
+        
+        return list(await asyncio.gather(*[
+            self._asummarize_section(title, text) for title, text in group
+        ]))
+    
+    async def _asummarize_section(self, title: str, text: str) -> Dict:
+        """Summarize a single section (errors become an error entry)"""
+        try:
+            response = await self.claude.acall_json(**self._section_request(title, text))
+        except Exception as e:
+            print(f"   ❌ Error analyzing {title}: {e}")
+            return {
+                'section': title,
+                'error': str(e)
+            }
+        
+        return self._parse_section_summary(title, response)
+    
+    @staticmethod
+    def _section_request(title: str, text: str) -> Dict:
+        """Text call arguments summarizing one section"""
+        return {
+            'messages': [{'role': 'user', 'content': section_summary_prompt(title, text)}],
+            'system': SECTION_SUMMARY_SYSTEM,
+            'temperature': 0.5,
+            'cache_system': True
+        }
+    
+    @staticmethod
+    def _parse_section_summary(title: str, response: Dict) -> Dict:
+        """Section summary from a call response (errors become an error entry)"""
+        try:
+            # Strip markdown if present
+            clean_content = strip_markdown_json(response['content'])
+
+            summary = _json_loads(clean_content)
+
+            # Show progress
+            main_points = summary.get('main_points', [])
+            if main_points:
+                print(f"   ✓ {title}: {main_points[0][:60]}...")
+            return summary
+
+        except json.JSONDecodeError as e:
+            print(f"   ❌ Error parsing {title} JSON: {e}")
+            print(f"   Response preview: {response['content'][:200]}...")
+            return {
+                'section': title,
+                'error': f'JSON parse error: {str(e)}',
+                'raw_response': response['content'][:500]
+            }
+        except Exception as e:
+            print(f"   ❌ Error analyzing {title}: {e}")
+            return {
+                'section': title,
+                'error': str(e)
+            }
+    
     def synthesize_sections(self, section_summaries: List[Dict]) -> Dict:
         """
         Synthesize section summaries into a complete paper summary.
@@ -262,7 +518,7 @@ class PaperSummarizer:
         prompt = full_synthesis_prompt(section_summaries)
         
         try:
-            response = self.claude.call(
+            response = self.claude.call_json(
                 messages=[{'role': 'user', 'content': prompt}],
                 temperature=0.7  # Higher for synthesis
             )
@@ -270,7 +526,7 @@ class PaperSummarizer:
             # Strip markdown if present
             clean_content = strip_markdown_json(response['content'])
 
-            synthesis = json.loads(clean_content)
+            synthesis = _json_loads(clean_content)
             print(f"   ✓ Synthesis complete")
 
             # Show executive summary
@@ -297,21 +553,49 @@ class PaperSummarizer:
             }
     
     def full_analysis(self, 
-                     text: str,
+                     text: Optional[str],
                      page_texts: List[str],
                      first_page: str = None) -> Dict:
         """
         Complete analysis pipeline.
         
         Recommended approach for comprehensive papers.
+        Synchronous wrapper around afull_analysis().
+        
+        Args:
+            text: Full paper text (unused, sections come from page_texts;
+                None is fine)
+            page_texts: Text from each page (for section analysis)
+            first_page: Text from first page (for metadata)
+        
+        Returns:
+            Complete analysis dict
+        """
+        async def run() -> Dict:
+            try:
+                return await self.afull_analysis(text, page_texts, first_page)
+            finally:
+                await self.claude.aclose()
+        
+        return asyncio.run(run())
+    
+    async def afull_analysis(self,
+                             text: Optional[str],
+                             page_texts: List[str],
+                             first_page: str = None) -> Dict:
+        """
+        Complete analysis pipeline (async).
         
         Steps:
         1. Extract metadata from first page
         2. Analyze by sections
         3. Synthesize into complete summary
         
+        Steps 1 and 2 are independent, so they run at the same time.
+        
         Args:
-            text: Full paper text (for reference)
+            text: Full paper text (unused, sections come from page_texts;
+                None is fine)
             page_texts: Text from each page (for section analysis)
             first_page: Text from first page (for metadata)
         
@@ -323,17 +607,20 @@ class PaperSummarizer:
         print("STARTING FULL PAPER ANALYSIS")
         print("="*60)
         
-        # Step 1: Extract metadata
-        metadata = {}
+        # Step 1: Extract metadata (sync call, on a worker thread)
+        metadata_task = None
         if first_page or (page_texts and len(page_texts) > 0):
             first_page_text = first_page or page_texts[0]
-            metadata = self.extract_metadata_from_text(first_page_text)
+            metadata_task = asyncio.create_task(
+                asyncio.to_thread(self.extract_metadata_from_text, first_page_text)
+            )
         
         # Step 2: Analyze sections
-        section_summaries = self.analyze_by_sections(page_texts)
+        section_summaries = await self.asummarize_sections(self.split_sections(page_texts))
+        metadata = await metadata_task if metadata_task else {}
         
         # Step 3: Synthesize
-        synthesis = self.synthesize_sections(section_summaries)
+        synthesis = await asyncio.to_thread(self.synthesize_sections, section_summaries)
         
         # Combine results
         print("\n" + "="*60)
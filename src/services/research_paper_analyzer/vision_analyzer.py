@@ -5,18 +5,36 @@ Analyze charts, graphs, and images from research papers using Claude Vision API.
 
 This module:
 1. Takes extracted images from PDFs
-2. Sends them to Claude Vision API
-3. Gets back structured analysis of what the chart shows
-4. Extracts key findings from visual data
+2. Downscales/recompresses them to the size Claude actually uses
+3. Sends them to Claude Vision API
+4. Gets back structured analysis of what the chart shows
+5. Extracts key findings from visual data
 
 Used by: analyzer.py
 Depends on: papers_client.py, papers_prompts.py
 """
 
+import asyncio
+import hashlib
 import json
-from typing import Dict, List
+from io import BytesIO
+from typing import Dict, List, Union
+import numpy as np
+from PIL import Image
 from client import ClaudeClient
-from prompts import vision_chart_analysis_prompt
+from prompts import (
+    VISION_BATCH_ANALYSIS_SYSTEM,
+    VISION_CHART_ANALYSIS_SYSTEM,
+    vision_batch_prompt,
+    vision_chart_analysis_prompt
+)
+
+# orjson (C-backed) parses responses faster than stdlib json; fall back
+# to json if it isn't installed. Both raise json.JSONDecodeError.
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
 
 
 class VisionAnalyzer:
@@ -27,12 +45,36 @@ class VisionAnalyzer:
         analyzer = VisionAnalyzer()
         
         # Analyze single image
-        result = analyzer.analyze_image(image_base64, caption="Figure 3.2")
+        result = analyzer.analyze_image(png_bytes, caption="Figure 3.2")
         
-        # Analyze multiple images
+        # Analyze multiple images (one per call by default,
+        # up to MAX_CONCURRENT_CALLS calls at a time)
         results = analyzer.analyze_multiple(images_list)
     """
     
+    # Vision calls in flight at once in analyze_multiple()
+    MAX_CONCURRENT_CALLS = 5
+    
+    # Images sent together in one Vision call by analyze_multiple(). One:
+    # a combined answer is generated image after image, so it finishes
+    # later than the same images analyzed by concurrent calls, and its
+    # tokens can only be split evenly between the images. Larger groups
+    # only save per-call overhead (up to 5 stay well within max_tokens).
+    MAX_IMAGES_PER_CALL = 1
+    
+    # Claude downsizes larger images itself (long edge 1568 px, ~1.15
+    # megapixels), so sending more pixels only costs bandwidth
+    MAX_IMAGE_EDGE = 1568
+    MAX_IMAGE_PIXELS = 1_150_000
+    JPEG_QUALITY = 85
+    
+    # is_likely_figure() thresholds
+    MIN_FIGURE_SIZE = 100      # px, smaller images are icons/logos
+    MAX_ASPECT_RATIO = 10      # wider/taller than 10:1 is a rule line or banner
+    MIN_PIXEL_STD = 5.0        # grey-level std of a 32x32 thumbnail; page
+                               # renders with text sit around 7-14, blank
+                               # or near-empty pages below 4
+    
     def __init__(self, claude_client: ClaudeClient = None):
         """
         Initialize vision analyzer.
@@ -44,14 +86,14 @@ class VisionAnalyzer:
         print("✅ Vision Analyzer initialized")
     
     def analyze_image(self, 
-                     image_data: str, 
+                     image_data: Union[bytes, str], 
                      caption: str = "",
                      page: int = None) -> Dict:
         """
         Analyze a single image/chart.
         
         Args:
-            image_data: Base64-encoded image string
+            image_data: Raw image bytes (or a base64-encoded string)
             caption: Optional caption from PDF (e.g., "Figure 3.2: ...")
             page: Page number where image was found
         
@@ -78,44 +120,62 @@ class VisionAnalyzer:
         prompt = vision_chart_analysis_prompt(caption)
         
         try:
+            image_data = self.prepare_image(image_data)
+            
             # Call Vision API
             response = self.claude.call_vision(
                 image_data=image_data,
                 prompt=prompt,
-                temperature=0.5  # Lower for analytical consistency
+                temperature=0.5,  # Lower for analytical consistency
+                system=VISION_CHART_ANALYSIS_SYSTEM,
+                cache_system=True
             )
+            return self._build_result(response, caption, page)
             
-            # Parse JSON response
-            try:
-                analysis = json.loads(response['content'])
-            except json.JSONDecodeError:
-                # If Claude didn't return valid JSON, wrap the text response
-                print("   ⚠️  Response not in JSON format, wrapping as text")
-                analysis = {
-                    'raw_response': response['content'],
-                    'error': 'Could not parse as JSON'
-                }
-            
-            # Create plain English summary
-            if 'key_finding' in analysis:
-                plain_english = (
-                    f"This {analysis.get('chart_type', 'chart')} shows "
-                    f"{analysis.get('key_finding', 'data visualization')}. "
-                    f"{analysis.get('scientific_implication', '')}"
-                )
-            else:
-                plain_english = response['content'][:200] + "..."
-            
+        except Exception as e:
+            print(f"   ❌ Error analyzing image: {e}")
             return {
                 'page': page,
                 'caption': caption,
-                'analysis': analysis,
-                'plain_english': plain_english,
-                'tokens_used': response['usage']['input_tokens'] + response['usage']['output_tokens']
+                'error': str(e),
+                'analysis': None
             }
+    
+    async def aanalyze_image(self,
+                             image_data: Union[bytes, str],
+                             caption: str = "",
+                             page: int = None) -> Dict:
+        """
+        Async version of analyze_image().
+        
+        Args:
+            image_data: Raw image bytes (or a base64-encoded string)
+            caption: Optional caption from PDF (e.g., "Figure 3.2: ...")
+            page: Page number where image was found
+        
+        Returns:
+            Same as analyze_image()
+        """
+        
+        print(f"\n👁️  Analyzing image{f' (page {page})' if page else ''}...")
+        
+        prompt = vision_chart_analysis_prompt(caption)
+        
+        try:
+            # Pillow work runs off the event loop (it releases the GIL)
+            image_data = await asyncio.to_thread(self.prepare_image, image_data)
+            
+            response = await self.claude.acall_vision(
+                image_data=image_data,
+                prompt=prompt,
+                temperature=0.5,  # Lower for analytical consistency
+                system=VISION_CHART_ANALYSIS_SYSTEM,
+                cache_system=True
+            )
+            return self._build_result(response, caption, page)
             
         except Exception as e:
-            print(f"   ❌ Error analyzing image: {e}")
+            print(f"   ❌ Error analyzing image{f' (page {page})' if page else ''}: {e}")
             return {
                 'page': page,
                 'caption': caption,
@@ -123,53 +183,358 @@ class VisionAnalyzer:
                 'analysis': None
             }
     
+    def prepare_image(self, image_data: Union[bytes, str]) -> Union[bytes, str]:
+        """
+        Shrink an image to what the Vision API will actually look at.
+        
+        Images larger than MAX_IMAGE_EDGE / MAX_IMAGE_PIXELS are resized
+        (Claude would downscale them anyway), then re-encoded as JPEG
+        (transparent areas become white). The
+        JPEG is sent only if it is smaller than the original (a resized
+        PNG is usually larger still, and ~40x slower to encode).
+        
+        Args:
+            image_data: Raw image bytes (base64 strings are passed through)
+        
+        Returns:
+            Image bytes to send
+        """
+        if isinstance(image_data, str):
+            return image_data
+        
+        try:
+            with Image.open(BytesIO(image_data)) as image:
+                if image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info:
+                    # JPEG has no alpha: flatten onto white, as a viewer shows
+                    # it (transparent pixels often store black)
+                    image = image.convert('RGBA')
+                    image = Image.alpha_composite(
+                        Image.new('RGBA', image.size, (255, 255, 255, 255)), image
+                    ).convert('RGB')
+                elif image.mode not in ('RGB', 'L'):
+                    image = image.convert('RGB')
+                
+                width, height = image.size
+                scale = min(
+                    1.0,
+                    self.MAX_IMAGE_EDGE / max(width, height),
+                    (self.MAX_IMAGE_PIXELS / (width * height)) ** 0.5
+                )
+                if scale < 1.0:
+                    image = image.resize(
+                        (max(1, int(width * scale)), max(1, int(height * scale))),
+                        Image.LANCZOS
+                    )
+                
+                buffered = BytesIO()
+                image.save(buffered, format="JPEG", quality=self.JPEG_QUALITY, optimize=True)
+                recompressed = buffered.getvalue()
+        except (OSError, ValueError) as e:
+            print(f"   ⚠️  Could not recompress image, sending as is: {e}")
+            return image_data
+        
+        if len(recompressed) >= len(image_data):
+            return image_data
+        
+        self.claude.record_image_bytes_saved(len(image_data) - len(recompressed))
+        return recompressed
+    
+    def _build_result(self, response: Dict, caption: str, page: int) -> Dict:
+        """Parse a Vision API response into the analyze_image() result dict"""
+        
+        # Parse JSON response
+        try:
+            analysis = _json_loads(response['content'])
+        except json.JSONDecodeError:
+            # If Claude didn't return valid JSON, wrap the text response
+            print("   ⚠️  Response not in JSON format, wrapping as text")
+            analysis = {
+                'raw_response': response['content'],
+                'error': 'Could not parse as JSON'
+            }
+        
+        return self._analysis_result(
+            analysis, caption, page,
+            tokens_used=response['usage']['input_tokens'] + response['usage']['output_tokens'],
+            raw_text=response['content']
+        )
+    
+    @staticmethod
+    def _analysis_result(analysis: Dict,
+                         caption: str,
+                         page: int,
+                         tokens_used: int,
+                         raw_text: str) -> Dict:
+        """Build the analyze_image() result dict around a parsed analysis"""
+        
+        # Create plain English summary
+        if 'key_finding' in analysis:
+            plain_english = (
+                f"This {analysis.get('chart_type', 'chart')} shows "
+                f"{analysis.get('key_finding', 'data visualization')}. "
+                f"{analysis.get('scientific_implication', '')}"
+            )
+        else:
+            plain_english = raw_text[:200] + "..."
+        
+        return {
+            'page': page,
+            'caption': caption,
+            'analysis': analysis,
+            'plain_english': plain_english,
+            'tokens_used': tokens_used
+        }
+    
     def analyze_multiple(self, 
                         images: List[Dict],
-                        max_images: int = 20) -> List[Dict]:
+                        max_images: int = 20,
+                        concurrency: int = MAX_CONCURRENT_CALLS,
+                        images_per_call: int = MAX_IMAGES_PER_CALL) -> List[Dict]:
         """
         Analyze multiple images from a paper.
         
+        The Vision calls run concurrently (see aanalyze_multiple), one
+        image per call unless images_per_call says otherwise.
+        Call aanalyze_multiple() directly from async code.
+        
         Args:
             images: List of image dicts from pdf_processor
-                    [{'page': 23, 'image_data': '...', 'caption': '...'}, ...]
+                    [{'page': 23, 'image_bytes': b'...', 'caption': '...'}, ...]
             max_images: Maximum images to analyze (cost control)
+            concurrency: Maximum Vision calls in flight at once
+            images_per_call: Images sent together in one Vision call
+                (fewer calls, but slower; see MAX_IMAGES_PER_CALL)
         
         Returns:
-            List of analysis results
+            List of analysis results (same order as images)
+        """
+        async def run() -> List[Dict]:
+            try:
+                return await self.aanalyze_multiple(images, max_images, concurrency,
+                                                    images_per_call)
+            finally:
+                await self.claude.aclose()
+        
+        return asyncio.run(run())
+    
+    async def aanalyze_multiple(self,
+                                images: List[Dict],
+                                max_images: int = 20,
+                                concurrency: int = MAX_CONCURRENT_CALLS,
+                                images_per_call: int = MAX_IMAGES_PER_CALL) -> List[Dict]:
         """
+        Analyze multiple images concurrently.
         
-        print(f"\n🖼️  Analyzing {min(len(images), max_images)} images...")
+        Args:
+            images: List of image dicts from pdf_processor
+            max_images: Maximum images to analyze (cost control)
+            concurrency: Maximum Vision calls in flight at once
+            images_per_call: Images sent together in one Vision call
+        
+        Returns:
+            List of analysis results (same order as images)
+        """
+        
+        selected = images[:max_images]
+        
+        # Identical images (repeated logos, figures, pages) are analyzed once
+        first_index = {}  # image digest -> index in unique
+        unique = []
+        order = []
+        for image in selected:
+            digest = self.image_digest(image['image_bytes'])
+            if digest not in first_index:
+                first_index[digest] = len(unique)
+                unique.append(image)
+            order.append(first_index[digest])
+        
+        images_per_call = max(1, images_per_call)
+        groups = [unique[i:i + images_per_call]
+                  for i in range(0, len(unique), images_per_call)]
+        
+        print(f"\n🖼️  Analyzing {len(unique)} images in {len(groups)} calls "
+              f"({concurrency} at a time)...")
+        if len(unique) < len(selected):
+            print(f"   ♻️  Skipping {len(selected) - len(unique)} duplicate images")
         print("="*60)
         
-        results = []
+        semaphore = asyncio.Semaphore(concurrency)
+        group_results = await asyncio.gather(*(self.aanalyze_group(group, semaphore)
+                                               for group in groups))
+        unique_results = [result for results in group_results for result in results]
         
-        for i, image in enumerate(images[:max_images], 1):
-            print(f"\nImage {i}/{min(len(images), max_images)}:")
-            
-            result = self.analyze_image(
-                image_data=image['image_data'],
-                caption=image.get('caption', ''),
-                page=image.get('page')
-            )
-            
-            results.append(result)
-            
-            # Show progress
-            if result.get('analysis'):
-                finding = result['analysis'].get('key_finding', 'N/A')
-                print(f"   ✓ Key finding: {finding[:80]}...")
+        results = [
+            unique_results[index] if unique[index] is image
+            else self.shared_result(unique_results[index], image)
+            for image, index in zip(selected, order)
+        ]
         
         print(f"\n✅ Analyzed {len(results)} images")
         
         return results
     
+    @staticmethod
+    def image_digest(image_bytes: bytes) -> bytes:
+        """Short hash identifying identical images"""
+        return hashlib.blake2b(image_bytes, digest_size=16).digest()
+    
+    @staticmethod
+    def shared_result(result: Dict, image: Dict) -> Dict:
+        """
+        Reuse the analysis of an identical image for another occurrence.
+        
+        Args:
+            result: Analysis result of the first occurrence
+            image: Image dict of this occurrence
+        
+        Returns:
+            Copy of result with this image's page and caption (no tokens used)
+        """
+        return {
+            **result,
+            'page': image.get('page'),
+            'caption': image.get('caption', ''),
+            'tokens_used': 0
+        }
+    
+    async def aanalyze_limited(self, image: Dict, semaphore: asyncio.Semaphore) -> Dict:
+        """
+        Analyze one image dict once the semaphore lets it through.
+        
+        Shared by aanalyze_multiple() and the streaming pipeline in
+        analyze_papers.py, which start images as they are extracted.
+        
+        Args:
+            image: Image dict from pdf_processor
+            semaphore: Limits the Vision calls in flight
+        
+        Returns:
+            Analysis result (an error result instead of raising)
+        """
+        try:
+            async with semaphore:
+                result = await self.aanalyze_image(
+                    image_data=image['image_bytes'],
+                    caption=image.get('caption', ''),
+                    page=image.get('page')
+                )
+        except Exception as e:
+            # aanalyze_image() already turns API errors into error results
+            print(f"   ❌ Error analyzing image: {e}")
+            return {
+                'page': image.get('page'),
+                'caption': image.get('caption', ''),
+                'error': str(e),
+                'analysis': None
+            }
+        
+        # Show progress
+        if result.get('analysis'):
+            finding = result['analysis'].get('key_finding', 'N/A')
+            print(f"   ✓ Key finding (page {image.get('page')}): {finding[:80]}...")
+        
+        return result
+    
+    async def aanalyze_group(self,
+                             group: List[Dict],
+                             semaphore: asyncio.Semaphore) -> List[Dict]:
+        """
+        Analyze a group of image dicts in one Vision call.
+        
+        A response that can't be matched to its images (bad JSON, wrong
+        count) or a failed call is retried one image per call. Each
+        image is credited an even share of the call's tokens (the shares
+        add up to the call's total).
+        
+        Args:
+            group: Image dicts from pdf_processor
+            semaphore: Limits the Vision calls in flight
+        
+        Returns:
+            Analysis results (same order as group)
+        """
+        if len(group) == 1:
+            return [await self.aanalyze_limited(group[0], semaphore)]
+        
+        pages = ", ".join([str(image.get('page')) for image in group])
+        
+        try:
+            async with semaphore:
+                # Pillow work runs off the event loop (it releases the GIL)
+                image_data = await asyncio.gather(*(
+                    asyncio.to_thread(self.prepare_image, image['image_bytes'])
+                    for image in group
+                ))
+                response = await self.claude.acall_vision_multi(
+                    images=[
+                        (data, vision_batch_prompt(index, image.get('caption', '')))
+                        for index, (data, image) in enumerate(zip(image_data, group), 1)
+                    ],
+                    temperature=0.5,  # Lower for analytical consistency
+                    system=VISION_BATCH_ANALYSIS_SYSTEM,
+                    cache_system=True
+                )
+            analyses = _json_loads(response['content']).get('analyses')
+            if isinstance(analyses, list) and len(analyses) == len(group) \
+                    and all(isinstance(analysis, dict) for analysis in analyses):
+                tokens_used = response['usage']['input_tokens'] + response['usage']['output_tokens']
+                # Even shares; the first images take the remainder, so the
+                # shares add up to the call's usage
+                share, remainder = divmod(tokens_used, len(group))
+                results = []
+                for index, (image, analysis) in enumerate(zip(group, analyses)):
+                    results.append(self._analysis_result(
+                        analysis, image.get('caption', ''), image.get('page'),
+                        tokens_used=share + (index < remainder),
+                        raw_text=json.dumps(analysis)
+                    ))
+                    finding = analysis.get('key_finding', 'N/A')
+                    print(f"   ✓ Key finding (page {image.get('page')}): {finding[:80]}...")
+                return results
+            print(f"   ⚠️  Response didn't match the images of pages {pages}, retrying one by one")
+        except Exception as e:
+            print(f"   ⚠️  Images of pages {pages} failed ({e}), retrying one by one")
+        
+        return list(await asyncio.gather(*(self.aanalyze_limited(image, semaphore)
+                                           for image in group)))
+    
+    def is_likely_figure(self, image_bytes: bytes) -> bool:
+        """
+        Cheap pre-Vision check that an image could hold a figure.
+        
+        Rejects tiny images, extreme aspect ratios and near-uniform
+        images (blank pages/regions), judged from a 32x32 grayscale
+        thumbnail, so they never cost a Vision call.
+        
+        Args:
+            image_bytes: Raw image bytes
+        
+        Returns:
+            False if the image is clearly not worth analyzing
+        """
+        try:
+            with Image.open(BytesIO(image_bytes)) as image:
+                width, height = image.size
+                if min(width, height) < self.MIN_FIGURE_SIZE:
+                    return False
+                if max(width, height) / min(width, height) > self.MAX_ASPECT_RATIO:
+                    return False
+                
+                image.draft('L', (64, 64))  # lets JPEG decode at reduced size
+                thumbnail = np.asarray(image.convert('L').resize((32, 32)), dtype=np.float32)
+        except (OSError, ValueError):
+            return True  # can't tell, let Claude look at it
+        
+        return float(thumbnail.std()) >= self.MIN_PIXEL_STD
+    
     def filter_important_images(self, 
                                images: List[Dict],
                                captions: Dict[int, List[str]]) -> List[Dict]:
         """
         Filter images to only those likely to be important charts/graphs.
         
-        Use captions to identify which images are actually figures.
+        Use captions to identify which images are actually figures, after
+        dropping blank/decorative images (see is_likely_figure).
         This saves API costs by not analyzing every page image.
         
         Args:
@@ -181,10 +546,15 @@ class VisionAnalyzer:
         """
         
         important = []
+        seen = set()  # digests of kept images
         
         for image in images:
             page = image.get('page')
             
+            digest = self.image_digest(image['image_bytes'])
+            if digest in seen or not self.is_likely_figure(image['image_bytes']):
+                continue
+            
             # Check if this page has figure captions
             if page in captions:
                 # Found a caption on this page - likely contains a figure
@@ -193,6 +563,7 @@ class VisionAnalyzer:
                 # Assign the first caption (heuristic)
                 image['caption'] = page_captions[0] if page_captions else ''
                 important.append(image)
+                seen.add(digest)
         
         print(f"📊 Filtered to {len(important)} important images (from {len(images)} total)")
         
@@ -271,4 +642,4 @@ if __name__ == "__main__":
     print("2. Pass those images to analyze_image() or analyze_multiple()")
     print("\nExample:")
     print("  analyzer = VisionAnalyzer()")
-    print("  result = analyzer.analyze_image(image_base64, caption='Figure 1')")
\ No newline at end of file
+    print("  result = analyzer.analyze_image(png_bytes, caption='Figure 1')")
\ No newline at end of file